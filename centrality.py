@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+#
+# Social analysis of GitHub: PageRank and degrees of a network, updated after every mining
+#
+# Author: Massimo Menichinelli
+# Homepage: http://www.openp2pdesign.org
+# License: GPL v.3
+#
+# Requisite:
+# install NetworkX with pip install networkx
+# install SciPy with pip install scipy
+#
+# The metrics of every user of a network are kept in a file next to it: the
+# weighted PageRank, the number of users it interacts with (out_degree) and
+# that interact with it (in_degree), and the weights of these edges
+# (out_strength, in_strength). The file also has the edges of the network, as
+# arrays of the positions of their users sorted by source and target.
+#
+# When the network is mined again, only a few of its edges usually change: the
+# edges that have been added, removed or have a new weight (the delta) are
+# found in the arrays with a binary search, the degrees are updated with them
+# only, and the PageRank starts from its previous values instead of from a
+# uniform vector, so it converges in a few iterations on a sparse matrix of the
+# new edges. When more than --threshold (10% by default) of the edges have
+# changed, the metrics are computed again from the start.
+#
+# The PageRank is the one of NetworkX (networkx.pagerank): the users without
+# outgoing edges give their rank to all the users. The iterations stop when the
+# ranks of all the users change less than TOLERANCE in total (NetworkX allows a
+# change of TOLERANCE for every user, too much for networks of millions of users).
+#
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+ALPHA = 0.85
+TOLERANCE = 1.0e-6
+MAX_ITERATIONS = 100
+THRESHOLD = 0.1
+
+VECTORS = ["pagerank", "in_degree", "out_degree", "in_strength", "out_strength"]
+
+
+class Metrics(object):
+    # The metric vectors of a network, in the order of its nodes, and its edges
+
+    def __init__(self, nodes, vectors, sources, targets, weights, alpha=ALPHA, iterations=0, incremental=False):
+        self.nodes = nodes
+        self.index = dict((n, i) for i, n in enumerate(nodes))
+        self.vectors = vectors
+        self.sources = sources
+        self.targets = targets
+        self.weights = weights
+        self.alpha = alpha
+        self.iterations = iterations
+        self.incremental = incremental
+
+    def get(self, login):
+        i = self.index[login]
+        return dict((k, self.vectors[k][i].item()) for k in VECTORS)
+
+    def top(self, name, k=10):
+        order = np.argsort(-self.vectors[name], kind="mergesort")[:k]
+        return [(self.nodes[i], self.vectors[name][i].item()) for i in order]
+
+    def edges(self):
+        # The weight of every edge, by the logins of its users
+        nodes = self.nodes
+        return dict(((nodes[s], nodes[t]), w) for s, t, w in zip(self.sources.tolist(), self.targets.tolist(), self.weights.tolist()))
+
+    def save(self, path):
+        f = open(path, "wb")
+        np.savez_compressed(f, nodes=np.array([unicode(n) for n in self.nodes]), alpha=self.alpha,
+                            sources=self.sources, targets=self.targets, weights=self.weights, **self.vectors)
+        f.close()
+
+
+def load_metrics(path):
+    data = np.load(path)
+    return Metrics([str(n) for n in data["nodes"]], dict((k, data[k]) for k in VECTORS),
+                   data["sources"], data["targets"], data["weights"], float(data["alpha"]))
+
+
+def weighted_edges(graph):
+    # The weight of every edge: the number of multiple edges, or their "weight" attribute
+    edges = {}
+    for u, v, d in graph.edges_iter(data=True):
+        edges[(str(u), str(v))] = edges.get((str(u), str(v)), 0) + float(d.get("weight", 1))
+    return edges
+
+
+def sorted_edges(n, sources, targets, weights):
+    # The edges sorted by source and target, so that update_metrics can search them
+    order = np.argsort(sources * n + targets, kind="mergesort")
+    return sources[order], targets[order], weights[order]
+
+
+def pagerank(n, sources, targets, weights, out_strength, alpha=ALPHA, start=None,
+             tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS):
+    # The power iteration on the sparse matrix of the edges, from start (uniform when it is None)
+    if n == 0:
+        return np.zeros(0), 0
+    matrix = csr_matrix((weights, (targets, sources)), shape=(n, n))
+    dangling = out_strength <= 0
+    scale = np.where(dangling, 0.0, 1.0 / np.where(dangling, 1.0, out_strength))
+    x = np.repeat(1.0 / n, n) if start is None else start / start.sum()
+    for i in range(max_iterations):
+        last = x
+        x = alpha * matrix.dot(last * scale) + (alpha * last[dangling].sum() + 1.0 - alpha) / n
+        if np.abs(x - last).sum() < tolerance:
+            return x, i + 1
+    print "The PageRank has not converged in",max_iterations,"iterations"
+    return x, max_iterations
+
+
+def metrics_of(nodes, sources, targets, weights, alpha=ALPHA, start=None, vectors=None):
+    # The PageRank of the edges, and their degrees when they are not given
+    n = len(nodes)
+    if vectors is None:
+        vectors = {"out_degree": np.bincount(sources, minlength=n).astype(float),
+                   "in_degree": np.bincount(targets, minlength=n).astype(float),
+                   "out_strength": np.bincount(sources, weights, minlength=n),
+                   "in_strength": np.bincount(targets, weights, minlength=n)}
+    vectors["pagerank"], iterations = pagerank(n, sources, targets, weights, vectors["out_strength"], alpha, start)
+    return Metrics(nodes, vectors, sources, targets, weights, alpha, iterations, start is not None)
+
+
+def compute_metrics(nodes, edges, alpha=ALPHA):
+    # All the metrics of a network, from the start: edges maps (source, target) to the weight
+    nodes = [str(n) for n in nodes]
+    index = dict((n, i) for i, n in enumerate(nodes))
+    for u, v in edges:
+        for m in (u, v):
+            if m not in index:
+                index[m] = len(nodes)
+                nodes.append(m)
+    sources = np.fromiter((index[u] for u, v in edges), dtype=np.int64, count=len(edges))
+    targets = np.fromiter((index[v] for u, v in edges), dtype=np.int64, count=len(edges))
+    weights = np.fromiter(edges.itervalues(), dtype=float, count=len(edges))
+    return metrics_of(nodes, *sorted_edges(len(nodes), sources, targets, weights), alpha=alpha)
+
+
+def edge_delta(old, edges):
+    # The delta between the edges of a previous network (its metrics) and the ones of a new network:
+    # the new edges and weights, and the edges that have been removed with weight 0
+    known = old.edges()
+    delta = dict(edges.viewitems() - known.viewitems())
+    for e in known.viewkeys() - edges.viewkeys():
+        delta[e] = 0.0
+    return delta
+
+
+def update_metrics(old, delta, nodes=None, threshold=THRESHOLD, alpha=ALPHA):
+    # The metrics of the new network, from the ones of the previous network and the delta of its edges:
+    # (source, target) -> new weight, 0 for the edges that have been removed. When nodes is given,
+    # they are all the users of the new network: the ones that are not there anymore are removed
+    changed = float(len(delta)) / max(len(old.weights), 1)
+    print len(delta),"edges changed (%.2f%%)" % (100 * changed)
+    if changed > threshold or alpha != old.alpha:
+        print "Computing the metrics from the start..."
+        edges = old.edges()
+        for e, w in delta.iteritems():
+            if w > 0:
+                edges[e] = w
+            else:
+                edges.pop(e, None)
+        return compute_metrics(nodes if nodes is not None else old.nodes, edges, alpha)
+
+    # The new users are added at the end, the others keep their position
+    order = list(old.nodes)
+    index = dict(old.index)
+    for m in [m for e in delta for m in e] + [str(m) for m in nodes or []]:
+        if m not in index:
+            index[m] = len(order)
+            order.append(m)
+    n = len(order)
+    vectors = dict((k, np.concatenate([old.vectors[k], np.zeros(n - len(old.nodes))])) for k in VECTORS)
+    sources, targets, weights = old.sources, old.targets, old.weights
+
+    if len(delta) > 0:
+        s = np.array([index[u] for u, v in delta], dtype=np.int64)
+        t = np.array([index[v] for u, v in delta], dtype=np.int64)
+        after = np.array(delta.values(), dtype=float)
+        # The previous weights, with a binary search in the edges (sorted by source and target)
+        keys = sources * n + targets
+        wanted = s * n + t
+        found = np.zeros(len(s), dtype=np.int64)
+        present = np.zeros(len(s), dtype=bool)
+        if len(keys) > 0:
+            found = np.minimum(np.searchsorted(keys, wanted), len(keys) - 1)
+            present = keys[found] == wanted
+        before = np.where(present, weights[found] if len(keys) > 0 else 0.0, 0.0)
+
+        # The degrees and the strengths, from the changed edges only
+        degree = (after > 0).astype(float) - (before > 0).astype(float)
+        np.add.at(vectors["out_degree"], s, degree)
+        np.add.at(vectors["in_degree"], t, degree)
+        np.add.at(vectors["out_strength"], s, after - before)
+        np.add.at(vectors["in_strength"], t, after - before)
+
+        # The new weights of the edges found, the edges added, and without the ones with weight 0
+        weights = weights.copy()
+        weights[found[present]] = after[present]
+        sources = np.concatenate([sources, s[~present]])
+        targets = np.concatenate([targets, t[~present]])
+        weights = np.concatenate([weights, after[~present]])
+        keep = weights > 0
+        sources, targets, weights = sorted_edges(n, sources[keep], targets[keep], weights[keep])
+
+    # The PageRank starts from the previous one, and from the uniform rank for the new users
+    start = vectors["pagerank"]
+    start[len(old.nodes):] = 1.0 / n
+
+    alive = np.array([True] * n) if nodes is None else np.in1d(np.arange(n), [index[str(m)] for m in nodes])
+    if not alive.all():
+        # The users that have left the network, and the edges that they still had
+        gone = ~(alive[sources] & alive[targets])
+        np.add.at(vectors["out_degree"], sources[gone], -1.0)
+        np.add.at(vectors["in_degree"], targets[gone], -1.0)
+        np.add.at(vectors["out_strength"], sources[gone], -weights[gone])
+        np.add.at(vectors["in_strength"], targets[gone], -weights[gone])
+        position = np.cumsum(alive) - 1
+        for k in VECTORS:
+            vectors[k] = vectors[k][alive]
+        order = [m for m, a in zip(order, alive) if a]
+        sources, targets, weights = sorted_edges(len(order), position[sources[~gone]], position[targets[~gone]], weights[~gone])
+        start = vectors["pagerank"]
+
+    return metrics_of(order, sources, targets, weights, alpha, start, vectors)
+
+
+if __name__ == "__main__":
+    pass
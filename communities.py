@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+#
+# Social analysis of GitHub: the communities of a network, found before saving it
+#
+# Author: Massimo Menichinelli
+# Homepage: http://www.openp2pdesign.org
+# License: GPL v.3
+#
+# Requisite:
+# install NetworkX with pip install networkx
+# install NumPy with pip install numpy
+#
+# With --communities the scripts find the communities of their network with
+# the Louvain method, and write the community of every user (0 is the largest
+# one) as its "community" attribute, which Gephi can use for partitioning the
+# graph. The direction of the edges is ignored, and their weights are summed.
+#
+# The network is kept as arrays (the rows of a CSR matrix) instead of a
+# NetworkX graph. Every user moves to the community of its neighbours that
+# increases the modularity most; the users move in batches, and the moves of a
+# batch are all computed at once, against the communities left by the previous
+# batch, with --processes=N processes that compute the moves of parts of the
+# batch. When the users do not move anymore, every community becomes a user of
+# a smaller network, and the users of this one move too, until the modularity
+# does not increase anymore. The users are split in batches in a random order
+# from a fixed seed, so the same network has always the same communities.
+#
+# --resolution=1.0 is the resolution of the modularity: with a larger one the
+# communities are smaller. A network saved before can be partitioned with:
+#
+#   python communities.py --graph=FILE.gexf [--resolution=1.0] [--processes=N]
+#
+
+import multiprocessing
+from array import array
+import time
+from multiprocessing.sharedctypes import RawArray
+
+import networkx as nx
+import numpy as np
+
+from options import get_flags
+
+RESOLUTION = 1.0
+# The batches of users that move together, in every sweep of the users
+BATCHES = 32
+SWEEPS = 20
+# The smallest increase of the modularity in a sweep
+TOLERANCE = 1.0e-4
+SEED = 0
+
+# The network of the current level and the communities, shared with the processes of the pool
+shared = {}
+
+
+class Level(object):
+    # A symmetric network as a CSR matrix: the neighbours of user i are indices[indptr[i]:indptr[i+1]]
+
+    def __init__(self, n, rows, cols, weights):
+        order = np.argsort(rows, kind="mergesort")
+        self.n = n
+        self.rows = rows
+        self.cols = cols
+        self.values = weights
+        self.indptr = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=n))])
+        self.indices = cols[order]
+        self.weights = weights[order]
+        self.degree = np.bincount(rows, weights, minlength=n)
+        self.total = self.degree.sum()
+
+    def neighbours(self, nodes):
+        # The positions (in nodes), neighbours and weights of all the edges of some users
+        lengths = self.indptr[nodes + 1] - self.indptr[nodes]
+        owner = np.repeat(np.arange(len(nodes)), lengths)
+        starts = np.repeat(self.indptr[nodes] - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths)
+        positions = starts + np.arange(lengths.sum())
+        return owner, self.indices[positions], self.weights[positions]
+
+
+def symmetric(sources, targets, weights):
+    # The entries of the symmetric matrix of an undirected network: every edge in both directions
+    return np.concatenate([sources, targets]), np.concatenate([targets, sources]), np.concatenate([weights, weights])
+
+
+def best_moves(level, nodes, community, sigma, resolution):
+    # The best community of every user of a batch, given the communities of all the users
+    # and their total degree (sigma): the gain of joining a community c is
+    # k(i, c) - resolution * k(i) * sigma(c) / 2m, where sigma(c) is without the user itself
+    if len(nodes) == 0:
+        return nodes
+    owner, neighbour, weight = level.neighbours(nodes)
+    keep = neighbour != nodes[owner]
+    owner, weight = owner[keep], weight[keep]
+    c = community[neighbour[keep]]
+    own = community[nodes]
+    # Staying in its own community is always a candidate, even without neighbours in it
+    owner = np.concatenate([owner, np.arange(len(nodes))])
+    c = np.concatenate([c, own])
+    weight = np.concatenate([weight, np.zeros(len(nodes))])
+    keys, found = np.unique(owner * level.n + c, return_inverse=True)
+    links = np.bincount(found, weight)
+    owner, c = keys // level.n, keys % level.n
+    k = level.degree[nodes][owner]
+    mine = c == own[owner]
+    gain = links - resolution * k * (sigma[c] - np.where(mine, k, 0.0)) / level.total
+    stay = np.zeros(len(nodes))
+    stay[owner[mine]] = gain[mine]
+    # The best gain, then staying, then the first community, for every user
+    order = np.lexsort((c, ~mine, -gain, owner))
+    first = order[np.r_[True, owner[order][1:] != owner[order][:-1]]]
+    best = own.copy()
+    better = gain[first] > stay[owner[first]] + 1e-12 * level.total
+    best[owner[first][better]] = c[first][better]
+    return best
+
+
+def moves_block(task):
+    # The best moves of a part of a batch, from the shared communities
+    start, end, resolution = task
+    level = shared["level"]
+    nodes = shared["batch"][start:end].astype(np.int64)
+    return start, best_moves(level, nodes, shared["community"][:level.n].astype(np.int64), shared["sigma"][:level.n], resolution)
+
+
+def modularity(level, community, resolution=RESOLUTION):
+    # The weight of the edges inside the communities, minus the one expected by chance
+    inside = np.bincount(community[level.rows], level.values * (community[level.rows] == community[level.cols]),
+                         minlength=level.n)
+    sigma = np.bincount(community, level.degree, minlength=level.n)
+    return (inside / level.total - resolution * (sigma / level.total) ** 2).sum()
+
+
+def local_moving(level, resolution, random, pool=None, processes=1):
+    # Move the users of a level until the modularity does not increase: their communities
+    community = np.arange(level.n)
+    sigma = level.degree.copy()
+    quality = modularity(level, community, resolution)
+    for sweep in range(SWEEPS):
+        moved = 0
+        for batch in np.array_split(random.permutation(level.n), BATCHES):
+            if pool is None:
+                best = best_moves(level, batch, community, sigma, resolution)
+            else:
+                shared["batch"][:len(batch)] = batch
+                shared["community"][:level.n] = community
+                shared["sigma"][:level.n] = sigma
+                size = len(batch) // processes + 1
+                best = np.empty(len(batch), dtype=np.int64)
+                for start, b in pool.map(moves_block, [(s, min(s + size, len(batch)), resolution)
+                                                       for s in range(0, len(batch), size)]):
+                    best[start:start + len(b)] = b
+            changed = best != community[batch]
+            np.add.at(sigma, community[batch[changed]], -level.degree[batch[changed]])
+            np.add.at(sigma, best[changed], level.degree[batch[changed]])
+            community[batch[changed]] = best[changed]
+            moved += changed.sum()
+        new = modularity(level, community, resolution)
+        print "- Sweep",sweep+1,":",moved,"users moved, modularity %.4f" % new
+        if moved == 0 or new - quality < TOLERANCE:
+            break
+        quality = new
+    return community
+
+
+def start_pool(level, processes):
+    # The processes share the arrays of the level, inherited when they start
+    if processes <= 1:
+        return None
+    shared["level"] = level
+    for name in ("batch", "community"):
+        shared[name] = np.frombuffer(RawArray("l", level.n), dtype=np.int_)
+    shared["sigma"] = np.frombuffer(RawArray("d", level.n), dtype=float)
+    return multiprocessing.Pool(processes)
+
+
+def compute_communities(n, sources, targets, weights, resolution=RESOLUTION, processes=1):
+    # The community of n users, from their edges (arrays of positions and weights): 0 is the largest one
+    rows, cols, values = symmetric(np.asarray(sources, dtype=np.int64), np.asarray(targets, dtype=np.int64),
+                                   np.asarray(weights, dtype=float))
+    random = np.random.RandomState(SEED)
+    membership = np.arange(n)
+    size = n
+    while size > 0 and len(values) > 0:
+        start = time.time()
+        level = Level(size, rows, cols, values)
+        print "Level of",size,"users and",len(values) // 2,"edges"
+        pool = start_pool(level, processes)
+        try:
+            community = local_moving(level, resolution, random, pool, processes)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+        labels, community = np.unique(community, return_inverse=True)
+        print "-",len(labels),"communities in %.1f seconds" % (time.time() - start)
+        if len(labels) == size:
+            break
+        # The communities become the users of the next level, with the edges between them summed
+        membership = community[membership]
+        keys, found = np.unique(community[rows] * len(labels) + community[cols], return_inverse=True)
+        size = len(labels)
+        rows, cols, values = keys // size, keys % size, np.bincount(found, values)
+    # The communities numbered from the largest one
+    counts = np.bincount(membership, minlength=membership.max() + 1 if n > 0 else 0)
+    order = np.lexsort((np.arange(len(counts)), -counts))
+    rank = np.empty(len(counts), dtype=np.int64)
+    rank[order] = np.arange(len(counts))
+    return rank[membership]
+
+
+def graph_communities(graph, resolution=RESOLUTION, processes=1):
+    # Write the community of every node of a NetworkX graph as its "community" attribute
+    nodes = graph.nodes()
+    index = dict((v, i) for i, v in enumerate(nodes))
+    sources = array("i")
+    targets = array("i")
+    weights = array("d")
+    for u, v, d in graph.edges_iter(data=True):
+        sources.append(index[u])
+        targets.append(index[v])
+        weights.append(float(d.get("weight", 1)))
+    community = compute_communities(len(nodes), np.frombuffer(sources, dtype=np.int32), np.frombuffer(targets, dtype=np.int32),
+                                    np.frombuffer(weights, dtype=float), resolution, processes)
+    for i, v in enumerate(nodes):
+        graph.node[v]["community"] = int(community[i])
+    return community
+
+
+def state_communities(state, resolution=RESOLUTION, processes=1, keep=None):
+    # The communities of the users of a compact crawl (see crawlstate), in the order of their ids,
+    # without the edges of the users that are not kept (see reduction)
+    sources = array("i")
+    targets = array("i")
+    for s, t in state.edges.edges():
+        if keep is not None and not (keep[s] and keep[t]):
+            continue
+        sources.append(s)
+        targets.append(t)
+    return compute_communities(len(state.users), np.frombuffer(sources, dtype=np.int32), np.frombuffer(targets, dtype=np.int32),
+                               np.ones(len(sources)), resolution, processes)
+
+
+def communities_from_flags(flags, graph=None, state=None, keep=None):
+    # The communities of the network of a script with --communities: the graph gets the attribute,
+    # for a compact crawl they are returned for its write_gexf
+    if "communities" not in flags:
+        return None
+    print "Finding the communities..."
+    start = time.time()
+    options = {"resolution": float(flags.get("resolution", RESOLUTION)), "processes": int(flags.get("processes", 1))}
+    if state is not None:
+        community = state_communities(state, keep=keep, **options)
+    else:
+        community = graph_communities(graph, **options)
+    kept = community if keep is None else community[keep]
+    sizes = [s for s in np.bincount(kept) if s > 0] if len(kept) > 0 else []
+    print "Done in %.1f seconds:" % (time.time() - start),len(sizes),"communities, the largest ones of",
+    print ", ".join(str(s) for s in sizes[:10]),"users"
+    return community
+
+
+if __name__ == "__main__":
+    flags = get_flags()
+    flags["communities"] = True
+    path = flags["graph"] if "graph" in flags else raw_input("Enter the .gexf file of the network: ")
+    print "Loading",path,"..."
+    graph = nx.read_gexf(path)
+    print graph.number_of_nodes(),"nodes,",graph.number_of_edges(),"edges"
+    communities_from_flags(flags, graph)
+    out = flags.get("out", path[:-len(".gexf")]+"_communities.gexf" if path.endswith(".gexf") else path+"_communities.gexf")
+    nx.write_gexf(graph, out)
+    print "Saved as",out
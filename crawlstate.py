@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+#
+# Social analysis of GitHub: compact state of very large ego-network crawls
+#
+# Author: Massimo Menichinelli
+# Homepage: http://www.openp2pdesign.org
+# License: GPL v.3
+#
+# A NetworkX graph keeps a dictionary for every node and every edge, which is
+# the largest cost of a 2-level crawl. Here every login is interned once as an
+# integer, the edges are kept as two arrays of integers and spilled to sorted
+# runs on disk when they grow, and the network is written to a .gexf file
+# directly from them, without building a NetworkX graph.
+#
+# The reciprocity of the edges (see reciprocity) is found when the network is
+# written: the reversed edges are sorted in runs too, and a merge of the two
+# sorted streams finds every edge whose reverse is also an edge. The users
+# whose lists are all in the crawl get their mutual, followers only and
+# following only counts, like the expanded users of the NetworkX crawls.
+#
+
+from array import array
+from xml.sax.saxutils import quoteattr
+import hashlib
+import heapq
+import math
+import os
+import tempfile
+
+# The counts of the users, in the order of classify in reciprocity
+RECIPROCITY = ["mutual", "followers_only", "following_only"]
+
+
+class LoginInterner(object):
+    # Every login gets an integer id, in order of discovery
+
+    def __init__(self):
+        self.ids = {}
+        self.logins = []
+
+    def __len__(self):
+        return len(self.logins)
+
+    def __contains__(self, login):
+        return login in self.ids
+
+    def intern(self, login):
+        i = self.ids.get(login)
+        if i is None:
+            i = len(self.logins)
+            self.ids[login] = i
+            self.logins.append(login)
+        return i
+
+
+class EdgeBuffer(object):
+    # The edges as two arrays of ids. When they reach "limit" edges they are sorted
+    # and written to a run on disk, and the runs are merged (without duplicates) when the edges are read.
+
+    def __init__(self, limit=1000000, directory=None):
+        self.limit = limit
+        self.directory = directory
+        self.sources = array("i")
+        self.targets = array("i")
+        self.runs = []
+
+    def add(self, source, target):
+        self.sources.append(source)
+        self.targets.append(target)
+        if len(self.sources) >= self.limit:
+            self.spill()
+
+    def spill(self):
+        if len(self.sources) == 0:
+            return
+        pairs = sorted(set(zip(self.sources, self.targets)))
+        run = array("i")
+        for s, t in pairs:
+            run.append(s)
+            run.append(t)
+        fd, path = tempfile.mkstemp(suffix=".edges", dir=self.directory)
+        f = os.fdopen(fd, "wb")
+        run.tofile(f)
+        f.close()
+        self.runs.append(path)
+        self.sources = array("i")
+        self.targets = array("i")
+
+    def read_run(self, path, block=65536):
+        f = open(path, "rb")
+        while True:
+            run = array("i")
+            try:
+                run.fromfile(f, 2*block)
+            except EOFError:
+                pass
+            for k in range(0, len(run), 2):
+                yield (run[k], run[k+1])
+            if len(run) < 2*block:
+                break
+        f.close()
+
+    def edges(self):
+        # All the (source, target) pairs, sorted and without duplicates
+        self.spill()
+        last = None
+        for pair in heapq.merge(*[self.read_run(r) for r in self.runs]):
+            if pair != last:
+                yield pair
+            last = pair
+
+    def close(self):
+        for r in self.runs:
+            os.remove(r)
+        self.runs = []
+
+
+class BloomFilter(object):
+    # A probabilistic set: it can answer that a login is present when it is not,
+    # with probability error_rate, but it needs about 1.2 bytes per login at 1%
+
+    def __init__(self, capacity, error_rate=0.01):
+        self.bits = int(math.ceil(-capacity * math.log(error_rate) / math.log(2)**2))
+        self.hashes = max(1, int(round(self.bits / float(capacity) * math.log(2))))
+        self.array = bytearray((self.bits + 7) // 8)
+
+    def positions(self, login):
+        digest = hashlib.md5(login).hexdigest()
+        h1 = int(digest[:16], 16)
+        h2 = int(digest[16:], 16)
+        for k in range(self.hashes):
+            yield (h1 + k * h2) % self.bits
+
+    def add(self, login):
+        for p in self.positions(login):
+            self.array[p >> 3] |= 1 << (p & 7)
+
+    def __contains__(self, login):
+        for p in self.positions(login):
+            if not self.array[p >> 3] & (1 << (p & 7)):
+                return False
+        return True
+
+
+class CrawlState(object):
+    # The state of an ego-network crawl: the users, their "member" flag, the edges
+    # and the set of users already expanded (exact, or a Bloom filter when "capacity" is given)
+
+    def __init__(self, capacity=None, error_rate=0.01, limit=1000000, directory=None):
+        self.users = LoginInterner()
+        self.members = bytearray()
+        # 1 for the users whose followers and following are all in the crawl
+        self.listed = bytearray()
+        self.edges = EdgeBuffer(limit, directory)
+        if capacity is None:
+            self.expanded = set()
+        else:
+            self.expanded = BloomFilter(capacity, error_rate)
+
+    def add_node(self, login, member=False):
+        i = self.users.intern(login)
+        if i == len(self.members):
+            self.members.append(0)
+            self.listed.append(0)
+        if member:
+            self.members[i] = 1
+        return i
+
+    def mark_listed(self, login):
+        # The followers and following of a user have all been added
+        self.listed[self.add_node(login)] = 1
+
+    def add_edge(self, source, target):
+        self.edges.add(self.add_node(source), self.add_node(target))
+
+    def should_expand(self, login):
+        # True the first time a user is seen for expansion
+        if login in self.expanded:
+            return False
+        self.expanded.add(login)
+        return True
+
+    def reciprocity(self):
+        # The "reciprocal" flag of every edge, in the order of edges(), and the (mutual, followers only,
+        # following only) counts of every user, from a merge of the edges with the reversed edges
+        reverse = EdgeBuffer(self.edges.limit, self.edges.directory)
+        for s, t in self.edges.edges():
+            reverse.add(t, s)
+        flags = bytearray()
+        counts = [array("i", [0]) * len(self.users) for k in range(3)]
+        mutual, followers_only, following_only = counts
+        reversed_edges = reverse.edges()
+        other = next(reversed_edges, None)
+        for pair in self.edges.edges():
+            while other is not None and other < pair:
+                other = next(reversed_edges, None)
+            s, t = pair
+            if other == pair:
+                flags.append(1)
+                mutual[s] += 1
+            else:
+                flags.append(0)
+                following_only[s] += 1
+                followers_only[t] += 1
+        reverse.close()
+        return flags, counts
+
+    def write_gexf(self, path, positions=None, communities=None, keep=None):
+        # The same .gexf file written by NetworkX for the ego-networks,
+        # streamed from the arrays: nodes with "label" and "member", directed edges,
+        # the viz:position of the nodes when their (x, y) arrays are given (see layout),
+        # their "community" when the array of the communities is given (see communities)
+        # and only the users whose keep is true, with their edges, when it is given (see reduction).
+        # The edges are "reciprocal" or not, and the users whose lists are in the crawl have their counts
+        flags, counts = self.reciprocity()
+        f = open(path, "w")
+        f.write("<?xml version='1.0' encoding='utf-8'?>\n")
+        f.write('<gexf version="1.1" xmlns="http://www.gexf.net/1.1draft" xmlns:viz="http://www.gexf.net/1.1draft/viz" '
+                'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xsi:schemaLocation="http://www.w3.org/2001/XMLSchema-instance">\n')
+        f.write('  <graph defaultedgetype="directed" mode="static">\n')
+        f.write('    <attributes class="node" mode="static">\n')
+        f.write('      <attribute id="0" title="member" type="string" />\n')
+        if communities is not None:
+            f.write('      <attribute id="1" title="community" type="integer" />\n')
+        for k, title in enumerate(RECIPROCITY):
+            f.write('      <attribute id="%d" title="%s" type="integer" />\n' % (k + 2, title))
+        f.write('    </attributes>\n')
+        f.write('    <attributes class="edge" mode="static">\n')
+        f.write('      <attribute id="0" title="reciprocal" type="string" />\n')
+        f.write('    </attributes>\n')
+        f.write('    <nodes>\n')
+        for i, login in enumerate(self.users.logins):
+            if keep is not None and not keep[i]:
+                continue
+            f.write('      <node id=%s label=%s>\n' % (quoteattr(login), quoteattr(login)))
+            f.write('        <attvalues>\n')
+            f.write('          <attvalue for="0" value="%s" />\n' % ("Yes" if self.members[i] else "No"))
+            if communities is not None:
+                f.write('          <attvalue for="1" value="%d" />\n' % communities[i])
+            if self.listed[i]:
+                for k in range(len(RECIPROCITY)):
+                    f.write('          <attvalue for="%d" value="%d" />\n' % (k + 2, counts[k][i]))
+            f.write('        </attvalues>\n')
+            if positions is not None:
+                f.write('        <viz:position x="%r" y="%r" z="0.0" />\n' % (float(positions[0][i]), float(positions[1][i])))
+            f.write('      </node>\n')
+        f.write('    </nodes>\n')
+        f.write('    <edges>\n')
+        n = 0
+        for k, (s, t) in enumerate(self.edges.edges()):
+            if keep is not None and not (keep[s] and keep[t]):
+                continue
+            f.write('      <edge id="%d" source=%s target=%s>\n' % (n, quoteattr(self.users.logins[s]), quoteattr(self.users.logins[t])))
+            f.write('        <attvalues>\n')
+            f.write('          <attvalue for="0" value="%s" />\n' % ("Yes" if flags[k] else "No"))
+            f.write('        </attvalues>\n')
+            f.write('      </edge>\n')
+            n += 1
+        f.write('    </edges>\n')
+        f.write('  </graph>\n')
+        f.write('</gexf>\n')
+        f.close()
+        return n
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+#
+# Social analysis of GitHub: a pool of credentials used in rotation
+#
+# Author: Massimo Menichinelli
+# Homepage: http://www.openp2pdesign.org
+# License: GPL v.3
+#
+# Requisite:
+# install pyGithub with pip install PyGithub
+#
+# Every credential (an API token, or a username and password) has its own
+# hourly quota. The pool keeps a client for each one, reads the remaining quota
+# from the headers of the last response of each client, and sends the requests
+# to the client with the most requests left. When a token runs out of quota or
+# is revoked in the middle of a list, the list is resumed with the next one
+# from the page where it stopped.
+#
+# The scripts use it with the --tokens=file option (an API token per line),
+# otherwise they ask for a username and password as before.
+#
+
+from github import Github, BadCredentialsException, RateLimitExceededException
+import getpass
+import time
+
+from records import Reader
+from refresh import Refresh
+
+# The largest page allowed by the API: a third of the requests of the default one
+PER_PAGE = 100
+
+
+def read_tokens(path):
+    return [i.strip() for i in open(path) if i.strip() != "" and not i.startswith("#")]
+
+
+class CredentialPool(object):
+
+    def __init__(self, credentials, per_page=PER_PAGE):
+        # A credential is a token, or a (username, password) pair
+        self.clients = []
+        self.credentials = {}
+        for c in credentials:
+            if isinstance(c, tuple):
+                self.clients.append(Github(c[0], c[1], per_page=per_page))
+            else:
+                self.clients.append(Github(c, per_page=per_page))
+            self.credentials[self.clients[-1]] = c
+        self.revoked = set()
+        # The lists are read page by page into records (see records)
+        self.reader = Reader(self.get, per_page)
+        # The profiles and lists of a previous crawl, with --refresh (see refresh)
+        self.refresh = None
+
+    def requester(self, g):
+        # PyGithub does not expose the requester of a client, the objects are built with it
+        return g._Github__requester
+
+    def remaining(self, g):
+        try:
+            return g.rate_limiting[0]
+        except BadCredentialsException:
+            self.revoked.add(g)
+            return 0
+
+    def best(self):
+        # The client with the most requests left, waiting for a reset when all of them are exhausted
+        while True:
+            usable = [g for g in self.clients if g not in self.revoked]
+            if len(usable) == 0:
+                raise BadCredentialsException(401, {"message": "All the credentials have been revoked"})
+            now = time.time()
+            left = dict((g, self.remaining(g)) for g in usable)
+            ready = [g for g in usable if g not in self.revoked and (left[g] > 0 or g.rate_limiting_resettime <= now)]
+            if len(ready) > 0:
+                return max(ready, key=lambda g: left[g])
+            usable = [g for g in usable if g not in self.revoked]
+            if len(usable) > 0:
+                wait = max(min(g.rate_limiting_resettime for g in usable) - now, 0) + 1
+                print "All the credentials are exhausted, waiting",int(wait),"seconds..."
+                time.sleep(wait)
+
+    def failed(self, g, e):
+        if isinstance(e, BadCredentialsException):
+            print "A credential has been revoked, switching to the next one..."
+            self.revoked.add(g)
+        else:
+            print "A credential has run out of requests, switching to the next one..."
+
+    def call(self, function):
+        # Call function(client) with the best client, and retry with the next one when it fails
+        while True:
+            g = self.best()
+            try:
+                return function(g)
+            except (BadCredentialsException, RateLimitExceededException), e:
+                self.failed(g, e)
+
+    def __getattr__(self, name):
+        # The pool can be used in place of a Github object: g.get_user(...), g.get_organization(...)
+        if name.startswith("_"):
+            raise AttributeError(name)
+        def method(*args, **kwargs):
+            return self.call(lambda g: getattr(g, name)(*args, **kwargs))
+        return method
+
+    def credential(self):
+        # The token, or (username, password) pair, of the best client, for the requests made without PyGithub
+        return self.credentials[self.best()]
+
+    def get(self, url, parameters=None):
+        # The JSON of a GET request, sent with the best client
+        return self.call(lambda g: self.requester(g).requestJsonAndCheck("GET", url, parameters)[1])
+
+    def followers(self, login):
+        if self.refresh is not None:
+            return self.refresh.followers(login)
+        return self.reader.followers(login)
+
+    def following(self, login):
+        if self.refresh is not None:
+            return self.refresh.following(login)
+        return self.reader.following(login)
+
+    def complete(self, user):
+        # The profile of a user of a list, requested explicitly
+        if self.refresh is not None:
+            return self.refresh.complete(user)
+        return self.reader.complete(user)
+
+
+def login(flags):
+    # A pool with the tokens of --tokens=file, or with the username and password of the user
+    if "tokens" in flags:
+        pool = CredentialPool(read_tokens(flags["tokens"]))
+    else:
+        userlogin = raw_input("Login: Enter your username: ")
+        password = getpass.getpass("Login: Enter yor password: ")
+        pool = CredentialPool([(userlogin, password)])
+    if "refresh" in flags and flags["refresh"] is not True:
+        pool.refresh = Refresh(pool, flags["refresh"])
+    return pool
+
+
+if __name__ == "__main__":
+    pass
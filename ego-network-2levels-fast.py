@@ -15,62 +15,90 @@
 # https://github.com/jacquev6/PyGithub
 #
 
-from github import Github
 import networkx as nx
-import getpass
 import os
 
 # Clear screen
 os.system('cls' if os.name=='nt' else 'clear')
 
+from options import get_flags
+from credentials import login
+from refresh import save_refresh
+from reciprocity import add_neighbourhood, set_friendship, neighbours
+from sampling import sampling_from_flags, save_estimates
+from graphdb import store_from_flags, store_graph
+from layout import layout_from_flags
+from communities import communities_from_flags
+from reduction import reduce_from_flags
+
 print "Social Network Analisys of your GitHub network"
 print ""
-username = raw_input("Enter your username: ")
-password = getpass.getpass("Enter yor password: ") 
+flags = get_flags()
+g = login(flags)
+crawl = sampling_from_flags(flags, g)
+store = store_from_flags(flags)
 user = raw_input("Enter the username to mine: ")
 print ""
-g = Github( username, password )
 
 graph = nx.DiGraph()
 
-graph.add_node(user,label=g.get_user(user).name)
+graph.add_node(user,label=g.get_user(user).name,friendship="Ego")
+
+if crawl is not None:
+    # A crawl with a budget of requests, and capped lists (see sampling)
+    mutual, followers_only, following_only = crawl.run(graph, user)
+    set_friendship(graph, user, mutual, followers_only, following_only)
+    estimates = crawl.estimates(graph, user)
+    print "Estimates:",estimates
+    save_estimates(estimates, user+"_ego-network_2_levels_estimates.json")
+
+else:
+    print "Looking for the followers of",user,"..."
+    followers = []
+    for f in g.followers(user):
+        print " -", f.login
+        graph.add_node(f.login,label=f.login)
+        followers.append(f.login)
+
+    print "Looking for the users",user,"is following..."
+    following = []
+    for f in g.following(user):
+        print " -", f.login
+        graph.add_node(f.login,label=f.login)
+        following.append(f.login)
+
+    mutual, followers_only, following_only = add_neighbourhood(graph, user, followers, following)
+    set_friendship(graph, user, mutual, followers_only, following_only)
+
+    print "-----"
 
-print "Looking for the followers of",user,"..."
-for f in g.get_user(user).get_followers():
-    print " -", f.login
-    graph.add_node(f.login,label=f.login)
-    graph.add_edge(f.login,user)
-    print " And his/her followers:"
-    for i in f.get_followers():
-        print " --", i.login
-        graph.add_node(i.login,label=i.login)
-        graph.add_edge(i.login,f.login)
-    print " And the users she/he's following:"
-    for i in f.get_following():
-        print " --", i.login
-        graph.add_node(i.login,label=i.login)
-        graph.add_edge(f.login,i.login)
-             
-print "-----"
+    # Every user around the ego is expanded once, even when it is both a follower and following
+    for f in neighbours(followers, following):
+        print " -", f
+        print " And his/her followers:"
+        second_followers = []
+        for i in g.followers(f):
+            print " --", i.login
+            if i.login not in graph:
+                graph.add_node(i.login,label=i.login)
+            second_followers.append(i.login)
+        print " And the users she/he's following:"
+        second_following = []
+        for i in g.following(f):
+            print " --", i.login
+            if i.login not in graph:
+                graph.add_node(i.login,label=i.login)
+            second_following.append(i.login)
+        add_neighbourhood(graph, f, second_followers, second_following)
 
-print "Looking for the users",user,"is following..."
-for f in g.get_user(user).get_following():
-    print " -", f.login
-    graph.add_node(f.login,label=f.login)
-    graph.add_edge(user,f.login)
-    print " And his/her followers:"
-    for i in f.get_followers():
-        print " --", i.login
-        graph.add_node(i.login,label=i.login)
-        graph.add_edge(i.login,f.login)
-    print " And the users she/he's following:"
-    for i in f.get_following():
-        print " --", i.login
-        graph.add_node(i.login,label=i.login)
-        graph.add_edge(f.login,i.login)
-           
-print "-----"
+    print "-----"
 
+# The profiles and the lists of the users, for the next --refresh
+save_refresh(g)
 print "Saving the network..."
+store_graph(store, user+"_ego-network_2_levels", graph)
+reduce_from_flags(flags, graph)
+communities_from_flags(flags, graph)
+layout_from_flags(flags, graph)
 nx.write_gexf(graph, user+"_ego-network_2_levels.gexf")
 print "Done."
\ No newline at end of file
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+#
+# Ego-network analysis of followers in GitHub, for many users at once
+#
+# Author: Massimo Menichinelli
+# Homepage: http://www.openp2pdesign.org
+# License: GPL v.3
+#
+# Requisite:
+# install pyGithub with pip install PyGithub
+# install NetworkX with pip install networkx
+# install NumPy with pip install numpy
+#
+# The ego-networks of many users (--users=user1,user2,... or --users-file=FILE
+# with a login per line), from a local index of the follow lists (see
+# followindex): every user around the egos is expanded once, even when it is
+# in many ego-networks, and the users already in the index are not expanded
+# again. The ego-networks are then extracted from the index in parallel, with
+# the same nodes and attributes of the scripts for a single user.
+#
+# --depth=1         the ego-networks of ego-network.py, with the full names (FILE_ego-network.gexf)
+# --depth=2         the ego-networks of ego-network-2levels-fast.py (FILE_ego-network_2_levels.gexf, default)
+# --index=FILE      the index of the follow lists (default: follow_index.npz)
+# --expire=DAYS     expand again the users whose lists are older than DAYS days
+# --processes=N     extract the ego-networks with N processes
+#
+
+import multiprocessing
+import os
+import time
+
+import networkx as nx
+
+from options import get_flags, get_list
+from credentials import login
+from refresh import save_refresh
+from followindex import FollowIndex, ego_network, ego_network_2levels
+from graphdb import store_from_flags, store_graph
+from layout import layout_from_flags
+from communities import communities_from_flags
+from reduction import reduce_from_flags
+
+INDEX = "follow_index.npz"
+
+# The index, the flags and the names of the egos, inherited by the processes that extract the ego-networks
+shared = {}
+
+
+def read_users(flags):
+    # The logins of --users, or of --users-file, or entered by the user
+    if "users-file" in flags:
+        return [l.strip() for l in open(flags["users-file"]) if l.strip() != ""]
+    users = get_list(flags, "users")
+    if users is None:
+        users = get_list({"users": raw_input("Enter the usernames to mine, separated by commas: ")}, "users")
+    return users
+
+
+def expand_all(index, g, logins, expire):
+    # Expand the users that are not in the index, or are too old in it: the number of users expanded
+    expanded = 0
+    for l in logins:
+        if index.needs(l, expire):
+            print " -", l
+            index.expand(g, l)
+            expanded += 1
+    index.build()
+    return expanded
+
+
+def extract(user):
+    # Build, lay out and save the ego-network of a user, in a process of the pool
+    index, flags, names, depth = shared["index"], shared["flags"], shared["names"], shared["depth"]
+    # The processes are already used for the ego-networks
+    flags = dict(flags, processes=1)
+    if depth == 1:
+        graph = ego_network(index, user, names.get(user), names)
+        name = user+"_ego-network"
+    else:
+        graph = ego_network_2levels(index, user, names.get(user))
+        name = user+"_ego-network_2_levels"
+    store_graph(store_from_flags(flags), name, graph)
+    reduce_from_flags(flags, graph)
+    communities_from_flags(flags, graph)
+    layout_from_flags(flags, graph)
+    nx.write_gexf(graph, name+".gexf")
+    return user, graph.number_of_nodes(), graph.number_of_edges()
+
+
+if __name__ == "__main__":
+    # Clear screen
+    os.system('cls' if os.name=='nt' else 'clear')
+
+    print "Social Network Analisys of many GitHub users"
+    print ""
+    flags = get_flags()
+    depth = int(flags.get("depth", 2))
+    expire = float(flags["expire"]) * 86400 if "expire" in flags else None
+    processes = int(flags.get("processes", 1))
+    g = login(flags)
+    users = read_users(flags)
+    path = flags.get("index", INDEX)
+    index = FollowIndex(path)
+    print len(users),"users to mine,",len(index.users),"users already in the index"
+    print ""
+    start = time.time()
+
+    print "Looking for the followers and the following of the users..."
+    expand_all(index, g, users, expire)
+    print "-----"
+
+    first = index.frontier(users)
+    if depth == 2:
+        # The users around all the egos, every one expanded once
+        separate = sum(len(index.frontier([u])) for u in users)
+        print "Expanding",len(first),"users around the egos (%d in the separate ego-networks)..." % separate
+        print expand_all(index, g, first, expire),"users expanded, the others were already in the index"
+        print "-----"
+
+    print "Looking for the names of the users..."
+    names = {}
+    for l in users + (first if depth == 1 else []):
+        names[l] = index.name(g, l)
+    print index.requests,"profiles requested"
+    print "Saving the index in",path,"..."
+    index.save(path)
+    # The profiles and the lists of the users, for the next --refresh
+    save_refresh(g)
+    print "Index of",len(index.users),"users built in %.1f seconds" % (time.time() - start)
+    print "-----"
+
+    print "Saving the networks..."
+    shared.update(index=index, flags=flags, names=names, depth=depth)
+    if processes > 1:
+        pool = multiprocessing.Pool(processes)
+        try:
+            done = pool.map(extract, users)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        done = [extract(u) for u in users]
+    for user, nodes, edges in done:
+        print " -", user, ":", nodes, "nodes,", edges, "edges"
+    print "Done."
@@ -14,59 +14,77 @@
 # PyGitHub documentation can be found here: 
 # https://github.com/jacquev6/PyGithub
 #
-from github import Github
 import networkx as nx
-import getpass
 import os
 
 # Clear screen
 os.system('cls' if os.name=='nt' else 'clear')
 
+from options import get_flags
+from credentials import login
+from refresh import save_refresh
+from reciprocity import add_neighbourhood, set_friendship
+from graphdb import store_from_flags, store_graph
+from layout import layout_from_flags
+from communities import communities_from_flags
+from reduction import reduce_from_flags
+
 print "Social Network Analisys of a user GitHub network"
 print ""
-username = raw_input("Enter your username: ")
-password = getpass.getpass("Enter yor password: ") 
+flags = get_flags()
+g = login(flags)
+store = store_from_flags(flags)
 user = raw_input("Enter the username to mine: ")
 print ""
-g = Github( username, password )
 
 graph = nx.DiGraph()
 
 graph.add_node(user,label=g.get_user(user).name,friendship="Ego")
 
 print "Looking for the followers of",user,"..."
-for f in g.get_user(user).get_followers():
+followers = []
+for f in g.followers(user):
+    # The full name is not in the list, it needs a request for every user
+    g.complete(f)
     print " -", f.login, " / ", f.name
     if f.name == None:
         graph.add_node(f.login,label=f.login,follower=True,friendship="")
-        graph.add_edge(f.login,user)
     else:
         graph.add_node(f.login,label=f.name,follower=True,friendship="")
-        graph.add_edge(f.login,user)
-        
+    followers.append(f.login)
+
 print "-----"
 
 print "Looking for the users",user,"is following..."
-for f in g.get_user(user).get_following():
+following = []
+for f in g.following(user):
+    if f.login in graph:
+        print " -", f.login
+        graph.node[f.login]["following"]=True
+        following.append(f.login)
+        continue
+    g.complete(f)
     print " -", f.login, " / ", f.name
     if f.name == None:
         graph.add_node(f.login,label=f.login,following=True,friendship="")
-        graph.add_edge(user,f.login)
     else:
         graph.add_node(f.login,label=f.name,following=True,friendship="")
-        graph.add_edge(user,f.login)
-    
+    following.append(f.login)
+
 print "-----"
 
 print "Checking the users that are both followers and following..."
-for j in graph.nodes():
-	if "follower" in graph.node[j] and "following" in graph.node[j]:
-		graph.node[j]["friendship"]="Both followed and following"
-	elif "follower" in graph.node[j]:
-		graph.node[j]["friendship"]="Followed by "+user
-	elif "following" in graph.node[j]:
-		graph.node[j]["friendship"]="Following "+user
+mutual, followers_only, following_only = add_neighbourhood(graph, user, followers, following)
+set_friendship(graph, user, mutual, followers_only, following_only)
+print len(mutual),"users are both followers and following"
 print "-----"
+print g.reader.completions,"profiles requested"
+# The profiles and the lists of the users, for the next --refresh
+save_refresh(g)
 print "Saving the network..."
+store_graph(store, user+"_ego-network", graph)
+reduce_from_flags(flags, graph)
+communities_from_flags(flags, graph)
+layout_from_flags(flags, graph)
 nx.write_gexf(graph, user+"_ego-network.gexf")
 print "Done."
\ No newline at end of file
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+#
+# Social analysis of GitHub: updates of the networks from the events of the repositories
+#
+# Author: Massimo Menichinelli
+# Homepage: http://www.openp2pdesign.org
+# License: GPL v.3
+#
+# Requisite:
+# install pyGithub with pip install PyGithub
+# install NetworkX with pip install networkx
+#
+# The events of a repository (or of all the repositories of an Organization)
+# describe every new star, issue, comment, push and pull request in a few
+# pages. The feeds are requested with the ETag of the previous answer, so a
+# feed without new events is answered with "304 Not Modified", which GitHub
+# does not count in the hourly quota. Every new event becomes the edges and
+# the roles that analyse_repo would have found:
+#
+#   WatchEvent                 the "watcher" role
+#   MemberEvent                the "collaborator" role
+#   IssuesEvent                issue_assignment (when the issue is opened or assigned)
+#   IssueCommentEvent          issue_comments, to the author and the previous commenters
+#   PullRequestEvent           issue_assignment and pr_assignment (when it is opened)
+#   PushEvent                  commit_succession and the "contributor" role
+#   CommitCommentEvent         commit_comments, to the author and the previous commenters
+#
+# The previous commenters of an issue or a commit, and the last committer of a
+# repository, are kept with the ETags in a JSON file: the first time they are
+# needed they are requested (one or two requests). The events do not have the
+# committers of the commits of a push, so all of them are counted as commits
+# of the user that has pushed them, at the time of the push.
+#
+# GitHub keeps only the last 300 events of a feed: when a feed has more new
+# events than that since the previous poll, some of them are lost and the
+# repositories have to be mined again from the start.
+#
+
+import json
+import os
+
+from repoanalysis import login_of, timestamp_of, set_role, add_interaction, add_comment_edges, add_pull_edge
+
+# The events of a feed are at most 300, in pages of up to 100
+FEED = 300
+EVENT_PAGE = 100
+
+
+class EventState(object):
+    # The ETag and the last event of every feed, the previous commenters of the
+    # issues and commits, and the last committer of every repository
+
+    def __init__(self, path):
+        self.path = path
+        if os.path.exists(path):
+            data = json.load(open(path))
+        else:
+            data = {}
+        self.feeds = data.get("feeds", {})
+        self.issues = data.get("issues", {})
+        self.commits = data.get("commits", {})
+        self.heads = data.get("heads", {})
+
+    def forget(self, repo):
+        # What is known of a repository is not valid anymore after some of its events are lost
+        for d in (self.issues, self.commits):
+            for k in [k for k in d if k.split("#")[0].split("@")[0] == repo]:
+                del d[k]
+        self.heads.pop(repo, None)
+
+    def save(self):
+        json.dump({"feeds": self.feeds, "issues": self.issues, "commits": self.commits, "heads": self.heads},
+                  open(self.path, "w"), sort_keys=True)
+
+
+class EventFeed(object):
+
+    def __init__(self, pool, url, state):
+        self.pool = pool
+        self.url = url
+        self.state = state
+
+    def page(self, page, headers=None):
+        self.pool.reader.requests += 1
+        return self.pool.call(lambda g: self.pool.requester(g).requestJsonAndCheck(
+            "GET", self.url, {"per_page": EVENT_PAGE, "page": page}, headers))
+
+    def poll(self):
+        # The new events, from the oldest one, and False when some events may have been lost
+        # (or when the feed is polled for the first time): the repositories have to be mined again
+        entry = self.state.feeds.get(self.url)
+        headers = {"If-None-Match": entry["etag"]} if entry is not None and entry.get("etag") else None
+        answer, data = self.page(1, headers)
+        if data is None:
+            return [], True
+        last = int(entry["last"]) if entry is not None and entry.get("last") else None
+        events = []
+        found = False
+        page = 1
+        while True:
+            for e in data:
+                if last is not None and int(e["id"]) <= last:
+                    found = True
+                    break
+                events.append(e)
+            if found or len(data) < EVENT_PAGE or page * EVENT_PAGE >= FEED:
+                break
+            page += 1
+            data = self.page(page)[1]
+        # Without the last event of the previous poll, the events in between are all there
+        # only if the feed is not full (the last event is older than the 90 days of the feed)
+        complete = last is not None and (found or len(events) < FEED)
+        ids = [int(e["id"]) for e in events]
+        if last is not None:
+            ids.append(last)
+        self.state.feeds[self.url] = {"etag": answer.get("etag"), "last": str(max(ids)) if len(ids) > 0 else None,
+                                      "interval": answer.get("x-poll-interval")}
+        events.sort(key=lambda e: int(e["id"]))
+        return events, complete
+
+
+def user_login(reader, data):
+    return login_of(reader.user(data))
+
+
+def previous_commenters(reader, url, comment):
+    # The commenters before a comment, the first time an issue or a commit is commented after a crawl.
+    # A reader without requests (webhooks without credentials) knows only the comments it has received
+    if reader.request is None:
+        return []
+    return [user_login(reader, c.get("user")) for c in reader.pages(url) if c["id"] < comment["id"]]
+
+
+def apply_event(graph, event, phases, reader, state):
+    # Add the edges and the roles of an event to the graph of its repository
+    kind = event["type"]
+    payload = event.get("payload", {})
+    action = payload.get("action")
+    actor = user_login(reader, event.get("actor"))
+    repo = event["repo"]["name"]
+    url = event["repo"]["url"]
+    when = timestamp_of(event.get("created_at"))
+
+    if kind == "WatchEvent" and "stargazers" in phases:
+        print "-",actor,"is watching"
+        set_role(graph, actor, "watcher")
+
+    elif kind == "MemberEvent" and "collaborators" in phases and action == "added":
+        member = user_login(reader, payload.get("member"))
+        print "-",member,"is a collaborator"
+        set_role(graph, member, "collaborator")
+
+    elif kind in ("IssuesEvent", "PullRequestEvent") and action in ("opened", "assigned"):
+        # A pull request is an issue too, as in the list of the issues of analyse_repo
+        issue = payload.get("issue") or payload.get("pull_request")
+        author = user_login(reader, issue.get("user"))
+        key = repo+"#"+str(issue["number"])
+        if action == "opened":
+            state.issues[key] = []
+            assignee = user_login(reader, issue.get("assignee"))
+        else:
+            assignee = user_login(reader, payload.get("assignee"))
+        print "- Issue",key,"by",author,"assigned to",assignee
+        if "issues" in phases and "issue_assignment" in phases:
+            add_interaction(graph, author, assignee, "issue_assignment", timestamp_of(issue.get("created_at")))
+        if kind == "PullRequestEvent" and action == "opened" and "pulls" in phases and "pr_assignment" in phases:
+            add_pull_edge(graph, assignee, author, timestamp_of(issue.get("created_at")))
+
+    elif kind == "IssueCommentEvent" and "issues" in phases and "issue_comments" in phases and action == "created":
+        issue = payload["issue"]
+        comment = payload["comment"]
+        key = repo+"#"+str(issue["number"])
+        commenter = user_login(reader, comment.get("user"))
+        if key not in state.issues:
+            state.issues[key] = previous_commenters(reader, issue["comments_url"], comment)
+        print "- Issue",key,"commented by",commenter
+        add_comment_edges(graph, commenter, user_login(reader, issue.get("user")), state.issues[key],
+                          timestamp_of(comment.get("created_at")))
+        state.issues[key].append(commenter)
+
+    elif kind == "PushEvent" and "commits" in phases and "commit_succession" in phases:
+        size = payload.get("size", len(payload.get("commits", [])))
+        previous = state.heads.get(repo)
+        if previous is None and reader.request is not None and payload.get("before", "").strip("0") != "":
+            # The committer of the commit before the push
+            for c in reader.pages(url+"/commits", {"sha": payload["before"]}, 1):
+                previous = user_login(reader, c.get("committer"))
+        print "- Push of",size,"commits by",actor
+        for k in range(size):
+            if previous is not None:
+                add_interaction(graph, actor, previous, "commit_succession", when)
+            previous = actor
+        if size > 0:
+            state.heads[repo] = actor
+        if "contributors" in phases and size > 0:
+            set_role(graph, actor, "contributor")
+
+    elif kind == "CommitCommentEvent" and "commits" in phases and "commit_comments" in phases:
+        comment = payload["comment"]
+        sha = comment["commit_id"]
+        key = repo+"@"+sha
+        commenter = user_login(reader, comment.get("user"))
+        if key not in state.commits:
+            author = "None"
+            if reader.request is not None:
+                reader.requests += 1
+                author = user_login(reader, reader.request(url+"/commits/"+sha, None).get("author"))
+            state.commits[key] = {"author": author,
+                                  "commenters": previous_commenters(reader, url+"/commits/"+sha+"/comments", comment)}
+        entry = state.commits[key]
+        print "- Commit",sha,"commented by",commenter
+        add_comment_edges(graph, commenter, entry["author"], entry["commenters"],
+                          timestamp_of(comment.get("created_at")), "commit_comments")
+        entry["commenters"].append(commenter)
+
+
+if __name__ == "__main__":
+    pass
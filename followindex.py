@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+#
+# Social analysis of GitHub: a local index of the follow lists, for the ego-networks of many users
+#
+# Author: Massimo Menichinelli
+# Homepage: http://www.openp2pdesign.org
+# License: GPL v.3
+#
+# Requisite:
+# install pyGithub with pip install PyGithub
+# install NetworkX with pip install networkx
+# install NumPy with pip install numpy
+#
+# The ego-networks of users that know each other share most of their users,
+# and every ego-network script downloads the lists of all of them again. The
+# index keeps the lists of followers and following of every user expanded so
+# far, as two CSR matrices of ids (the lists of user i are the ids in
+# indices[indptr[i]:indptr[i+1]]), with the logins of the ids, the time every
+# user was expanded and the full names requested so far. The ego-networks are
+# then extracted from the arrays, with the same nodes, edges and attributes of
+# ego-network.py (depth 1) and ego-network-2levels-fast.py (depth 2), without
+# any request. The index is saved in a .npz file and used again by the next
+# runs: a user is expanded again only when its lists are older than --expire.
+#
+
+import os
+import time
+
+import networkx as nx
+import numpy as np
+
+from crawlstate import LoginInterner
+from reciprocity import add_neighbourhood, set_friendship, neighbours
+from records import User
+
+
+class FollowList(object):
+    # The lists of the expanded users as a CSR matrix, and the new lists not merged into it yet
+
+    def __init__(self, indptr=None, indices=None):
+        self.indptr = np.zeros(1, dtype=np.int64) if indptr is None else indptr
+        self.indices = np.zeros(0, dtype=np.int32) if indices is None else indices
+        self.fresh = {}
+
+    def get(self, i):
+        if i in self.fresh:
+            return self.fresh[i]
+        if i + 1 >= len(self.indptr):
+            return self.indices[:0]
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def build(self, n):
+        # Merge the new lists into the matrix: the old rows are copied as blocks, the new ones replace them
+        old = np.zeros(n, dtype=np.int64)
+        old[:len(self.indptr) - 1] = np.diff(self.indptr)
+        lengths = old.copy()
+        rows = np.array(sorted(self.fresh), dtype=np.int64)
+        if len(rows) > 0:
+            lengths[rows] = [len(self.fresh[r]) for r in rows]
+        indptr = np.concatenate([[0], np.cumsum(lengths)])
+        indices = np.empty(indptr[-1], dtype=np.int32)
+        kept = old.copy()
+        kept[rows] = 0
+        source = np.repeat(self.indptr[:-1] if len(self.indptr) > 1 else np.zeros(0, dtype=np.int64), kept[:len(self.indptr) - 1])
+        target = np.repeat(indptr[:-1], kept)
+        within = np.arange(kept.sum()) - np.repeat(np.cumsum(kept) - kept, kept)
+        indices[target + within] = self.indices[source + within]
+        for r in rows:
+            indices[indptr[r]:indptr[r + 1]] = self.fresh[r]
+        self.indptr, self.indices, self.fresh = indptr, indices, {}
+
+
+class FollowIndex(object):
+
+    def __init__(self, path=None):
+        self.path = path
+        self.users = LoginInterner()
+        self.expanded = np.zeros(0)
+        self.names = {}
+        self.followers = FollowList()
+        self.following = FollowList()
+        self.requests = 0
+        if path is not None and os.path.exists(path):
+            self.load(path)
+
+    def load(self, path):
+        data = np.load(path)
+        for login in data["logins"]:
+            self.users.intern(str(login))
+        self.expanded = data["expanded"]
+        self.names = dict((str(l), None if not named else unicode(n))
+                          for l, n, named in zip(data["name_logins"], data["names"], data["named"]))
+        self.followers = FollowList(data["followers_indptr"], data["followers"])
+        self.following = FollowList(data["following_indptr"], data["following"])
+
+    def save(self, path=None):
+        self.build()
+        logins = sorted(self.names)
+        f = open(path or self.path, "wb")
+        np.savez_compressed(f, logins=np.array([unicode(l) for l in self.users.logins]), expanded=self.expanded,
+                            name_logins=np.array([unicode(l) for l in logins]),
+                            names=np.array([self.names[l] or u"" for l in logins]),
+                            named=np.array([self.names[l] is not None for l in logins]),
+                            followers_indptr=self.followers.indptr, followers=self.followers.indices,
+                            following_indptr=self.following.indptr, following=self.following.indices)
+        f.close()
+
+    def id(self, login):
+        i = self.users.intern(login)
+        if i >= len(self.expanded):
+            self.expanded = np.concatenate([self.expanded, np.zeros(max(i + 1 - len(self.expanded), len(self.expanded)))])
+        return i
+
+    def needs(self, login, expire=None):
+        # True when the lists of a user are not in the index, or are older than expire seconds
+        i = self.users.ids.get(login)
+        if i is None or self.expanded[i] == 0:
+            return True
+        return expire is not None and time.time() - self.expanded[i] > expire
+
+    def expand(self, pool, login):
+        # Download the lists of a user into the index
+        i = self.id(login)
+        self.followers.fresh[i] = np.array([self.id(str(u.login)) for u in pool.followers(login)], dtype=np.int32)
+        self.following.fresh[i] = np.array([self.id(str(u.login)) for u in pool.following(login)], dtype=np.int32)
+        self.expanded[i] = time.time()
+
+    def name(self, pool, login):
+        # The full name of a user, requested only the first time
+        if login not in self.names:
+            self.names[login] = pool.complete(User(login, "/users/"+login)).name
+            self.requests += 1
+        return self.names[login]
+
+    def build(self):
+        n = len(self.users)
+        self.expanded = self.expanded[:n] if len(self.expanded) >= n else np.concatenate([self.expanded, np.zeros(n - len(self.expanded))])
+        self.followers.build(n)
+        self.following.build(n)
+
+    def lists(self, login):
+        # The logins of the followers and the following of an expanded user
+        i = self.users.ids.get(login)
+        if i is None:
+            return [], []
+        logins = self.users.logins
+        return [logins[j] for j in self.followers.get(i)], [logins[j] for j in self.following.get(i)]
+
+    def frontier(self, logins):
+        # The users around some users, every one once: the union of their lists
+        ids = [self.users.ids[l] for l in logins if l in self.users.ids]
+        found = [self.followers.get(i) for i in ids] + [self.following.get(i) for i in ids]
+        if len(found) == 0:
+            return []
+        return [self.users.logins[j] for j in np.unique(np.concatenate(found))]
+
+
+def ego_network(index, user, name, names):
+    # The ego-network of a user at depth 1, as ego-network.py builds it: names maps the logins to their full names
+    graph = nx.DiGraph()
+    graph.add_node(user, label=name, friendship="Ego")
+    followers, following = index.lists(user)
+    for f in followers:
+        graph.add_node(f, label=names.get(f) or f, follower=True, friendship="")
+    for f in following:
+        if f in graph:
+            graph.node[f]["following"] = True
+        else:
+            graph.add_node(f, label=names.get(f) or f, following=True, friendship="")
+    mutual, followers_only, following_only = add_neighbourhood(graph, user, followers, following)
+    set_friendship(graph, user, mutual, followers_only, following_only)
+    return graph
+
+
+def ego_network_2levels(index, user, name):
+    # The ego-network of a user at depth 2, as ego-network-2levels-fast.py builds it
+    graph = nx.DiGraph()
+    graph.add_node(user, label=name, friendship="Ego")
+    followers, following = index.lists(user)
+    for f in followers + following:
+        graph.add_node(f, label=f)
+    mutual, followers_only, following_only = add_neighbourhood(graph, user, followers, following)
+    set_friendship(graph, user, mutual, followers_only, following_only)
+    for f in neighbours(followers, following):
+        second_followers, second_following = index.lists(f)
+        for i in second_followers + second_following:
+            if i not in graph:
+                graph.add_node(i, label=i)
+        add_neighbourhood(graph, f, second_followers, second_following)
+    return graph
+
+
+if __name__ == "__main__":
+    pass
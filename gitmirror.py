@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+#
+# Social analysis of GitHub: commit history from a local mirror of a repository
+#
+# Author: Massimo Menichinelli
+# Homepage: http://www.openp2pdesign.org
+# License: GPL v.3
+#
+# Requisite:
+# git
+#
+# The API lists 100 commits per request, so the whole history of a large
+# repository costs thousands of requests. A bare mirror of the repository,
+# cloned once and then updated, gives the same history with "git log" and no
+# request at all. Git only knows the emails of the authors and committers:
+# they are mapped to GitHub logins with the noreply addresses of GitHub, and
+# otherwise with a single request per unknown email, whose answer is cached
+# in a JSON file for all the next runs.
+#
+# The scripts use it with --mirror=DIR (the mirrors are kept in DIR/owner/name.git)
+# and optionally --logins=FILE (the cache of the logins, DIR/logins.json by default).
+#
+
+import datetime
+import json
+import os
+import re
+import subprocess
+
+NOREPLY = re.compile(r"^(?:\d+\+)?([^@]+)@users\.noreply\.github\.com$", re.IGNORECASE)
+
+
+def update_mirror(clone_url, path):
+    # Clone the mirror the first time, then only download what is new
+    if not os.path.isdir(path):
+        print "Cloning",clone_url,"in",path,"..."
+        subprocess.check_call(["git", "clone", "--mirror", "--quiet", clone_url, path])
+    else:
+        print "Updating the mirror in",path,"..."
+        subprocess.check_call(["git", "--git-dir", path, "remote", "update", "--prune"])
+
+
+def read_log(path, ref="HEAD"):
+    # The commits of ref, from the newest one like the API:
+    # (sha, committer email, author email, commit date in UTC as in the timestamps of analyse_repo)
+    process = subprocess.Popen(["git", "--git-dir", path, "log", "--format=%H%x00%ce%x00%ae%x00%ct", ref],
+                               stdout=subprocess.PIPE)
+    commits = []
+    for line in process.stdout:
+        sha, committer, author, date = line.rstrip("\n").split("\x00")
+        date = datetime.datetime.utcfromtimestamp(int(date)).strftime("%Y-%m-%dT%H:%M:%S")
+        commits.append((sha, committer, author, date))
+    if process.wait() != 0:
+        raise subprocess.CalledProcessError(process.returncode, "git log")
+    return commits
+
+
+class LoginCache(object):
+    # The GitHub login of every email found so far ("None" when it has no account)
+
+    def __init__(self, path):
+        self.path = path
+        if os.path.exists(path):
+            self.logins = json.load(open(path))
+        else:
+            self.logins = {}
+        self.lookups = 0
+
+    def save(self):
+        json.dump(self.logins, open(self.path, "w"), indent=1, sort_keys=True)
+
+    def resolve(self, email, lookup=None):
+        # lookup() returns the login of the email from the API, when it is not known yet:
+        # the logins keep their case, only the emails of the cache are lowercase
+        match = NOREPLY.match(email)
+        if match:
+            return str(match.group(1))
+        key = email.lower()
+        if key not in self.logins:
+            if lookup is None:
+                return "None"
+            self.lookups += 1
+            self.logins[key] = lookup()
+        return str(self.logins[key])
+
+
+class GitMirror(object):
+    # The mirror of a repository, with the cache used for its logins
+
+    def __init__(self, repository, path, cache, lookups=True):
+        self.repository = repository
+        self.path = path
+        self.cache = cache
+        self.lookups = lookups
+        self.commits = None
+
+    def load(self):
+        # The mirror is cloned or updated only when the commits are needed
+        if self.commits is None:
+            update_mirror(self.repository.clone_url, self.path)
+            self.commits = read_log(self.path)
+            self.emails = dict((c[0], (c[1], c[2])) for c in self.commits)
+
+    def lookup(self, sha, role):
+        # The login of the committer (or author) of a commit, with a request to the API
+        if not self.lookups:
+            return None
+        def request():
+            user = getattr(self.repository.get_commit(sha), role)
+            if user is None or user.login is None:
+                return "None"
+            return user.login
+        return request
+
+    def committers(self):
+        # The (login, timestamp) of the committers, from the newest commit, like in analyse_repo
+        self.load()
+        chain = [(self.cache.resolve(committer, self.lookup(sha, "committer")), date)
+                 for sha, committer, author, date in self.commits]
+        self.cache.save()
+        return chain
+
+    def author(self, sha):
+        self.load()
+        if sha not in self.emails:
+            return "None"
+        return self.cache.resolve(self.emails[sha][1], self.lookup(sha, "author"))
+
+
+def mirror_from_flags(flags, repository):
+    # The mirror of the --mirror=DIR option, or None
+    if "mirror" not in flags or flags["mirror"] is True:
+        return None
+    path = os.path.join(flags["mirror"], repository.owner.login, repository.name+".git")
+    cache = LoginCache(flags.get("logins", os.path.join(flags["mirror"], "logins.json")))
+    return GitMirror(repository, path, cache)
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,303 @@
+# -*- coding: utf-8 -*-
+#
+# Social analysis of GitHub: an indexed store of all the networks mined
+#
+# Author: Massimo Menichinelli
+# Homepage: http://www.openp2pdesign.org
+# License: GPL v.3
+#
+# Requisite:
+# install NetworkX with pip install networkx
+#
+# Every script saves its network in its own .gexf file, and a question about
+# many of them (every interaction of a user in all the repositories mined so
+# far) needs to load all the files. With --store=FILE the scripts also save
+# their network in a SQLite file shared by all of them: every run is recorded
+# with the script and the source it has mined (the name of its .gexf file), and
+# a new run of the same script on the same source replaces its nodes and edges.
+# The multiple edges between two users are saved as a single edge for every
+# interaction and repository, with their number as weight and the first and
+# last timestamp. Nodes and edges are written in batches, in a single
+# transaction for every run, and indexed by login, repository and interaction.
+#
+# The ego-network scripts save the follow relationships with the "follows"
+# interaction. The repository scripts also save the sketches of the audience
+# of every role of every repository (see audience) with their run. The store can be queried from the command line:
+#
+#   python graphdb.py --store=FILE --login=USER [--repo=REPO] [--interaction=TYPE]
+#
+
+import json
+import os
+import sqlite3
+import sys
+import time
+
+from options import get_flags
+from roles import ROLES
+from audience import HyperLogLog
+
+# The rows written with every statement
+BATCH = 10000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    script TEXT NOT NULL,
+    source TEXT NOT NULL,
+    saved REAL NOT NULL,
+    UNIQUE (script, source)
+);
+CREATE TABLE IF NOT EXISTS nodes (
+    run INTEGER NOT NULL,
+    login TEXT NOT NULL,
+    label TEXT,
+    attributes TEXT,
+    PRIMARY KEY (run, login)
+);
+CREATE INDEX IF NOT EXISTS nodes_login ON nodes (login);
+CREATE TABLE IF NOT EXISTS edges (
+    run INTEGER NOT NULL,
+    source TEXT NOT NULL,
+    target TEXT NOT NULL,
+    interaction TEXT NOT NULL,
+    repo TEXT NOT NULL,
+    weight INTEGER NOT NULL,
+    first TEXT,
+    last TEXT,
+    PRIMARY KEY (run, source, target, interaction, repo)
+);
+CREATE INDEX IF NOT EXISTS edges_source ON edges (source, interaction);
+CREATE INDEX IF NOT EXISTS edges_target ON edges (target, interaction);
+CREATE INDEX IF NOT EXISTS edges_repo ON edges (repo, interaction);
+CREATE INDEX IF NOT EXISTS edges_interaction ON edges (interaction);
+CREATE TABLE IF NOT EXISTS sketches (
+    run INTEGER NOT NULL,
+    repo TEXT NOT NULL,
+    role TEXT NOT NULL,
+    precision INTEGER NOT NULL,
+    registers BLOB NOT NULL,
+    PRIMARY KEY (run, repo, role)
+);
+CREATE INDEX IF NOT EXISTS sketches_repo ON sketches (repo, role);
+"""
+
+UPSERT_EDGE = ("INSERT INTO edges (run, source, target, interaction, repo, weight, first, last) "
+               "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+               "ON CONFLICT (run, source, target, interaction, repo) DO UPDATE SET "
+               "weight = weight + excluded.weight, first = min(coalesce(first, excluded.first), coalesce(excluded.first, first)), "
+               "last = max(coalesce(last, excluded.last), coalesce(excluded.last, last))")
+
+UPSERT_NODE = ("INSERT INTO nodes (run, login, label, attributes) VALUES (?, ?, ?, ?) "
+               "ON CONFLICT (run, login) DO UPDATE SET label = excluded.label, attributes = excluded.attributes")
+
+COLUMNS = "r.script, r.source, e.source, e.target, e.interaction, e.repo, e.weight, e.first, e.last"
+
+
+def batches(rows, size=BATCH):
+    batch = []
+    for r in rows:
+        batch.append(r)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if len(batch) > 0:
+        yield batch
+
+
+def graph_nodes(graph):
+    # The label and the other attributes of every node (the roles, the friendship, member...), without the layout
+    for n, d in graph.nodes_iter(data=True):
+        attributes = dict((k, v) for k, v in d.items() if k not in ("label", "viz"))
+        yield n, d.get("label", n), json.dumps(attributes, sort_keys=True)
+
+
+def graph_edges(graph):
+    # The edges, aggregated for every pair of users, interaction and repository
+    edges = {}
+    for u, v, d in graph.edges_iter(data=True):
+        key = (u, v, d.get("interaction", "follows"), d.get("repo", ""))
+        timestamp = d.get("timestamp") or None
+        weight, first, last = edges.get(key, (0, timestamp, timestamp))
+        if timestamp is not None:
+            first = min(first, timestamp) if first is not None else timestamp
+            last = max(last, timestamp) if last is not None else timestamp
+        edges[key] = (weight + d.get("weight", 1), first, last)
+    for key in sorted(edges):
+        yield key + edges[key]
+
+
+def state_nodes(state):
+    # The nodes of the compact arrays of crawlstate
+    for i, login in enumerate(state.users.logins):
+        yield login, login, json.dumps({"member": "Yes" if state.members[i] else "No"})
+
+
+def state_edges(state):
+    for s, t in state.edges.edges():
+        yield state.users.logins[s], state.users.logins[t], "follows", "", 1, None, None
+
+
+class GraphDB(object):
+
+    def __init__(self, path):
+        self.path = path
+        # A service may open the store in a thread and write to it in another one (never in two at once)
+        self.db = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self.db.executescript(SCHEMA)
+
+    def save(self, script, source, nodes, edges, replace=True, sketches=None):
+        # Replace the run of a script on a source with new nodes, edges and sketches, in a single transaction.
+        # Without replace the edges are added to the ones of the run (their weights are summed),
+        # the roles of the nodes are added to the ones they had and the sketches are merged
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            self.db.execute("INSERT INTO runs (script, source, saved) VALUES (?, ?, ?) "
+                            "ON CONFLICT (script, source) DO UPDATE SET saved = excluded.saved",
+                            (script, source, time.time()))
+            run = self.db.execute("SELECT id FROM runs WHERE script = ? AND source = ?", (script, source)).fetchone()[0]
+            if replace:
+                self.db.execute("DELETE FROM nodes WHERE run = ?", (run,))
+                self.db.execute("DELETE FROM edges WHERE run = ?", (run,))
+                self.db.execute("DELETE FROM sketches WHERE run = ?", (run,))
+            else:
+                nodes = self.merged(run, nodes)
+            n = 0
+            for batch in batches(nodes):
+                self.db.executemany(UPSERT_NODE, [(run,) + r for r in batch])
+            for batch in batches(edges):
+                self.db.executemany(UPSERT_EDGE, [(run,) + r for r in batch])
+                n += len(batch)
+            if sketches is not None:
+                self.db.executemany("INSERT OR REPLACE INTO sketches (run, repo, role, precision, registers) VALUES (?, ?, ?, ?, ?)",
+                                    ((run, repo, role, s.precision, s.dump()) for (repo, role), s in self.merged_sketches(run, sketches)))
+            self.db.execute("COMMIT")
+        except:
+            self.db.execute("ROLLBACK")
+            raise
+        return run, n
+
+    def merged(self, run, nodes):
+        # The nodes with the attributes they already have in a run: a role is never lost
+        for login, label, attributes in nodes:
+            row = self.db.execute("SELECT attributes FROM nodes WHERE run = ? AND login = ?", (run, login)).fetchone()
+            if row is not None:
+                old = json.loads(row[0])
+                new = json.loads(attributes)
+                for r in ROLES:
+                    if old.get(r) == "Yes":
+                        new[r] = "Yes"
+                old.update(new)
+                attributes = json.dumps(old, sort_keys=True)
+            yield login, label, attributes
+
+    def merged_sketches(self, run, sketches):
+        # The sketches with the users already counted in a run (none after a replace)
+        for (repo, role), s in sketches.items():
+            row = self.db.execute("SELECT precision, registers FROM sketches WHERE run = ? AND repo = ? AND role = ?",
+                                  (run, repo, role)).fetchone()
+            if row is not None:
+                s = s.copy().merge(HyperLogLog.load(*row))
+            yield (repo, role), s
+
+    def has_run(self, script, source):
+        return self.db.execute("SELECT 1 FROM runs WHERE script = ? AND source = ?", (script, source)).fetchone() is not None
+
+    def save_graph(self, script, source, graph, replace=True):
+        return self.save(script, source, graph_nodes(graph), graph_edges(graph), replace, graph.graph.get("audience"))
+
+    def save_state(self, script, source, state):
+        return self.save(script, source, state_nodes(state), state_edges(state))
+
+    def interactions(self, login, repo=None, interaction=None):
+        # The edges of a user in all the runs, from and to it, with the script and source of their run
+        found = []
+        for column in ("source", "target"):
+            query = "SELECT "+COLUMNS+" FROM edges e JOIN runs r ON r.id = e.run WHERE e."+column+" = ?"
+            parameters = [login]
+            if interaction is not None:
+                query += " AND e.interaction = ?"
+                parameters.append(interaction)
+            if repo is not None:
+                query += " AND e.repo = ?"
+                parameters.append(repo)
+            found.extend(self.db.execute(query, parameters).fetchall())
+        # A self-loop is found from both sides
+        return sorted(set(found))
+
+    def repository(self, repo, interaction=None):
+        # The edges of a repository in all the runs
+        query = "SELECT "+COLUMNS+" FROM edges e JOIN runs r ON r.id = e.run WHERE e.repo = ?"
+        parameters = [repo]
+        if interaction is not None:
+            query += " AND e.interaction = ?"
+            parameters.append(interaction)
+        return self.db.execute(query+" ORDER BY e.first", parameters).fetchall()
+
+    def user(self, login):
+        # The attributes of a user in every run that has found it
+        rows = self.db.execute("SELECT r.script, r.source, n.label, n.attributes FROM nodes n JOIN runs r ON r.id = n.run "
+                               "WHERE n.login = ? ORDER BY r.saved", (login,))
+        return [(script, source, label, json.loads(attributes)) for script, source, label, attributes in rows]
+
+    def sketches(self, repos=None, owners=None):
+        # The sketches of the repositories (all of them, some of them, or the ones of some owners) in all the runs
+        query = "SELECT repo, role, precision, registers FROM sketches"
+        conditions = []
+        parameters = []
+        for r in repos or []:
+            conditions.append("repo = ?")
+            parameters.append(r)
+        for o in owners or []:
+            # The range of the repositories of an owner, so the index can be used
+            conditions.append("(repo >= ? AND repo < ?)")
+            parameters.extend([o+"/", o+"0"])
+        if len(conditions) > 0:
+            query += " WHERE "+" OR ".join(conditions)
+        rows = self.db.execute(query+" ORDER BY repo, role", parameters).fetchall()
+        return [(repo, role, HyperLogLog.load(precision, registers)) for repo, role, precision, registers in rows]
+
+    def runs(self):
+        return self.db.execute("SELECT script, source, saved FROM runs ORDER BY saved").fetchall()
+
+
+def script_name():
+    return os.path.basename(sys.argv[0])
+
+
+def store_from_flags(flags):
+    # The store of the --store option, or None without it
+    if "store" not in flags:
+        return None
+    if flags["store"] is True:
+        sys.exit("The store needs a file: --store=FILE")
+    return GraphDB(flags["store"])
+
+
+def store_graph(store, source, graph=None, state=None):
+    # Save the network of a script in the store, when there is one
+    if store is None:
+        return
+    print "Saving the network in the store..."
+    if state is not None:
+        run, n = store.save_state(script_name(), source, state)
+    else:
+        run, n = store.save_graph(script_name(), source, graph)
+    print "Done.",n,"edges saved in",store.path
+
+
+if __name__ == "__main__":
+    flags = get_flags()
+    store = store_from_flags(flags)
+    if store is None:
+        sys.exit("The store is needed: --store=FILE")
+    if "login" in flags:
+        rows = store.interactions(flags["login"], flags.get("repo"), flags.get("interaction"))
+    elif "repo" in flags:
+        rows = store.repository(flags["repo"], flags.get("interaction"))
+    else:
+        for script, source, saved in store.runs():
+            print time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(saved)), script, source
+        sys.exit()
+    for script, source, u, v, interaction, repo, weight, first, last in rows:
+        print u, "->", v, interaction, repo, "weight:", weight, "from", first, "to", last, "(", source, ")"
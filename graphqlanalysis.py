@@ -0,0 +1,337 @@
+# -*- coding: utf-8 -*-
+#
+# Social analysis of GitHub: analysis of a repository with the GraphQL API
+#
+# Author: Massimo Menichinelli
+# Homepage: http://www.openp2pdesign.org
+# License: GPL v.3
+#
+# Requisite:
+# install pyGithub with pip install PyGithub
+# install NetworkX with pip install networkx
+#
+# The REST API needs a request for every page of issues and then one more for
+# the comments of every issue (and of every commit). A GraphQL query returns
+# the issues together with their first comments and the logins of their authors,
+# so only the few threads with more comments need other requests.
+# The graph is built with the same rules of analyse_repo.
+#
+# GraphQL has no list of contributors, so they are still listed with the REST API.
+#
+# The queries are sent with the credentials of the pool like the REST requests,
+# switching to the next one when a credential is revoked or exhausted.
+#
+# The scripts use it with --graphql (or --graphql=URL, e.g. for graphqlstandin.py)
+#
+
+from github import BadCredentialsException, RateLimitExceededException
+import base64
+import json
+import time
+import urllib2
+
+from repoanalysis import PHASES, reader_of, login_of, set_role, add_interaction, add_edges, add_pull_edge
+from roles import role_table
+
+ENDPOINT = "https://api.github.com/graphql"
+
+# The comments downloaded together with every issue, pull request or commit
+COMMENTS = 50
+
+PAGE_INFO = "pageInfo { hasNextPage endCursor }"
+COMMENT_NODES = "nodes { createdAt author { login } }"
+
+STARGAZERS = """
+query Stargazers($owner: String!, $name: String!, $after: String) {
+  repository(owner: $owner, name: $name) {
+    stargazers(first: 100, after: $after) { %s nodes { login } }
+  }
+}
+""" % PAGE_INFO
+
+COLLABORATORS = """
+query Collaborators($owner: String!, $name: String!, $after: String) {
+  repository(owner: $owner, name: $name) {
+    collaborators(first: 100, after: $after) { %s nodes { login } }
+  }
+}
+""" % PAGE_INFO
+
+ISSUES = """
+query Issues($owner: String!, $name: String!, $after: String, $comments: Int!) {
+  repository(owner: $owner, name: $name) {
+    issues(first: 50, after: $after) {
+      %s
+      nodes {
+        id number createdAt
+        author { login }
+        assignees(first: 1) { nodes { login } }
+        comments(first: $comments) { %s %s }
+      }
+    }
+  }
+}
+""" % (PAGE_INFO, PAGE_INFO, COMMENT_NODES)
+
+PULLS = """
+query Pulls($owner: String!, $name: String!, $after: String, $comments: Int!, $states: [PullRequestState!]) {
+  repository(owner: $owner, name: $name) {
+    pullRequests(first: 50, after: $after, states: $states) {
+      %s
+      nodes {
+        id number createdAt state
+        author { login }
+        assignees(first: 1) { nodes { login } }
+        comments(first: $comments) { %s %s }
+      }
+    }
+  }
+}
+""" % (PAGE_INFO, PAGE_INFO, COMMENT_NODES)
+
+HISTORY = """
+query History($owner: String!, $name: String!, $after: String, $comments: Int!) {
+  repository(owner: $owner, name: $name) {
+    defaultBranchRef {
+      target {
+        ... on Commit {
+          history(first: 100, after: $after) {
+            %s
+            nodes {
+              id oid committedDate
+              committer { user { login } }
+              author { user { login } }
+              comments(first: $comments) { %s %s }
+            }
+          }
+        }
+      }
+    }
+  }
+}
+""" % (PAGE_INFO, PAGE_INFO, COMMENT_NODES)
+
+MORE_COMMENTS = """
+query MoreComments($id: ID!, $after: String) {
+  node(id: $id) {
+    ... on Issue { comments(first: 100, after: $after) { %s %s } }
+    ... on PullRequest { comments(first: 100, after: $after) { %s %s } }
+    ... on Commit { comments(first: 100, after: $after) { %s %s } }
+  }
+}
+""" % ((PAGE_INFO, COMMENT_NODES) * 3)
+
+
+class GraphQLError(Exception):
+    pass
+
+
+class HTTPTransport(object):
+    # Send a query to a GraphQL endpoint with the best credential of the pool, and count the round trips.
+    # A revoked or exhausted credential (401, 403) is reported to the pool and the query is sent again
+    # with the next one; the other failures, and the answers with errors only, are retried after a wait
+
+    def __init__(self, pool, endpoint=ENDPOINT, retries=5, wait=3):
+        self.pool = pool
+        self.endpoint = endpoint
+        self.retries = retries
+        self.wait = wait
+        self.requests = 0
+
+    def authorization(self, credential):
+        if isinstance(credential, tuple):
+            return "Basic "+base64.b64encode(credential[0]+":"+credential[1])
+        return "bearer "+credential
+
+    def __call__(self, query, variables):
+        for k in range(self.retries+1):
+            g = self.pool.best()
+            self.requests += 1
+            request = urllib2.Request(self.endpoint, json.dumps({"query": query, "variables": variables}),
+                                      {"Content-Type": "application/json",
+                                       "Authorization": self.authorization(self.pool.credentials[g])})
+            try:
+                response = json.load(urllib2.urlopen(request))
+            except urllib2.HTTPError, e:
+                if e.code == 401:
+                    self.pool.failed(g, BadCredentialsException(e.code, {"message": str(e)}))
+                elif e.code == 403:
+                    self.pool.failed(g, RateLimitExceededException(e.code, {"message": str(e)}))
+                error = "HTTP %d" % e.code
+            except (urllib2.URLError, ValueError), e:
+                error = str(e)
+            else:
+                if not response.get("errors") or response.get("data") is not None:
+                    return response["data"]
+                error = "; ".join(m.get("message", "") for m in response["errors"])
+            if k < self.retries:
+                print "The GraphQL query failed (%s), retrying in %d seconds..." % (error, self.wait)
+                time.sleep(self.wait)
+        raise GraphQLError("The GraphQL query failed %d times: %s" % (self.retries+1, error))
+
+
+def graphql_transport(pool, flags):
+    # The transport of the --graphql option, with the credentials of the pool
+    if flags.get("graphql", True) is True:
+        return HTTPTransport(pool)
+    return HTTPTransport(pool, flags["graphql"])
+
+
+def paginate(transport, query, variables, path, after=None):
+    # The nodes of the connection at "path" in the answer, page after page
+    while True:
+        v = dict(variables)
+        v["after"] = after
+        connection = transport(query, v)
+        for key in path:
+            if connection is None:
+                return
+            connection = connection[key]
+        if connection is None:
+            return
+        for n in connection["nodes"]:
+            yield n
+        if not connection["pageInfo"]["hasNextPage"]:
+            return
+        after = connection["pageInfo"]["endCursor"]
+
+
+def author_of(node):
+    # Deleted accounts have no author, like the NoneType users of the REST API
+    if node is None or node.get("login") is None:
+        return "None"
+    return str(unicode(node["login"]))
+
+
+def time_of(value):
+    # "2013-02-01T10:00:00Z" as the timestamps of analyse_repo
+    if value is None:
+        return ""
+    return str(value[:19])
+
+
+def comments_of(transport, node):
+    # The (commenter, timestamp) comments of an issue, pull request or commit,
+    # with a follow-up request only when there are more than the ones received with it
+    comments = [(author_of(c["author"]), time_of(c["createdAt"])) for c in node["comments"]["nodes"]]
+    if node["comments"]["pageInfo"]["hasNextPage"]:
+        for c in paginate(transport, MORE_COMMENTS, {"id": node["id"]}, ["node", "comments"],
+                          node["comments"]["pageInfo"]["endCursor"]):
+            comments.append((author_of(c["author"]), time_of(c["createdAt"])))
+    return comments
+
+
+def analyse_repo_graphql(repository,graph,phases=None,pool=None,transport=None):
+    # The same analysis of analyse_repo, with the GraphQL API
+    if phases is None:
+        phases = set(PHASES)
+    issue = {}
+    committers = []
+    commit_comments = []
+    names = {"owner": repository.owner.login, "name": repository.name}
+    comments = COMMENTS if "issue_comments" in phases else 0
+    role_table(graph).start_repo(repository.full_name)
+    graph.graph["repo"] = repository.full_name
+
+    print "-----"
+    print "DESCRIPTION:",repository.description
+    print "-----"
+    print "OWNER:",repository.owner.login
+    set_role(graph, login_of(repository.owner), "owner")
+
+    if "stargazers" in phases:
+        print "-----"
+        print "WATCHERS:",repository.watchers
+        print ""
+        for i in paginate(transport, STARGAZERS, names, ["repository", "stargazers"]):
+            print "-",author_of(i)
+            set_role(graph, author_of(i), "watcher")
+
+    if "collaborators" in phases:
+        print "-----"
+        print "COLLABORATORS"
+        print ""
+        for i in paginate(transport, COLLABORATORS, names, ["repository", "collaborators"]):
+            print "-",author_of(i)
+            set_role(graph, author_of(i), "collaborator")
+
+    # Like in the REST API, the pull requests are issues too
+    threads = []
+    print "-----"
+    print "HAS ISSUES=",repository.has_issues
+    if "issues" in phases and repository.has_issues == True:
+        print "-----"
+        print "ISSUES"
+        print ""
+        v = dict(names, comments=comments)
+        threads += list(paginate(transport, ISSUES, v, ["repository", "issues"]))
+        v = dict(names, comments=comments, states=None)
+        threads += list(paginate(transport, PULLS, v, ["repository", "pullRequests"]))
+    elif "pulls" in phases and "pr_assignment" in phases:
+        v = dict(names, comments=0, states=["OPEN"])
+        threads += list(paginate(transport, PULLS, v, ["repository", "pullRequests"]))
+
+    for i in threads:
+        if "state" in i and ("issues" not in phases or repository.has_issues != True):
+            continue
+        print "Issue number:",i["number"]
+        author = author_of(i["author"])
+        print "- Created by", author
+        issue[i["number"]] = {"author": author, "comments": []}
+        if "issue_assignment" in phases:
+            assignee = author_of(i["assignees"]["nodes"][0] if len(i["assignees"]["nodes"]) > 0 else None)
+            print "-- Assigned to",assignee
+            add_interaction(graph, author, assignee, "issue_assignment", time_of(i["createdAt"]))
+        if "issue_comments" in phases:
+            issue[i["number"]]["comments"] = comments_of(transport, i)
+            print "--",len(issue[i["number"]]["comments"]),"comments"
+        print ""
+
+    if "contributors" in phases:
+        print "-----"
+        print "CONTRIBUTORS"
+        print ""
+        for i in reader_of(pool, repository).contributors(repository.url):
+            print "-", login_of(i)
+            set_role(graph, login_of(i), "contributor")
+
+    if "commits" in phases and ("commit_succession" in phases or "commit_comments" in phases):
+        print "-----"
+        print "COMMITS"
+        print ""
+        v = dict(names, comments=COMMENTS if "commit_comments" in phases else 0)
+        for i in paginate(transport, HISTORY, v, ["repository", "defaultBranchRef", "target", "history"]):
+            committer = author_of(i["committer"]["user"] if i["committer"] else None)
+            print "-",i["oid"]
+            print "-- by",committer
+            committers.append((committer, time_of(i["committedDate"])))
+            if "commit_comments" in phases:
+                commenters = comments_of(transport, i)
+                if len(commenters) > 0:
+                    commit_comments.append((author_of(i["author"]["user"] if i["author"] else None), commenters))
+    print "-----"
+
+    add_edges(graph, phases, issue, committers, commit_comments)
+
+    if "pulls" in phases and "pr_assignment" in phases:
+        print "-----"
+        print "PULL REQUESTS"
+        print ""
+        for i in threads:
+            if i.get("state") != "OPEN":
+                continue
+            one = author_of(i["assignees"]["nodes"][0] if len(i["assignees"]["nodes"]) > 0 else None)
+            print "Assignee:",one
+            two = author_of(i["author"])
+            print "User:",two
+            add_pull_edge(graph, one, two, time_of(i["createdAt"]))
+
+    role_table(graph).end_repo()
+    print "-----"
+    print "GraphQL requests:",transport.requests
+
+    return
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+#
+# Social analysis of GitHub: a local stand-in of the GitHub GraphQL API
+#
+# Author: Massimo Menichinelli
+# Homepage: http://www.openp2pdesign.org
+# License: GPL v.3
+#
+# It answers the queries of graphqlanalysis (and only those) from a JSON file,
+# with the same pages and cursors of GitHub, so that the GraphQL analysis
+# can be tried offline:
+#
+#   python graphqlstandin.py repository.json 8000
+#   python single_repository_social_mining_weighted.py --graphql=http://localhost:8000/graphql
+#
+# The JSON file describes a repository:
+#
+#   {"stargazers": ["login", ...], "collaborators": ["login", ...],
+#    "issues": [{"number": 1, "createdAt": "2013-02-01T10:00:00Z", "author": "login",
+#                "assignee": "login", "comments": [{"author": "login", "createdAt": "..."}]}],
+#    "pullRequests": [{..the same of an issue.., "state": "OPEN"}],
+#    "commits": [{"oid": "sha", "committedDate": "...", "committer": "login",
+#                 "author": "login", "comments": [...]}]}
+#
+# with the commits from the newest one, like in the history of GitHub.
+#
+
+import BaseHTTPServer
+import json
+import re
+import sys
+
+
+def user(login):
+    if login is None:
+        return None
+    return {"login": login}
+
+
+def page(items, first, after):
+    # A page of a connection: the cursor is the position of the last item
+    start = int(after) if after is not None else 0
+    nodes = items[start:start+first]
+    return {"pageInfo": {"hasNextPage": start+first < len(items), "endCursor": str(start+len(nodes))},
+            "nodes": nodes}
+
+
+class StandIn(object):
+
+    def __init__(self, data):
+        self.data = data
+        self.requests = 0
+        # Every issue, pull request and commit has an id, for the follow-up pages of its comments
+        self.nodes = {}
+        for kind in ["issues", "pullRequests", "commits"]:
+            for k, i in enumerate(data.get(kind, [])):
+                self.nodes[kind+str(k)] = i
+
+    def comments(self, i, first, after=None):
+        return page([{"createdAt": c["createdAt"], "author": user(c["author"])} for c in i.get("comments", [])], first, after)
+
+    def thread(self, kind, k, i, comments):
+        node = {"id": kind+str(k), "number": i["number"], "createdAt": i["createdAt"],
+                "author": user(i["author"]),
+                "assignees": {"nodes": [user(i["assignee"])] if i.get("assignee") else []},
+                "comments": self.comments(i, comments)}
+        if "state" in i:
+            node["state"] = i["state"]
+        return node
+
+    def commit(self, k, i, comments):
+        return {"id": "commits"+str(k), "oid": i["oid"], "committedDate": i["committedDate"],
+                "committer": {"user": user(i["committer"])} if i.get("committer") else None,
+                "author": {"user": user(i["author"])} if i.get("author") else None,
+                "comments": self.comments(i, comments)}
+
+    def __call__(self, query, variables):
+        self.requests += 1
+        operation = re.search(r"query (\w+)", query).group(1)
+        first = int(re.search(r"first: (\d+)", query).group(1))
+        after = variables.get("after")
+        comments = variables.get("comments", 0)
+        if operation in ["Stargazers", "Collaborators"]:
+            key = operation[0].lower() + operation[1:]
+            return {"repository": {key: page([user(i) for i in self.data.get(key, [])], first, after)}}
+        if operation == "Issues":
+            items = [self.thread("issues", k, i, comments) for k, i in enumerate(self.data.get("issues", []))]
+            return {"repository": {"issues": page(items, first, after)}}
+        if operation == "Pulls":
+            states = variables.get("states")
+            items = [self.thread("pullRequests", k, i, comments) for k, i in enumerate(self.data.get("pullRequests", []))
+                     if states is None or i["state"] in states]
+            return {"repository": {"pullRequests": page(items, first, after)}}
+        if operation == "History":
+            items = [self.commit(k, i, comments) for k, i in enumerate(self.data.get("commits", []))]
+            return {"repository": {"defaultBranchRef": {"target": {"history": page(items, first, after)}}}}
+        if operation == "MoreComments":
+            return {"node": {"comments": self.comments(self.nodes[variables["id"]], first, after)}}
+        raise ValueError("Unknown query: "+operation)
+
+
+def serve(data, port=8000):
+    standin = StandIn(data)
+
+    class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            try:
+                answer = {"data": standin(body["query"], body.get("variables") or {})}
+            except ValueError, e:
+                answer = {"data": None, "errors": [{"message": str(e)}]}
+            answer = json.dumps(answer)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(answer)))
+            self.end_headers()
+            self.wfile.write(answer)
+
+    server = BaseHTTPServer.HTTPServer(("localhost", port), Handler)
+    print "GraphQL stand-in listening on http://localhost:"+str(port)+"/graphql"
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    serve(json.load(open(sys.argv[1])), int(sys.argv[2]) if len(sys.argv) > 2 else 8000)
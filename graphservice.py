@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+#
+# Social analysis of GitHub: a local service answering queries on the mined networks
+#
+# Author: Massimo Menichinelli
+# Homepage: http://www.openp2pdesign.org
+# License: GPL v.3
+#
+# Requisite:
+# install NetworkX with pip install networkx
+#
+# It loads all the .gexf files saved by the ego-network and the social mining
+# scripts in a directory, and answers HTTP/JSON queries on them without any
+# request to GitHub:
+#
+#   python graphservice.py --dir=networks --port=8000
+#
+#   /graphs                                          the loaded networks
+#   /ego?graph=NAME&login=LOGIN&radius=1             the ego-network of a user
+#   /top?graph=NAME&login=LOGIN&k=10                 the users it interacts with most
+#   /path?graph=NAME&source=LOGIN&target=LOGIN       a shortest path between two users
+#   /roles?login=LOGIN[&graph=NAME]                  the roles of a user in the repositories
+#   /stats                                           requests, cache hits and reloads
+#
+# NAME is the name of the .gexf file without the extension. The directory is
+# checked every --poll=SECONDS (5 by default): new or updated files are loaded
+# and replace the old ones. The answers are kept in a cache of the --cache=N
+# (1024 by default) most recent queries, emptied at every reload.
+#
+
+import BaseHTTPServer
+import SocketServer
+import heapq
+import json
+import os
+import threading
+import time
+import traceback
+import urlparse
+from collections import OrderedDict
+
+import networkx as nx
+
+from options import get_flags
+from roles import ROLES
+
+
+class QueryError(Exception):
+
+    def __init__(self, status, message):
+        Exception.__init__(self, message)
+        self.status = status
+
+
+class LRUCache(object):
+    # The answers of the most recent queries
+
+    def __init__(self, size=1024):
+        self.size = size
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.items:
+                self.misses += 1
+                return None
+            self.hits += 1
+            value = self.items.pop(key)
+            self.items[key] = value
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.items.pop(key, None)
+            self.items[key] = value
+            if len(self.items) > self.size:
+                self.items.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()
+
+
+def weight_of(data):
+    # The ego-networks have no weights, the dynamic networks the total of their windows (see temporal)
+    try:
+        return float(data.get("weight", 1))
+    except (TypeError, ValueError):
+        return 1.0
+
+
+class Snapshot(object):
+    # A mined network, with the weight of the interactions of every user with every other one
+
+    def __init__(self, path):
+        self.path = path
+        self.mtime = os.path.getmtime(path)
+        self.graph = nx.read_gexf(path)
+        self.partners = {}
+        for u, v, d in self.graph.edges_iter(data=True):
+            if u == v:
+                continue
+            w = weight_of(d)
+            for a, b in [(u, v), (v, u)]:
+                if a not in self.partners:
+                    self.partners[a] = {}
+                self.partners[a][b] = self.partners[a].get(b, 0) + w
+
+    def user(self, login):
+        if login not in self.graph:
+            raise QueryError(404, "Unknown user: "+login)
+
+    def ego(self, login, radius):
+        self.user(login)
+        ego = nx.ego_graph(self.graph, login, radius, undirected=True)
+        return {"login": login, "radius": radius,
+                "nodes": sorted(ego.nodes()),
+                "edges": [[u, v, weight_of(d)] for u, v, d in ego.edges_iter(data=True)]}
+
+    def top(self, login, k):
+        self.user(login)
+        partners = self.partners.get(login, {})
+        best = heapq.nlargest(k, partners.items(), key=lambda p: (p[1], p[0]))
+        return {"login": login, "partners": [[p, w] for p, w in best]}
+
+    def shortest_path(self, source, target):
+        self.user(source)
+        self.user(target)
+        try:
+            return {"source": source, "target": target, "path": nx.shortest_path(self.graph, source, target)}
+        except nx.NetworkXNoPath:
+            return {"source": source, "target": target, "path": None}
+
+    def roles(self, login):
+        if login not in self.graph:
+            return None
+        return [r for r in ROLES if self.graph.node[login].get(r) == "Yes"]
+
+
+class GraphStore(object):
+    # The snapshots of a directory, reloaded when they change
+
+    def __init__(self, directory, cache_size=1024):
+        self.directory = directory
+        self.snapshots = {}
+        self.cache = LRUCache(cache_size)
+        self.requests = 0
+        self.reloads = 0
+        self.lock = threading.Lock()
+
+    def reload(self):
+        # Load the new and updated files, forget the deleted ones.
+        # The queries keep using the old snapshots until the new ones are all loaded
+        with self.lock:
+            snapshots = {}
+            changed = False
+            for f in sorted(os.listdir(self.directory)):
+                if not f.endswith(".gexf"):
+                    continue
+                path = os.path.join(self.directory, f)
+                name = f[:-len(".gexf")]
+                old = self.snapshots.get(name)
+                if old is not None and old.mtime == os.path.getmtime(path):
+                    snapshots[name] = old
+                    continue
+                print "Loading",path,"..."
+                try:
+                    snapshots[name] = Snapshot(path)
+                except Exception, e:
+                    # A file that is still being written is loaded at the next check
+                    print "Skipping",path,":",e
+                    if old is not None:
+                        snapshots[name] = old
+                    continue
+                changed = True
+            if changed or len(snapshots) != len(self.snapshots):
+                self.snapshots = snapshots
+                self.cache.clear()
+                self.reloads += 1
+
+    def watch(self, interval):
+        while True:
+            time.sleep(interval)
+            self.reload()
+
+    def snapshot(self, name):
+        if name not in self.snapshots:
+            raise QueryError(404, "Unknown graph: "+name)
+        return self.snapshots[name]
+
+    def answer(self, path, query):
+        # The answer to a query, from the cache when it has been asked before
+        self.requests += 1
+        key = path+"?"+"&".join(k+"="+query[k] for k in sorted(query))
+        if path != "/stats":
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        reloads = self.reloads
+        result = json.dumps(self.query(path, query))
+        # An answer computed while the networks were being replaced is not kept
+        if path != "/stats" and reloads == self.reloads:
+            self.cache.put(key, result)
+        return result
+
+    def query(self, path, query):
+        def param(name, default=None):
+            if name in query:
+                return query[name]
+            if default is None:
+                raise QueryError(400, "Missing parameter: "+name)
+            return default
+
+        def number(name, default):
+            try:
+                return int(param(name, str(default)))
+            except ValueError:
+                raise QueryError(400, "Not a number: "+name)
+
+        snapshots = self.snapshots
+        if path == "/graphs":
+            return dict((n, {"nodes": s.graph.number_of_nodes(), "edges": s.graph.number_of_edges()})
+                        for n, s in snapshots.items())
+        if path == "/ego":
+            return self.snapshot(param("graph")).ego(param("login"), number("radius", 1))
+        if path == "/top":
+            return self.snapshot(param("graph")).top(param("login"), number("k", 10))
+        if path == "/path":
+            return self.snapshot(param("graph")).shortest_path(param("source"), param("target"))
+        if path == "/roles":
+            login = param("login")
+            names = [param("graph")] if "graph" in query else sorted(snapshots)
+            roles = {}
+            for n in names:
+                r = self.snapshot(n).roles(login)
+                if r is not None:
+                    roles[n] = r
+            return {"login": login, "roles": roles}
+        if path == "/stats":
+            return {"graphs": len(snapshots), "requests": self.requests, "reloads": self.reloads,
+                    "cache": {"size": len(self.cache.items), "hits": self.cache.hits, "misses": self.cache.misses}}
+        raise QueryError(404, "Unknown query: "+path)
+
+
+class ThreadedHTTPServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+def serve(store, port=8000):
+
+    class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse.urlparse(self.path)
+            query = dict((k, v[-1]) for k, v in urlparse.parse_qs(url.query).items())
+            try:
+                status, answer = 200, store.answer(url.path, query)
+            except QueryError, e:
+                status, answer = e.status, json.dumps({"error": str(e)})
+            except Exception, e:
+                # A bug, or a network that cannot answer the query: the client gets an error, not a closed socket
+                print "Error answering",self.path,":"
+                traceback.print_exc()
+                status, answer = 500, json.dumps({"error": "Internal error: "+str(e)})
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(answer)))
+            self.end_headers()
+            self.wfile.write(answer)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadedHTTPServer(("localhost", port), Handler)
+    print "Graph service listening on http://localhost:"+str(port)+"/"
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    flags = get_flags()
+    store = GraphStore(flags.get("dir", "."), int(flags.get("cache", 1024)))
+    store.reload()
+    print len(store.snapshots),"networks loaded"
+    watcher = threading.Thread(target=store.watch, args=(float(flags.get("poll", 5)),))
+    watcher.daemon = True
+    watcher.start()
+    serve(store, int(flags.get("port", 8000)))
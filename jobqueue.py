@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+#
+# Social analysis of GitHub: a queue of mining jobs shared by many workers
+#
+# Author: Massimo Menichinelli
+# Homepage: http://www.openp2pdesign.org
+# License: GPL v.3
+#
+# Requisite:
+# install NetworkX with pip install networkx
+#
+# The repositories of many Organizations are mined as jobs kept in a SQLite
+# file: a job is a repository, or a group of phases of a repository (GROUPS).
+# Any number of workers, on any machine that can open the file, take a job
+# with a lease: when a worker does not finish its job before the lease
+# expires (it has crashed, or lost its connection), the job goes back to the
+# queue and another worker takes it. While a worker is mining, a heartbeat
+# thread renews its lease, so a large repository, or a worker waiting for its
+# rate limit, keeps the job. A worker saves the edges and the roles it
+# has found together with the end of its job, and only if it still holds the
+# lease, so a job is never saved twice. When all the jobs of an Organization
+# are done, the reducer builds its graph from the edges of all of them.
+#
+
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+import networkx as nx
+
+from repoanalysis import set_role
+from roles import ROLES, BITS, role_table, export_roles
+
+# The phases that can be mined apart: every rule with the sources it needs
+GROUPS = [("roles", ["stargazers", "collaborators", "contributors"]),
+          ("issues", ["issues", "issue_comments", "issue_assignment"]),
+          ("commits", ["commits", "commit_succession", "commit_comments"]),
+          ("pulls", ["pulls", "pr_assignment"])]
+
+# A worker that has not finished a job in LEASE seconds has probably stopped
+LEASE = 3600
+ATTEMPTS = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    org TEXT NOT NULL,
+    repo TEXT NOT NULL,
+    phases TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'queued',
+    worker TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    UNIQUE (org, repo, phases)
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, lease_until);
+CREATE TABLE IF NOT EXISTS edges (
+    job INTEGER NOT NULL,
+    source TEXT NOT NULL,
+    target TEXT NOT NULL,
+    timestamp TEXT,
+    interaction TEXT,
+    repo TEXT
+);
+CREATE INDEX IF NOT EXISTS edges_job ON edges (job);
+CREATE TABLE IF NOT EXISTS roles (
+    job INTEGER NOT NULL,
+    login TEXT NOT NULL,
+    flags INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS roles_job ON roles (job);
+"""
+
+
+def split_phases(phases, by_phase=True):
+    # The phases of the jobs of a repository: one job with all of them, or a job for every group
+    if not by_phase:
+        return [sorted(phases)]
+    jobs = []
+    for name, group in GROUPS:
+        selected = [p for p in group if p in phases]
+        if len(selected) > 0:
+            jobs.append(sorted(selected))
+    return jobs
+
+
+def worker_name():
+    return socket.gethostname()+":"+str(os.getpid())
+
+
+class JobQueue(object):
+
+    def __init__(self, path, lease=LEASE, attempts=ATTEMPTS):
+        self.path = path
+        self.lease = lease
+        self.attempts = attempts
+        # The transactions are opened explicitly, and wait for the other workers up to a minute
+        self.db = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.db.executescript(SCHEMA)
+
+    def transaction(self):
+        self.db.execute("BEGIN IMMEDIATE")
+
+    def enqueue(self, org, repo, phases):
+        # A job is added only once, so the coordinator can be run again
+        cursor = self.db.execute("INSERT OR IGNORE INTO jobs (org, repo, phases) VALUES (?, ?, ?)",
+                                 (org, repo, ",".join(sorted(phases))))
+        return cursor.rowcount
+
+    def requeue_stale(self, now=None):
+        # The jobs whose lease has expired go back to the queue (or fail, after too many attempts)
+        if now is None:
+            now = time.time()
+        self.db.execute("UPDATE jobs SET state = 'failed', error = 'lease expired too many times' "
+                        "WHERE state = 'leased' AND lease_until < ? AND attempts >= ?", (now, self.attempts))
+        cursor = self.db.execute("UPDATE jobs SET state = 'queued', worker = NULL, lease_until = NULL "
+                                 "WHERE state = 'leased' AND lease_until < ?", (now,))
+        return cursor.rowcount
+
+    def claim(self, worker):
+        # The next job, leased to worker: (id, org, repo, phases), or None when there is no job to do
+        self.transaction()
+        try:
+            now = time.time()
+            self.requeue_stale(now)
+            row = self.db.execute("SELECT id, org, repo, phases FROM jobs WHERE state = 'queued' ORDER BY id LIMIT 1").fetchone()
+            if row is not None:
+                self.db.execute("UPDATE jobs SET state = 'leased', worker = ?, lease_until = ?, attempts = attempts + 1 "
+                                "WHERE id = ?", (worker, now + self.lease, row[0]))
+            self.db.execute("COMMIT")
+        except:
+            self.db.execute("ROLLBACK")
+            raise
+        if row is None:
+            return None
+        return row[0], row[1], row[2], row[3].split(",")
+
+    def renew(self, job, worker):
+        # Push the lease of a job forward, if the worker still holds it
+        cursor = self.db.execute("UPDATE jobs SET lease_until = ? WHERE id = ? AND state = 'leased' AND worker = ?",
+                                 (time.time() + self.lease, job, worker))
+        return cursor.rowcount > 0
+
+    def complete(self, job, worker, graph):
+        # Save the edges and roles of a job, only if the worker still holds its lease
+        self.transaction()
+        try:
+            held = self.db.execute("SELECT 1 FROM jobs WHERE id = ? AND state = 'leased' AND worker = ?",
+                                   (job, worker)).fetchone()
+            if held is not None:
+                self.db.executemany("INSERT INTO edges (job, source, target, timestamp, interaction, repo) VALUES (?, ?, ?, ?, ?, ?)",
+                                    ((job, u, v, d.get("timestamp", ""), d.get("interaction", ""), d.get("repo", ""))
+                                     for u, v, d in graph.edges_iter(data=True)))
+                table = role_table(graph)
+                self.db.executemany("INSERT INTO roles (job, login, flags) VALUES (?, ?, ?)",
+                                    ((job, login, table.get(login)) for login in table.users.logins if table.get(login) > 0))
+                self.db.execute("UPDATE jobs SET state = 'done', lease_until = NULL WHERE id = ?", (job,))
+            self.db.execute("COMMIT")
+        except:
+            self.db.execute("ROLLBACK")
+            raise
+        return held is not None
+
+    def fail(self, job, worker, error):
+        # A job that has failed is tried again by another worker, up to ATTEMPTS times
+        self.db.execute("UPDATE jobs SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END, "
+                        "worker = NULL, lease_until = NULL, error = ? WHERE id = ? AND worker = ?",
+                        (self.attempts, error, job, worker))
+
+    def counts(self, org=None):
+        if org is None:
+            rows = self.db.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state")
+        else:
+            rows = self.db.execute("SELECT state, COUNT(*) FROM jobs WHERE org = ? GROUP BY state", (org,))
+        return dict(rows.fetchall())
+
+    def orgs(self):
+        return [r[0] for r in self.db.execute("SELECT DISTINCT org FROM jobs ORDER BY org")]
+
+    def reduce(self, org):
+        # The graph of an Organization, from the edges and roles of all its jobs that are done
+        graph = nx.MultiDiGraph()
+        jobs = self.db.execute("SELECT id, repo FROM jobs WHERE org = ? AND state = 'done' ORDER BY repo, id", (org,)).fetchall()
+        table = role_table(graph)
+        repo = None
+        for job, name in jobs:
+            if name != repo:
+                if repo is not None:
+                    table.end_repo()
+                table.start_repo(name)
+                repo = name
+            for login, flags in self.db.execute("SELECT login, flags FROM roles WHERE job = ?", (job,)):
+                for r in ROLES:
+                    if flags & BITS[r]:
+                        set_role(graph, login, r)
+            for u, v, timestamp, interaction, r in self.db.execute(
+                    "SELECT source, target, timestamp, interaction, repo FROM edges WHERE job = ?", (job,)):
+                graph.add_edge(str(u), str(v), timestamp=str(timestamp), interaction=str(interaction), repo=str(r))
+        if repo is not None:
+            table.end_repo()
+        export_roles(graph)
+        return graph
+
+
+class Heartbeat(threading.Thread):
+    # Renews the lease of a job every third of the lease, with its own connection to the queue,
+    # until the job is finished or the lease is lost
+
+    def __init__(self, path, job, worker, lease=LEASE):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.path = path
+        self.job = job
+        self.worker = worker
+        self.lease = lease
+        self.stopped = threading.Event()
+
+    def run(self):
+        queue = JobQueue(self.path, self.lease)
+        while not self.stopped.wait(self.lease / 3.0):
+            if not queue.renew(self.job, self.worker):
+                print "The lease of the job has been lost"
+                return
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def weighted(graph):
+    # The multiple edges of the interactions as weighted edges, as in the mining scripts
+    graph2 = nx.DiGraph()
+    for j, d in graph.nodes_iter(data=True):
+        graph2.add_node(j, **dict((r, d[r]) for r in ROLES if r in d))
+    for u, v in graph.edges_iter():
+        if graph2.has_edge(u, v):
+            graph2[u][v]["weight"] += 1
+        else:
+            graph2.add_edge(u, v, weight=1)
+    return graph2
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,377 @@
+# -*- coding: utf-8 -*-
+#
+# Social analysis of GitHub: positions of the nodes computed before saving the network
+#
+# Author: Massimo Menichinelli
+# Homepage: http://www.openp2pdesign.org
+# License: GPL v.3
+#
+# Requisite:
+# install NetworkX with pip install networkx
+# install NumPy with pip install numpy
+#
+# Gephi can take hours to run ForceAtlas2 on a network of millions of users.
+# With --layout the scripts compute the positions of the nodes before saving
+# the network, and write them in the .gexf file as viz:position, so Gephi opens
+# it already laid out. The forces are the ones of ForceAtlas2: every node
+# repels every other one in proportion to their degrees (plus one) and inverse
+# to their distance, the edges attract their nodes in proportion to their
+# weight and distance, and a gravity keeps the components together.
+#
+# The repulsion is a Barnes-Hut approximation computed with arrays instead of
+# a tree: the plane is divided in a grid of 4, 16, 64... cells, and a node is
+# repelled by the total degree of the cells at the centre of mass of their
+# nodes, at every level by the cells that are not next to its own cell but are
+# inside the cells next to its parent cell (so every distant region is counted
+# once, at the coarsest level where it is far enough). At the finest level,
+# where a cell has a couple of nodes, also the cells next to it are counted.
+# With --processes=N the repulsion of blocks of nodes is computed by N
+# processes, which read the positions and the cells from shared memory.
+#
+# With --coarsen the network is first reduced, many times, by merging every
+# user that has a single neighbour with it and every two neighbours that choose
+# each other; the smallest network is laid out with all the iterations, and
+# every larger one starts from the positions of the smaller one and needs only
+# a few (REFINE), so the time grows almost linearly with the size of the
+# network. --layout=N sets the number of iterations (300 by default).
+#
+# A network saved before can be laid out with:
+#
+#   python layout.py --graph=FILE.gexf [--coarsen] [--processes=N]
+#
+
+import multiprocessing
+from array import array
+import sys
+import time
+from multiprocessing.sharedctypes import RawArray
+
+import networkx as nx
+import numpy as np
+
+from options import get_flags
+
+ITERATIONS = 300
+REFINE = 50
+COARSEST = 1000
+# The rounds of choices of the neighbours to merge at every coarsening
+MATCHING = 3
+REPULSION = 2.0
+GRAVITY = 1.0
+# The mean number of nodes in a cell of the finest level
+LEAF = 2
+SEED = 0
+
+# The arrays shared with the processes of the pool
+shared = {}
+
+
+def degrees(n, sources, targets, weights=None):
+    return np.bincount(sources, weights, minlength=n) + np.bincount(targets, weights, minlength=n)
+
+
+def grid_levels(n):
+    # The number of cells on a side of the grid of every level, from 4 x 4 to about n / LEAF cells
+    levels = [4]
+    while levels[-1] * levels[-1] * LEAF < n:
+        levels.append(levels[-1] * 2)
+    return levels
+
+
+def cells_size(n):
+    return sum(3 * (g + 6) * (g + 6) for g in grid_levels(n))
+
+
+def offsets(px, py, finest):
+    # The cells that repel a node whose cell is at (px, py) in its parent cell: the children of
+    # the cells next to the parent that are not next to the node's cell (and these too at the finest level)
+    found = [(dx, dy) for dx in range(-2 - px, 4 - px) for dy in range(-2 - py, 4 - py) if max(abs(dx), abs(dy)) > 1]
+    if finest:
+        found += [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)]
+    return found
+
+
+def cell_of(x, x0, side, g):
+    return np.clip(((x - x0) / side * g).astype(np.int64), 0, g - 1)
+
+
+def aggregate(x, y, m, cells):
+    # The total mass of the nodes of every cell of every level, and their moments (mass * position),
+    # in grids with a border of 3 empty cells; the grid is returned to find the cells again
+    x0, y0 = x.min(), y.min()
+    side = max(x.max() - x0, y.max() - y0) * (1 + 1e-9) + 1e-9
+    levels = []
+    offset = 0
+    for g in grid_levels(len(x)):
+        p = g + 6
+        index = (cell_of(x, x0, side, g) + 3) * p + cell_of(y, y0, side, g) + 3
+        for k, values in enumerate((m, m * x, m * y)):
+            cells[offset + k * p * p:offset + (k + 1) * p * p] = np.bincount(index, values, minlength=p * p)
+        levels.append((g, offset))
+        offset += 3 * p * p
+    return x0, y0, side, levels
+
+
+def repulsion(x, y, m, cells, grid, kr=REPULSION):
+    # The repulsion on some nodes from the cells of every level
+    x0, y0, side, levels = grid
+    fx = np.zeros(len(x))
+    fy = np.zeros(len(x))
+    # The softening of the distances, for nodes in the same place
+    eps = (0.01 * side / levels[-1][0]) ** 2
+    for k, (g, offset) in enumerate(levels):
+        p = g + 6
+        mass = cells[offset:offset + p * p]
+        sx = cells[offset + p * p:offset + 2 * p * p]
+        sy = cells[offset + 2 * p * p:offset + 3 * p * p]
+        # The centres of mass (0 for the empty cells, which do not repel anyway)
+        empty = mass == 0
+        cx = sx / np.where(empty, 1.0, mass)
+        cy = sy / np.where(empty, 1.0, mass)
+        ix = cell_of(x, x0, side, g)
+        iy = cell_of(y, y0, side, g)
+        for px in (0, 1):
+            for py in (0, 1):
+                nodes = np.nonzero(((ix & 1) == px) & ((iy & 1) == py))[0]
+                if len(nodes) == 0:
+                    continue
+                nx_, ny_, nm = x[nodes], y[nodes], m[nodes]
+                cell = (ix[nodes] + 3) * p + iy[nodes] + 3
+                gx = np.zeros(len(nodes))
+                gy = np.zeros(len(nodes))
+                for dx, dy in offsets(px, py, k == len(levels) - 1):
+                    c = cell + (dx * p + dy)
+                    if dx == 0 and dy == 0:
+                        # A node does not repel itself
+                        M = mass.take(c) - nm
+                        ux = (nx_ * M - (sx.take(c) - nm * nx_)) / np.where(M > 0, M, 1.0)
+                        uy = (ny_ * M - (sy.take(c) - nm * ny_)) / np.where(M > 0, M, 1.0)
+                    else:
+                        M = mass.take(c)
+                        ux = nx_ - cx.take(c)
+                        uy = ny_ - cy.take(c)
+                    f = M / (ux * ux + uy * uy + eps)
+                    gx += f * ux
+                    gy += f * uy
+                fx[nodes] += kr * nm * gx
+                fy[nodes] += kr * nm * gy
+    return fx, fy
+
+
+def share(pool_arrays):
+    # Called in every process of the pool: the shared arrays as NumPy arrays
+    for name, values in pool_arrays.items():
+        shared[name] = np.frombuffer(values, dtype=float)
+
+
+def repulsion_block(task):
+    # The repulsion of a block of nodes, from the shared positions and cells
+    start, end, n, grid = task
+    fx, fy = repulsion(shared["x"][start:end], shared["y"][start:end], shared["m"][start:end], shared["cells"], grid)
+    return start, fx, fy
+
+
+class Layout(object):
+    # The force-directed layout of a network, in one process or with a pool of them
+
+    def __init__(self, n, processes=1):
+        self.pool = None
+        self.processes = processes
+        if processes > 1:
+            arrays = {"x": RawArray("d", n), "y": RawArray("d", n), "m": RawArray("d", n),
+                      "cells": RawArray("d", cells_size(n))}
+            share(arrays)
+            self.pool = multiprocessing.Pool(processes, share, (arrays,))
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+
+    def repulsion(self, x, y, m):
+        n = len(x)
+        if self.pool is None:
+            cells = np.zeros(cells_size(n))
+            return repulsion(x, y, m, cells, aggregate(x, y, m, cells))
+        shared["x"][:n] = x
+        shared["y"][:n] = y
+        shared["m"][:n] = m
+        grid = aggregate(x, y, m, shared["cells"])
+        fx = np.zeros(n)
+        fy = np.zeros(n)
+        block = n // (4 * self.processes) + 1
+        for start, bx, by in self.pool.map(repulsion_block, [(s, min(s + block, n), n, grid) for s in range(0, n, block)]):
+            fx[start:start + len(bx)] = bx
+            fy[start:start + len(by)] = by
+        return fx, fy
+
+    def run(self, x, y, m, sources, targets, weights, iterations, temperature):
+        # Move the nodes along their forces, at most temperature at a time, cooling down to 1% of it
+        n = len(x)
+        for k in range(iterations):
+            fx, fy = self.repulsion(x, y, m)
+            # The edges pull their nodes together
+            dx = (x[targets] - x[sources]) * weights
+            dy = (y[targets] - y[sources]) * weights
+            fx += np.bincount(sources, dx, minlength=n) - np.bincount(targets, dx, minlength=n)
+            fy += np.bincount(sources, dy, minlength=n) - np.bincount(targets, dy, minlength=n)
+            # The gravity to the centre
+            r = np.sqrt(x * x + y * y) + 1e-9
+            fx -= GRAVITY * m * x / r
+            fy -= GRAVITY * m * y / r
+            # The heavier nodes move slower, as in ForceAtlas2
+            fx /= m
+            fy /= m
+            step = temperature * 0.01 ** (float(k) / max(iterations - 1, 1))
+            scale = np.minimum(1.0, step / (np.sqrt(fx * fx + fy * fy) + 1e-300))
+            x += fx * scale
+            y += fy * scale
+        return x, y
+
+
+def coarsen(n, sources, targets, weights, m):
+    # The group of every node in a smaller network: the users with a single neighbour
+    # go with it, and two neighbours that choose each other (the lightest one) are merged
+    u = np.concatenate([sources, targets])
+    v = np.concatenate([targets, sources])
+    pairs = np.unique(u * n + v)
+    u, v = pairs // n, pairs % n
+    neighbours = np.bincount(u, minlength=n)
+    group = np.arange(n)
+
+    # The nodes that are not leaves choose their lightest neighbour that is not a leaf and not merged yet,
+    # for a few rounds: the pairs that choose each other are merged
+    matched = neighbours <= 1
+    for k in range(MATCHING):
+        free = ~matched[u] & ~matched[v]
+        cu, cv = u[free], v[free]
+        if len(cu) == 0:
+            break
+        order = np.lexsort((-cv, -m[cv], cu))
+        cu, cv = cu[order], cv[order]
+        last = np.r_[cu[1:] != cu[:-1], True]
+        choice = np.full(n, -1, dtype=np.int64)
+        choice[cu[last]] = cv[last]
+        chosen = cu[last]
+        mutual = chosen[(choice[choice[chosen]] == chosen) & (chosen < choice[chosen])]
+        group[choice[mutual]] = mutual
+        matched[mutual] = True
+        matched[choice[mutual]] = True
+
+    # The leaves, with the group of their neighbour (two leaves together go with the first one)
+    leaves = (neighbours[u] == 1) & ((neighbours[v] > 1) | (v < u))
+    group[u[leaves]] = group[v[leaves]]
+
+    roots, group = np.unique(group, return_inverse=True)
+    cs, ct = group[sources], group[targets]
+    keep = cs != ct
+    nc = len(roots)
+    keys, edges = np.unique(cs[keep] * nc + ct[keep], return_inverse=True)
+    return nc, group, keys // nc, keys % nc, np.bincount(edges, weights[keep]), np.bincount(group, m)
+
+
+def compute_layout(n, sources, targets, weights, iterations=ITERATIONS, coarse=False, processes=1):
+    # The positions of n nodes, from their edges (arrays of positions and weights)
+    if n == 0:
+        return np.zeros(0), np.zeros(0)
+    keep = sources != targets
+    sources = np.asarray(sources, dtype=np.int64)[keep]
+    targets = np.asarray(targets, dtype=np.int64)[keep]
+    weights = np.asarray(weights, dtype=float)[keep]
+    m = degrees(n, sources, targets) + 1.0
+    levels = [(n, None, sources, targets, weights, m)]
+    while coarse and levels[-1][0] > COARSEST:
+        c = coarsen(levels[-1][0], *levels[-1][2:])
+        if c[0] > 0.9 * levels[-1][0]:
+            break
+        levels.append(c)
+        print "Coarsened to",c[0],"nodes and",len(c[2]),"edges"
+
+    random = np.random.RandomState(SEED)
+    size, group, s, t, w, mass = levels[-1]
+    side = 3.0 * np.sqrt(size)
+    x = (random.rand(size) - 0.5) * side
+    y = (random.rand(size) - 0.5) * side
+    layout = Layout(n, processes)
+    try:
+        start = time.time()
+        x, y = layout.run(x, y, mass, s, t, w, iterations, side / 10)
+        print "Laid out",size,"nodes in %.1f seconds" % (time.time() - start)
+        for k in range(len(levels) - 2, -1, -1):
+            # The nodes start from the position of their group, a little apart
+            group = levels[k + 1][1]
+            size, ignore, s, t, w, mass = levels[k]
+            x = x[group] + (random.rand(size) - 0.5)
+            y = y[group] + (random.rand(size) - 0.5)
+            start = time.time()
+            x, y = layout.run(x, y, mass, s, t, w, REFINE, 3.0)
+            print "Laid out",size,"nodes in %.1f seconds" % (time.time() - start)
+    finally:
+        layout.close()
+    return x, y
+
+
+def graph_layout(graph, iterations=ITERATIONS, coarse=False, processes=1):
+    # Write the positions of the nodes of a NetworkX graph as viz attributes, for the .gexf file
+    nodes = graph.nodes()
+    index = dict((v, i) for i, v in enumerate(nodes))
+    edges = [(index[u], index[v], float(d.get("weight", 1))) for u, v, d in graph.edges_iter(data=True)]
+    sources = np.array([e[0] for e in edges], dtype=np.int64)
+    targets = np.array([e[1] for e in edges], dtype=np.int64)
+    weights = np.array([e[2] for e in edges], dtype=float)
+    x, y = compute_layout(len(nodes), sources, targets, weights, iterations, coarse, processes)
+    for i, v in enumerate(nodes):
+        graph.node[v]["viz"] = {"position": {"x": float(x[i]), "y": float(y[i]), "z": 0.0}}
+
+
+def state_layout(state, iterations=ITERATIONS, coarse=False, processes=1, keep=None):
+    # The positions of the nodes of a compact crawl (see crawlstate), in the order of their ids,
+    # without the edges of the users that are not kept (see reduction)
+    sources = array("i")
+    targets = array("i")
+    for s, t in state.edges.edges():
+        if keep is not None and not (keep[s] and keep[t]):
+            continue
+        sources.append(s)
+        targets.append(t)
+    return compute_layout(len(state.users), np.frombuffer(sources, dtype=np.int32).astype(np.int64),
+                          np.frombuffer(targets, dtype=np.int32).astype(np.int64), np.ones(len(sources)),
+                          iterations, coarse, processes)
+
+
+def layout_options(flags):
+    # The iterations, coarsening and processes of --layout[=N] --coarsen --processes=N, or None without --layout
+    if "layout" not in flags:
+        return None
+    iterations = ITERATIONS if flags["layout"] is True else int(flags["layout"])
+    return {"iterations": iterations, "coarse": "coarsen" in flags, "processes": int(flags.get("processes", 1))}
+
+
+def layout_from_flags(flags, graph=None, state=None, keep=None):
+    # Lay out the network of a script with --layout: the graph gets viz attributes,
+    # for a compact crawl the positions are returned for its write_gexf
+    options = layout_options(flags)
+    if options is None:
+        return None
+    print "Computing the layout..."
+    start = time.time()
+    if state is not None:
+        positions = state_layout(state, keep=keep, **options)
+    else:
+        positions = graph_layout(graph, **options)
+    print "Done in %.1f seconds" % (time.time() - start)
+    return positions
+
+
+if __name__ == "__main__":
+    flags = get_flags()
+    if "layout" not in flags:
+        flags["layout"] = True
+    path = flags["graph"] if "graph" in flags else raw_input("Enter the .gexf file of the network: ")
+    print "Loading",path,"..."
+    graph = nx.read_gexf(path)
+    print graph.number_of_nodes(),"nodes,",graph.number_of_edges(),"edges"
+    layout_from_flags(flags, graph)
+    out = flags.get("out", path[:-len(".gexf")]+"_layout.gexf" if path.endswith(".gexf") else path+"_layout.gexf")
+    nx.write_gexf(graph, out)
+    print "Saved as",out
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+#
+# PageRank and degrees of the users of a network mined from GitHub
+#
+# Author: Massimo Menichinelli
+# Homepage: http://www.openp2pdesign.org
+# License: GPL v.3
+#
+# Requisite:
+# install NetworkX with pip install networkx
+# install SciPy with pip install scipy
+#
+# The metrics of a network saved by the other scripts (--graph=FILE.gexf) are
+# saved in FILE_metrics.npz (or --out=FILE), with its edges. When the network
+# has been mined before, the metrics of the previous network (--metrics=FILE)
+# are updated with the edges that have changed instead of being computed from
+# the start (see centrality). The changed edges can also be given without the
+# new network (--delta=FILE): a line for every edge, with its source, target
+# and new weight separated by tabs (0 when the edge has been removed).
+#
+# --threshold=0.1 is the fraction of changed edges above which the metrics are
+# computed from the start, --alpha=0.85 the damping of the PageRank.
+#
+
+import networkx as nx
+import sys
+import time
+
+from options import get_flags
+from centrality import ALPHA, THRESHOLD, compute_metrics, update_metrics, load_metrics, weighted_edges, edge_delta
+
+
+def metrics_path(path):
+    return path[:-len(".gexf")]+"_metrics.npz" if path.endswith(".gexf") else path+"_metrics.npz"
+
+
+def read_delta(path):
+    delta = {}
+    for line in open(path):
+        if line.strip() == "":
+            continue
+        source, target, weight = line.rstrip("\n").split("\t")
+        delta[(source, target)] = float(weight)
+    return delta
+
+
+if __name__ == "__main__":
+    flags = get_flags()
+    alpha = float(flags.get("alpha", ALPHA))
+    threshold = float(flags.get("threshold", THRESHOLD))
+    print "PageRank and degrees of a GitHub network"
+    print ""
+    old = None
+    if "metrics" in flags:
+        print "Loading",flags["metrics"],"..."
+        old = load_metrics(flags["metrics"])
+
+    if "delta" in flags:
+        if old is None:
+            sys.exit("The metrics of the previous network are needed with --delta: --metrics=FILE")
+        delta = read_delta(flags["delta"])
+        start = time.time()
+        metrics = update_metrics(old, delta, None, threshold, alpha)
+        out = flags.get("out", flags["metrics"])
+    else:
+        path = flags["graph"] if "graph" in flags else raw_input("Enter the .gexf file of the network: ")
+        print "Loading",path,"..."
+        graph = nx.read_gexf(path)
+        edges = weighted_edges(graph)
+        print graph.number_of_nodes(),"nodes,",len(edges),"edges"
+        start = time.time()
+        if old is not None:
+            metrics = update_metrics(old, edge_delta(old, edges), graph.nodes(), threshold, alpha)
+        else:
+            metrics = compute_metrics(graph.nodes(), edges, alpha)
+        out = flags.get("out", metrics_path(path))
+    print "PageRank in",metrics.iterations,"iterations,",
+    print "%s in %.2f seconds" % ("updated" if metrics.incremental else "computed", time.time() - start)
+
+    print ""
+    print "TOP USERS BY PAGERANK"
+    for login, rank in metrics.top("pagerank"):
+        print "-",login,":",rank
+    metrics.save(out)
+    print "Done. Saved as "+out
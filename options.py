@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+#
+# Social analysis of GitHub: command line options shared by the scripts
+#
+# Author: Massimo Menichinelli
+# Homepage: http://www.openp2pdesign.org
+# License: GPL v.3
+#
+# The scripts still ask for everything they need interactively,
+# the options only change how the mining is done, for example:
+#
+#   python single_repository_social_mining_weighted.py --skip=stargazers,commits
+#
+
+import sys
+
+
+def get_flags(argv=None):
+    # Read "--name=value" and "--name" options into a dictionary,
+    # a flag without a value is stored as True
+    if argv is None:
+        argv = sys.argv[1:]
+    flags = {}
+    for arg in argv:
+        if not arg.startswith("--"):
+            sys.exit("Unknown argument: "+arg)
+        if "=" in arg:
+            name, value = arg[2:].split("=", 1)
+            flags[name] = value
+        else:
+            flags[arg[2:]] = True
+    return flags
+
+
+def get_list(flags, name):
+    # Comma separated values of an option, or None when it is not given
+    if name not in flags or flags[name] is True:
+        return None
+    return [i.strip() for i in flags[name].split(",") if i.strip() != ""]
+
+
+if __name__ == "__main__":
+    print get_flags()
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+#
+# Social analysis of GitHub: the unique audience of Organizations, from the sketches in the store
+#
+# Author: Massimo Menichinelli
+# Homepage: http://www.openp2pdesign.org
+# License: GPL v.3
+#
+# The repositories mined with --store=FILE have a sketch of the users of every
+# role (see audience). Their unique watchers, contributors, collaborators and
+# owners in every Organization (--orgs=org1,org2,...) or in some repositories
+# (--repos=owner/repo,...) are estimated by merging the sketches, without
+# reading the lists again and without the logins in memory; with more than one
+# Organization, also the users in common to every two of them and in all of
+# them. --roles=watcher,contributor selects some roles.
+#
+#   python organization_audience.py --store=FILE --orgs=org1,org2
+#
+
+import sys
+
+from options import get_flags, get_list
+from graphdb import store_from_flags
+from roles import ROLES
+from audience import union, overlap
+
+
+def audiences(rows, key, roles):
+    # The sketches of the rows merged by key (the owner or the repository) and role, and for all the roles
+    found = {}
+    for repo, role, sketch in rows:
+        if role in roles:
+            found.setdefault(key(repo), {}).setdefault(role, []).append(sketch)
+    merged = {}
+    for k, sketches in found.items():
+        merged[k] = dict((role, union(s)) for role, s in sketches.items())
+        merged[k]["any"] = union(merged[k].values())
+    return merged
+
+
+def print_audience(name, audience, repos, roles):
+    print "-----"
+    print name,"(%d repositories)" % repos
+    for role in roles + ["any"]:
+        if role in audience:
+            print "-",role,":",audience[role].count()
+
+
+if __name__ == "__main__":
+    flags = get_flags()
+    store = store_from_flags(flags)
+    if store is None:
+        sys.exit("The store is needed: --store=FILE")
+    roles = get_list(flags, "roles") or ROLES
+    for r in roles:
+        if r not in ROLES:
+            sys.exit("Unknown role: "+r+" (available: "+", ".join(ROLES)+")")
+    repos = get_list(flags, "repos")
+    orgs = get_list(flags, "orgs")
+    if repos is None and orgs is None:
+        orgs = get_list({"orgs": raw_input("Enter the Organizations, separated by commas: ")}, "orgs")
+    print "Unique audience of GitHub Organizations (estimated)"
+    print ""
+
+    rows = store.sketches(repos, orgs)
+    if len(rows) == 0:
+        sys.exit("No sketches in the store for these repositories: mine them with --store first")
+    if repos is not None:
+        key = lambda repo: repo
+    else:
+        key = lambda repo: repo.split("/")[0]
+    merged = audiences(rows, key, roles)
+    for k in sorted(merged):
+        print_audience(k, merged[k], len(set(r for r, role, s in rows if key(r) == k)), roles)
+
+    names = sorted(merged)
+    if len(names) > 1:
+        print ""
+        print "USERS IN COMMON"
+        for i, a in enumerate(names):
+            for b in names[i+1:]:
+                print "-----"
+                print a,"and",b
+                for role in roles + ["any"]:
+                    if role in merged[a] and role in merged[b]:
+                        common, jaccard = overlap(merged[a][role], merged[b][role])
+                        print "-",role,":",common,"(Jaccard %.3f)" % jaccard
+        print ""
+        print "ALL TOGETHER"
+        for role in roles + ["any"]:
+            sketches = [merged[k][role] for k in names if role in merged[k]]
+            if len(sketches) > 0:
+                print "-",role,":",union(sketches).count()
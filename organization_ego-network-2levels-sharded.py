@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+#
+# Ego-network analysis of followers in a GitHub organization, Degree 2
+# Sharded version: the crawl is split among several processes, each one with its own token
+#
+# Author: Massimo Menichinelli
+# Homepage: http://www.openp2pdesign.org
+# License: GPL v.3
+#
+# Requisite:
+# install pyGithub with pip install PyGithub
+# install NetworkX with pip install networkx
+#
+# PyGitHub documentation can be found here:
+# https://github.com/jacquev6/PyGithub
+#
+# Options:
+# --tokens=file     a file with an API token per line, split among the processes
+# --shards=N        the number of processes (default: one per token)
+# --mode=members    split the members among the processes (default)
+# --mode=frontier   every member is listed once, by its process, then the first-level users
+#                   are split among the processes, every one is expanded once
+# --compact         build the final network in compact arrays instead of a NetworkX graph
+# --layout[=N]      compute the positions of the nodes before saving the network (see layout)
+# --communities     the community of every user, as its "community" attribute (see communities)
+#
+
+import networkx as nx
+import multiprocessing
+import getpass
+import os
+import sys
+
+# Clear screen
+os.system('cls' if os.name=='nt' else 'clear')
+
+from options import get_flags
+from sharding import MODES, credentials_of, crawl_shard, expand_frontier, frontier_file, merge_shards, load_graph, load_state
+from credentials import CredentialPool, read_tokens
+from graphdb import store_from_flags, store_graph
+from layout import layout_from_flags
+from communities import communities_from_flags
+from reduction import reduce_from_flags
+
+
+if __name__ == "__main__":
+    flags = get_flags()
+    mode = flags.get("mode", "members")
+    if mode not in MODES:
+        sys.exit("Unknown mode: "+mode+" (available: "+", ".join(MODES)+")")
+    store = store_from_flags(flags)
+
+    print "Organization Ego-network analysis, sharded"
+    print ""
+    if "tokens" in flags:
+        credentials = read_tokens(flags["tokens"])
+    else:
+        userlogin = raw_input("Login: Enter your username: ")
+        password = getpass.getpass("Login: Enter yor password: ")
+        credentials = [(userlogin, password)]
+    if flags.get("shards") is True:
+        sys.exit("The number of shards is needed: --shards=N")
+    shards = int(flags.get("shards", len(credentials)))
+    if shards < 1:
+        sys.exit("At least a shard is needed: --shards=N")
+    username = raw_input("Enter the username you want to analyse: ")
+    print ""
+    g = CredentialPool(credentials)
+
+    print "ORGANIZATIONS:"
+    for i in g.get_user(username).get_orgs():
+        print "-", i.login
+    print ""
+
+    org_to_mine = raw_input("Enter the name of the Organization you want to analyse: ")
+    print ""
+    org = g.get_organization(org_to_mine)
+
+    members = []
+    for i in org.get_members():
+        print "Member:",i.login
+        members.append(i.login)
+
+    prefix = username+"_"+org_to_mine+"_ego-network_2_levels"
+    jobs = [(k, shards, credentials_of(k, shards, credentials), members, mode, prefix) for k in range(shards)]
+    print ""
+    print "Crawling with",shards,"processes and",len(credentials),"credentials..."
+    pool = multiprocessing.Pool(shards)
+    paths = pool.map(crawl_shard, jobs)
+    if mode == "frontier":
+        # Every member has been listed once, by its shard: now every shard expands its part of the frontier
+        print ""
+        print "Expanding the users around the members..."
+        paths = pool.map(expand_frontier, jobs)
+        for k in range(shards):
+            os.remove(frontier_file(prefix, k))
+    pool.close()
+
+    print ""
+    print "Merging the edges of the shards..."
+    edges = merge_shards(paths, prefix+".edges")
+    print edges,"edges."
+
+    print "Saving the network..."
+    if "compact" in flags:
+        state = load_state(prefix+".edges", members)
+        store_graph(store, prefix, state=state)
+        keep = reduce_from_flags(flags, state=state)
+        state.write_gexf(prefix+".gexf", layout_from_flags(flags, state=state, keep=keep),
+                         communities_from_flags(flags, state=state, keep=keep), keep)
+        state.edges.close()
+    else:
+        graph = load_graph(prefix+".edges", members)
+        store_graph(store, prefix, graph)
+        reduce_from_flags(flags, graph)
+        communities_from_flags(flags, graph)
+        layout_from_flags(flags, graph)
+        nx.write_gexf(graph,prefix+".gexf")
+    print "Done."
@@ -14,22 +14,39 @@
 # PyGitHub documentation can be found here: 
 # https://github.com/jacquev6/PyGithub
 #
+# Options:
+# --compact     keep the crawl in compact arrays spilled to disk instead of a NetworkX graph,
+#               for neighbourhoods of millions of users
+# --bloom=N     with --compact, remember the users already expanded in a Bloom filter
+#               sized for N users (1% of them may be skipped) instead of an exact set
+# --layout[=N]  compute the positions of the nodes before saving the network (see layout),
+#               with --coarsen and --processes=N
+# --communities the community of every user, as its "community" attribute (see communities)
+#
 
-from github import Github
 import networkx as nx
-import getpass
 import os
 
 # Clear screen
 os.system('cls' if os.name=='nt' else 'clear')
 
+from options import get_flags
+from credentials import login
+from refresh import save_refresh
+from crawlstate import CrawlState
+from reciprocity import add_neighbourhood, neighbours
+from graphdb import store_from_flags, store_graph
+from layout import layout_from_flags
+from communities import communities_from_flags
+from reduction import reduce_from_flags
+
+flags = get_flags()
 print "Organization Ego-network analysis"
 print ""
-userlogin = raw_input("Login: Enter your username: ")
-password = getpass.getpass("Login: Enter yor password: ")
+g = login(flags)
+store = store_from_flags(flags)
 username = raw_input("Enter the username you want to analyse: ")
 print ""
-g = Github( userlogin, password )
 
 print "ORGANIZATIONS:"
 for i in g.get_user(username).get_orgs():
@@ -40,55 +57,78 @@ org_to_mine = raw_input("Enter the name of the Organization you want to analyse:
 print ""
 org = g.get_organization(org_to_mine)
 
-graph = nx.DiGraph()
+if "compact" in flags:
+    state = CrawlState(capacity=int(flags["bloom"]) if "bloom" in flags else None)
+else:
+    state = None
+    graph = nx.DiGraph()
+
+def add_user(login, member="No"):
+    if state is not None:
+        state.add_node(login, member == "Yes")
+    else:
+        graph.add_node(login,label=login,member=member)
+
+def expand(login):
+    # Add the followers and following of a user, and return them
+    print " And his/her followers:"
+    followers = []
+    for i in g.followers(login):
+        print " --", i.login
+        add_user(i.login)
+        followers.append(i.login)
+    print " And the users she/he's following:"
+    following = []
+    for i in g.following(login):
+        print " --", i.login
+        add_user(i.login)
+        following.append(i.login)
+    if state is not None:
+        for i in followers:
+            state.add_edge(i, login)
+        for i in following:
+            state.add_edge(login, i)
+        state.mark_listed(login)
+    else:
+        add_neighbourhood(graph, login, followers, following)
+    return neighbours(followers, following)
+
+def should_expand(login):
+    # The compact crawl expands every user once, even when it follows or is followed by several members
+    return state is None or state.should_expand(login)
 
 for i in org.get_members():
     print "Member:",i.login
-    graph.add_node(i.login,label=i.login,member="Yes")
+    add_user(i.login,member="Yes")
 
 
 for j in org.get_members():
     print ""
     print "-----"
-    print "Looking for the followers of", j.login,"..."
-    for f in g.get_user(j.login).get_followers():
-        print " -", f.login
-        graph.add_node(f.login,label=f.login, member="No")
-        graph.add_edge(f.login,j.login)
-        print " And his/her followers:"
-        for i in f.get_followers():
-            print " --", i.login
-            graph.add_node(i.login,label=i.login, member="No")
-            graph.add_edge(i.login,f.login)
-        print " And the users she/he's following:"
-        for i in f.get_following():
-            print " --", i.login
-            graph.add_node(i.login,label=i.login, member="No")
-            graph.add_edge(f.login,i.login)
-                 
-    print "-----"
-    
-    print "Looking for the users that",j.login,"is following ..."
-    for f in g.get_user(j.login).get_following():
-        print " -", f.login
-        graph.add_node(f.login,label=f.login,member="No")
-        graph.add_edge(j.login,f.login)
-        print " And his/her followers:"
-        for i in f.get_followers():
-            print " --", i.login
-            graph.add_node(i.login,label=i.login,member="No")
-            graph.add_edge(i.login,f.login)
-        print " And the users she/he's following:"
-        for i in f.get_following():
-            print " --", i.login
-            graph.add_node(i.login,label=i.login,member="No")
-            graph.add_edge(f.login,i.login)
-               
-    print "-----"
+    print "Looking for the followers and following of", j.login,"..."
+    for f in expand(j.login):
+        if not should_expand(f):
+            continue
+        print " -", f
+        expand(f)
 
-for i in org.get_members():
-    graph.node[i.login]["member"]="Yes"
+    print "-----"
 
+# The profiles and the lists of the users, for the next --refresh
+save_refresh(g)
 print "Saving the network..."
-nx.write_gexf(graph,username+"_"+org_to_mine+"_ego-network_2_levels.gexf")
-print "Done."
\ No newline at end of file
+if state is not None:
+    store_graph(store, username+"_"+org_to_mine+"_ego-network_2_levels", state=state)
+    keep = reduce_from_flags(flags, state=state)
+    state.write_gexf(username+"_"+org_to_mine+"_ego-network_2_levels.gexf", layout_from_flags(flags, state=state, keep=keep),
+                     communities_from_flags(flags, state=state, keep=keep), keep)
+    state.edges.close()
+else:
+    for i in org.get_members():
+        graph.node[i.login]["member"]="Yes"
+    store_graph(store, username+"_"+org_to_mine+"_ego-network_2_levels", graph)
+    reduce_from_flags(flags, graph)
+    communities_from_flags(flags, graph)
+    layout_from_flags(flags, graph)
+    nx.write_gexf(graph,username+"_"+org_to_mine+"_ego-network_2_levels.gexf")
+print "Done."
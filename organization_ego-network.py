@@ -15,21 +15,28 @@
 # https://github.com/jacquev6/PyGithub
 #
 
-from github import Github
 import networkx as nx
-import getpass
 import os
 
 # Clear screen
 os.system('cls' if os.name=='nt' else 'clear')
 
+from options import get_flags
+from credentials import login
+from refresh import save_refresh
+from reciprocity import add_neighbourhood
+from graphdb import store_from_flags, store_graph
+from layout import layout_from_flags
+from communities import communities_from_flags
+from reduction import reduce_from_flags
+
 print "Organization Ego-network analysis"
 print ""
-userlogin = raw_input("Login: Enter your username: ")
-password = getpass.getpass("Login: Enter yor password: ")
+flags = get_flags()
+g = login(flags)
+store = store_from_flags(flags)
 username = raw_input("Enter the username you want to analyse: ")
 print ""
-g = Github( userlogin, password )
 
 print "ORGANIZATIONS:"
 for i in g.get_user(username).get_orgs():
@@ -51,24 +58,35 @@ for j in org.get_members():
     print ""
     print "-----"
     print "Looking for the followers of", j.login,"..."
-    for f in g.get_user(j.login).get_followers():
+    followers = []
+    for f in g.followers(j.login):
         print " -", f.login
-        graph.add_node(f.login,label=f.login, member="No")
-        graph.add_edge(f.login,j.login)
-                 
+        if f.login not in graph:
+            graph.add_node(f.login,label=f.login, member="No")
+        followers.append(f.login)
+
     print "-----"
-    
+
     print "Looking for the users that",j.login,"is following ..."
-    for f in g.get_user(j.login).get_following():
+    following = []
+    for f in g.following(j.login):
         print " -", f.login
-        graph.add_node(f.login,label=f.login,member="No")
-        graph.add_edge(j.login,f.login)
+        if f.login not in graph:
+            graph.add_node(f.login,label=f.login,member="No")
+        following.append(f.login)
+    add_neighbourhood(graph, j.login, followers, following)
 
     print "-----"
 
 for i in org.get_members():
     graph.node[i.login]["member"]="Yes"
 
+# The profiles and the lists of the users, for the next --refresh
+save_refresh(g)
 print "Saving the network..."
+store_graph(store, username+"_"+org_to_mine+"_ego-network_1_level", graph)
+reduce_from_flags(flags, graph)
+communities_from_flags(flags, graph)
+layout_from_flags(flags, graph)
 nx.write_gexf(graph,username+"_"+org_to_mine+"_ego-network_1_level.gexf")
 print "Done."
\ No newline at end of file
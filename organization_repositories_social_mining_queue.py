@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+#
+# Social analysis of the repositories of many Organizations in GitHub, with a queue of jobs
+#
+# Author: Massimo Menichinelli
+# Homepage: http://www.openp2pdesign.org
+# License: GPL v.3
+#
+# Requisite:
+# install pyGithub with pip install PyGithub
+# install NetworkX with pip install networkx
+#
+# PyGitHub documentation can be found here:
+# https://github.com/jacquev6/PyGithub
+#
+# The same queue file (--queue=FILE) is used by three kinds of processes:
+#
+#   --role=coordinator --orgs=org1,org2,...   adds a job for every repository of the Organizations
+#                                             (for every group of phases, or with --split=repo for
+#                                             every repository)
+#   --role=worker                             takes the jobs and mines them, until the queue is empty
+#                                             (any number of them, on any machine)
+#   --role=reducer [--orgs=org1,...]          saves the weighted graph of every Organization
+#
+# The workers use the options of the other mining scripts (--tokens, --only, --skip,
+# --graphql, --fast, --mirror...), --lease=SECONDS for the time they have to finish a job and
+# --attempts=N for how many times a job is tried before it fails.
+#
+
+import networkx as nx
+import sys
+import time
+import traceback
+
+from repoanalysis import analyse_repo, phases_from_flags
+from options import get_flags, get_list
+from credentials import login
+from gitmirror import mirror_from_flags
+from graphqlanalysis import analyse_repo_graphql, graphql_transport
+from statsanalysis import analyse_repo_stats
+from jobqueue import JobQueue, LEASE, ATTEMPTS, split_phases, worker_name, weighted, Heartbeat
+from roles import role_table
+from graphdb import store_from_flags, store_graph
+from layout import layout_from_flags
+from communities import communities_from_flags
+from reduction import reduce_from_flags
+
+
+def coordinator(queue, flags):
+    g = login(flags)
+    phases = phases_from_flags(flags)
+    orgs = get_list(flags, "orgs")
+    if orgs is None:
+        orgs = get_list({"orgs": raw_input("Enter the Organizations to mine, separated by commas: ")}, "orgs")
+    for org in orgs:
+        added = 0
+        for r in g.reader.pages("/orgs/"+org+"/repos"):
+            for p in split_phases(phases, flags.get("split", "phase") != "repo"):
+                added += queue.enqueue(org, r["full_name"], p)
+        print org,":",added,"jobs added"
+    print "Jobs:",queue.counts()
+
+
+def worker(queue, flags):
+    g = login(flags)
+    name = worker_name()
+    while True:
+        job = queue.claim(name)
+        if job is None:
+            counts = queue.counts()
+            if counts.get("leased", 0) == 0:
+                print "No more jobs."
+                return
+            # The jobs of the other workers come back to the queue if their leases expire
+            print counts["leased"],"jobs are being mined by other workers, waiting..."
+            time.sleep(60)
+            continue
+        job_id, org, repo, phases = job
+        print "---------"
+        print "NOW ANALYSING:", repo, "(", ", ".join(phases), ")"
+        graph = nx.MultiDiGraph()
+        # The lease is renewed while the job is mined, however long it takes
+        heartbeat = Heartbeat(queue.path, job_id, name, queue.lease)
+        heartbeat.start()
+        try:
+            b = g.get_repo(repo)
+            if "fast" in flags:
+                analyse_repo_stats(b,graph,set(phases),g)
+            elif "graphql" in flags:
+                analyse_repo_graphql(b,graph,set(phases),g,graphql_transport(g, flags))
+            else:
+                analyse_repo(b,graph,set(phases),g,mirror_from_flags(flags, b))
+        except Exception, e:
+            traceback.print_exc()
+            heartbeat.stop()
+            queue.fail(job_id, name, str(e))
+            continue
+        heartbeat.stop()
+        if queue.complete(job_id, name, graph):
+            print "Saved",graph.number_of_edges(),"edges"
+        else:
+            print "The lease of the job has expired, another worker is mining it"
+
+
+def reducer(queue, flags):
+    store = store_from_flags(flags)
+    orgs = get_list(flags, "orgs")
+    if orgs is None:
+        orgs = queue.orgs()
+    for org in orgs:
+        counts = queue.counts(org)
+        print org,":",counts
+        if counts.get("done", 0) < sum(counts.values()):
+            print "Warning: not all the jobs of",org,"are done, the graph is partial"
+        graph = queue.reduce(org)
+
+        # Getting rid of the node "None", it was used to catch the errors of users that are NoneType
+        if "None" in graph:
+            graph.remove_node('None')
+
+        graph2 = weighted(graph)
+        reduce_from_flags(flags, graph2)
+        communities_from_flags(flags, graph2)
+        layout_from_flags(flags, graph2)
+        print "Saving the network..."
+        nx.write_gexf(graph2, org+"_allrepositories_social_interactions_analysis.gexf")
+        role_table(graph).write_membership(org+"_allrepositories")
+        store_graph(store, org+"_allrepositories_social_interactions_analysis", graph)
+        print "Done. Saved as "+org+"_allrepositories_social_interactions_analysis.gexf"
+
+
+if __name__ == "__main__":
+    flags = get_flags()
+    if "queue" not in flags or flags["queue"] is True:
+        sys.exit("The queue file is needed: --queue=FILE")
+    queue = JobQueue(flags["queue"], int(flags.get("lease", LEASE)), int(flags.get("attempts", ATTEMPTS)))
+    role = flags.get("role")
+    if role == "coordinator":
+        coordinator(queue, flags)
+    elif role == "worker":
+        worker(queue, flags)
+    elif role == "reducer":
+        reducer(queue, flags)
+    else:
+        sys.exit("Unknown role: "+str(role)+" (available: coordinator, worker, reducer)")
@@ -14,15 +14,24 @@
 # https://github.com/jacquev6/PyGithub
 #
 
-from github import Github
 import networkx as nx
-import getpass
 import os
 
 # Clear screen
 os.system('cls' if os.name=='nt' else 'clear')
 
-from repoanalysis import analyse_repo
+from repoanalysis import analyse_repo, phases_from_flags
+from options import get_flags
+from credentials import login
+from gitmirror import mirror_from_flags
+from tables import write_tables, tables_format
+from graphdb import store_from_flags, store_graph
+from roles import export_roles, role_table
+from graphqlanalysis import analyse_repo_graphql, graphql_transport
+from statsanalysis import analyse_repo_stats
+from layout import layout_from_flags
+from communities import communities_from_flags
+from reduction import reduce_from_flags
 
 # Variables for the whole program
 
@@ -35,13 +44,15 @@ repos = {}
 
 
 if __name__ == "__main__":
+    flags = get_flags()
+    phases = phases_from_flags(flags)
+    tables = tables_format(flags)
+    store = store_from_flags(flags)
     print "Social Network Analisys of your GitHub Organization"
     print ""
-    userlogin = raw_input("Login: Enter your username: ")
-    password = getpass.getpass("Login: Enter yor password: ")
+    g = login(flags)
     username = raw_input("Enter the username you want to analyse: ")
     print ""
-    g = Github( userlogin, password )
     
     
     print "ORGANIZATIONS:"
@@ -67,11 +78,27 @@ if __name__ == "__main__":
         print "---------"
         print "NOW ANALYSING:", repo.name
         b = org.get_repo(repo.name)
-        analyse_repo(b,graph)
+        if "fast" in flags:
+            analyse_repo_stats(b,graph,phases,g)
+        elif "graphql" in flags:
+            analyse_repo_graphql(b,graph,phases,g,graphql_transport(g, flags))
+        else:
+            analyse_repo(b,graph,phases,g,mirror_from_flags(flags, b))
     
+    # The Yes/No attributes of the roles, for Gephi
+    export_roles(graph)
+
     # Getting rid of the node "None", it was used to catch the errors of users that are NoneType
     if "None" in graph:
 	    graph.remove_node('None')
+
+    # The nodes and the edges as columnar tables, with --tables
+    if tables is not None:
+        print "Saving the tables..."
+        print "Done. Saved as",", ".join(write_tables(graph, username+"_allrepositories", tables))
+
+    # The network in the store shared by all the scripts, with --store
+    store_graph(store, username+"_allrepositories"+"_social_interactions_analysis", graph)
     
     print ""
     print "NODES..."
@@ -88,7 +115,7 @@ if __name__ == "__main__":
     
     for j in list(graph.nodes_iter(data=True)):
         # copying all the nodes with their attributes
-         if len(j[1])>0:
+        if len(j[1])>0:
         	graph2.add_node(j[0],collaborator=j[1]["collaborator"],contributor=j[1]["contributor"],owner=j[1]["owner"],watcher=j[1]["watcher"])
         else:
         	graph2.add_node(j[0])
@@ -105,6 +132,13 @@ if __name__ == "__main__":
     print graph2.edges()
     print ""
 
+    reduce_from_flags(flags, graph2)
+    communities_from_flags(flags, graph2)
+    layout_from_flags(flags, graph2)
     print "Saving the network..."
     nx.write_gexf(graph2, username+"_allrepositories_social_interactions_analysis.gexf")
-    print "Done. Saved as "+username+"_allrepositories_social_interactions_analysis.gexf"
\ No newline at end of file
+    print "Done. Saved as "+username+"_allrepositories_social_interactions_analysis.gexf"
+
+    print "Saving the roles of the users in every repository..."
+    role_table(graph).write_membership(username+"_allrepositories")
+    print "Done. Saved as "+username+"_allrepositories_roles.mtx"
\ No newline at end of file
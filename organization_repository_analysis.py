@@ -14,14 +14,15 @@
 # https://github.com/jacquev6/PyGithub
 #
 
-from github import Github
 import networkx as nx
-import getpass
 import os
 
 # Clear screen
 os.system('cls' if os.name=='nt' else 'clear')
 
+from options import get_flags
+from credentials import login
+
 def analyse_repo(repository):
     
     print "-----"
@@ -95,11 +96,9 @@ def analyse_repo(repository):
 if __name__ == "__main__":
     print "Basic Analisys of your GitHub Organization"
     print ""
-    userlogin = raw_input("Login: Enter your username: ")
-    password = getpass.getpass("Login: Enter yor password: ")
+    g = login(get_flags())
     username = raw_input("Enter the username you want to analyse: ")
     print ""
-    g = Github( userlogin, password )
     
     
     graph = nx.DiGraph()
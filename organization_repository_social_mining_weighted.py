@@ -14,15 +14,22 @@
 # https://github.com/jacquev6/PyGithub
 #
 
-from github import Github
 import networkx as nx
-import getpass
 import os
 
 # Clear screen
 os.system('cls' if os.name=='nt' else 'clear')
 
-from repoanalysis import analyse_repo
+from repoanalysis import analyse_repo, phases_from_flags
+from options import get_flags
+from credentials import login
+from gitmirror import mirror_from_flags
+from tables import write_tables, tables_format
+from graphdb import store_from_flags, store_graph
+from roles import export_roles
+from graphqlanalysis import analyse_repo_graphql, graphql_transport
+from statsanalysis import analyse_repo_stats
+from reduction import reduce_from_flags
 
 # Variables for the whole program
 
@@ -35,13 +42,15 @@ repos = {}
 
 
 if __name__ == "__main__":
+    flags = get_flags()
+    phases = phases_from_flags(flags)
+    tables = tables_format(flags)
+    store = store_from_flags(flags)
     print "Social Network Analisys of your GitHub Organization"
     print ""
-    userlogin = raw_input("Login: Enter your username: ")
-    password = getpass.getpass("Login: Enter yor password: ")
+    g = login(flags)
     username = raw_input("Enter the username you want to analyse: ")
     print ""
-    g = Github( userlogin, password )
     
     
     print "ORGANIZATIONS:"
@@ -65,11 +74,27 @@ if __name__ == "__main__":
     
     repo_to_mine = raw_input("Enter the name of the repository you want to mine: ")
     b = org.get_repo(repo_to_mine)
-    analyse_repo(b,graph)
+    if "fast" in flags:
+        analyse_repo_stats(b,graph,phases,g)
+    elif "graphql" in flags:
+        analyse_repo_graphql(b,graph,phases,g,graphql_transport(g, flags))
+    else:
+        analyse_repo(b,graph,phases,g,mirror_from_flags(flags, b))
     
+    # The Yes/No attributes of the roles, for Gephi
+    export_roles(graph)
+
     # Getting rid of the node "None", it was used to catch the errors of users that are NoneType
     if "None" in graph:
 	    graph.remove_node('None')
+
+    # The nodes and the edges as columnar tables, with --tables
+    if tables is not None:
+        print "Saving the tables..."
+        print "Done. Saved as",", ".join(write_tables(graph, username+"_"+repo_to_mine, tables))
+
+    # The network in the store shared by all the scripts, with --store
+    store_graph(store, username+"_"+repo_to_mine+"_social_interactions_analysis", graph)
     
     print ""
     print "NODES..."
@@ -101,6 +126,7 @@ if __name__ == "__main__":
     print graph2.edges()
     print ""
 
+    reduce_from_flags(flags, graph2)
     print "Saving the network..."
     nx.write_gexf(graph2, username+"_"+repo_to_mine+"_social_interactions_analysis.gexf")
     print "Done. Saved as "+username+"_"+repo_to_mine+"_social_interactions_analysis.gexf"
\ No newline at end of file
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+#
+# Social analysis of GitHub: reciprocity of the follow relationships
+#
+# Author: Massimo Menichinelli
+# Homepage: http://www.openp2pdesign.org
+# License: GPL v.3
+#
+# Requisite:
+# install NetworkX with pip install networkx
+#
+# When the crawl expands a user it has both the list of its followers and the
+# list of the users it follows: their intersection is the set of mutual follows,
+# and the differences are the followers only and the following only.
+# The edges and the user are classified right away with these sets,
+# at any depth, without going through the whole graph afterwards.
+#
+
+
+def classify(followers, following):
+    # (mutual, followers only, following only) of the logins of the two lists
+    followers = set(followers)
+    following = set(following)
+    return followers & following, followers - following, following - followers
+
+
+def neighbours(followers, following):
+    # The followers and then the following, every user once
+    seen = set()
+    users = []
+    for i in list(followers) + list(following):
+        if i not in seen:
+            seen.add(i)
+            users.append(i)
+    return users
+
+
+def add_neighbourhood(graph, login, followers, following):
+    # Add the edges of an expanded user, from the logins of its followers and following.
+    # The edges get a "reciprocal" attribute ("Yes" when the two users follow each other)
+    # and the user the number of its mutual, followers only and following only users.
+    mutual, followers_only, following_only = classify(followers, following)
+    for f in followers:
+        graph.add_edge(f, login, reciprocal="Yes" if f in mutual else "No")
+    for f in following:
+        graph.add_edge(login, f, reciprocal="Yes" if f in mutual else "No")
+    graph.node[login]["mutual"] = len(mutual)
+    graph.node[login]["followers_only"] = len(followers_only)
+    graph.node[login]["following_only"] = len(following_only)
+    return mutual, followers_only, following_only
+
+
+def add_reciprocity(graph, logins):
+    # The same attributes for a graph built from an edge list (see sharding):
+    # every edge is reciprocal when its reverse is an edge, and the users of logins,
+    # whose followers and following are all in the graph, get their counts
+    for u, v, d in graph.edges_iter(data=True):
+        d["reciprocal"] = "Yes" if graph.has_edge(v, u) else "No"
+    for login in logins:
+        mutual, followers_only, following_only = classify(graph.predecessors(login), graph.successors(login))
+        graph.node[login]["mutual"] = len(mutual)
+        graph.node[login]["followers_only"] = len(followers_only)
+        graph.node[login]["following_only"] = len(following_only)
+
+
+def set_friendship(graph, user, mutual, followers_only, following_only):
+    # The "friendship" of the users around the ego, used by Gephi for partitioning
+    for j in mutual:
+        graph.node[j]["friendship"] = "Both followed and following"
+    for j in followers_only:
+        graph.node[j]["friendship"] = "Followed by "+user
+    for j in following_only:
+        graph.node[j]["friendship"] = "Following "+user
+
+
+if __name__ == "__main__":
+    pass
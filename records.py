@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+#
+# Social analysis of GitHub: light records of the lists of the API
+#
+# Author: Massimo Menichinelli
+# Homepage: http://www.openp2pdesign.org
+# License: GPL v.3
+#
+# Requisite:
+# install pyGithub with pip install PyGithub
+#
+# The lists of the API are read page by page from the JSON of the answers,
+# into records with __slots__ that keep only what the graph needs: the login
+# of the users, the number of an issue, the sha of a commit, the times of the
+# interactions and the number of comments (so that the comments are requested
+# only when there are some). The full objects of PyGithub are not built, and
+# reading one of their attributes that was not in the list cannot send a
+# request without being noticed: the missing data of a record is requested
+# only with Reader.complete(), which counts the requests it makes.
+#
+# The dates are kept as they are in the answers ("2013-02-01T10:00:00Z").
+#
+
+import time
+
+# The largest page allowed by the API
+PER_PAGE = 100
+
+
+class User(object):
+    __slots__ = ("login", "url", "name", "completed")
+
+    def __init__(self, login, url):
+        self.login = login
+        self.url = url
+        self.name = None
+        self.completed = False
+
+
+class Issue(object):
+    __slots__ = ("number", "title", "user", "assignee", "created_at", "comments", "comments_url")
+
+
+class Comment(object):
+    __slots__ = ("user", "created_at", "commit_id")
+
+
+class Commit(object):
+    __slots__ = ("sha", "committer", "author", "date", "comments", "comments_url")
+
+
+class Pull(object):
+    __slots__ = ("id", "user", "assignee", "created_at")
+
+
+class Activity(object):
+    # The weeks in which a contributor has committed: (start of the week as a Unix time, commits)
+    __slots__ = ("user", "weeks")
+
+
+class Reader(object):
+    # Read the lists of the API into records. request(url, parameters) returns the JSON of an answer:
+    # with a pool of credentials, every page is requested with the client that has the most requests left
+
+    def __init__(self, request, per_page=PER_PAGE):
+        self.request = request
+        self.per_page = per_page
+        self.requests = 0
+        self.completions = 0
+
+    def pages(self, url, parameters=None, limit=None):
+        # The elements of a list, page by page, without requesting the pages after the first limit elements
+        page = 1
+        per_page = self.per_page if limit is None else max(min(self.per_page, limit), 1)
+        done = 0
+        while True:
+            p = dict(parameters or {})
+            p["per_page"] = per_page
+            p["page"] = page
+            self.requests += 1
+            elements = self.request(url, p)
+            for i in elements:
+                if done == limit:
+                    return
+                done += 1
+                yield i
+            if len(elements) < per_page or done == limit:
+                return
+            page += 1
+
+    def user(self, data):
+        # Deleted accounts and unlinked commits have no user, like in PyGithub
+        if data is None:
+            return None
+        return User(data["login"], data.get("url", "/users/"+data["login"]))
+
+    def profile(self, login):
+        # The profile of a user, with its counters (followers, following, public_repos...)
+        self.requests += 1
+        return self.request("/users/"+login, None)
+
+    def complete(self, user):
+        # The profile of a user (its name), with a request that is counted
+        if not user.completed:
+            self.completions += 1
+            self.requests += 1
+            user.name = self.request(user.url, None).get("name")
+            user.completed = True
+        return user
+
+    def users_of(self, url, limit=None):
+        for i in self.pages(url, None, limit):
+            yield self.user(i)
+
+    def comments(self, url):
+        for i in self.pages(url):
+            c = Comment()
+            c.user = self.user(i.get("user"))
+            c.created_at = i.get("created_at")
+            c.commit_id = i.get("commit_id")
+            yield c
+
+    def issues(self, url, state):
+        for i in self.pages(url+"/issues", {"state": state}):
+            r = Issue()
+            r.number = i["number"]
+            r.title = i.get("title")
+            r.user = self.user(i.get("user"))
+            r.assignee = self.user(i.get("assignee"))
+            r.created_at = i.get("created_at")
+            r.comments = i.get("comments", 0)
+            r.comments_url = i.get("comments_url", url+"/issues/"+str(i["number"])+"/comments")
+            yield r
+
+    def commits(self, url):
+        for i in self.pages(url+"/commits"):
+            r = Commit()
+            r.sha = i["sha"]
+            r.committer = self.user(i.get("committer"))
+            r.author = self.user(i.get("author"))
+            r.date = i["commit"]["committer"]["date"]
+            r.comments = i["commit"].get("comment_count", 0)
+            r.comments_url = i.get("comments_url", url+"/commits/"+i["sha"]+"/comments")
+            yield r
+
+    def pulls(self, url):
+        for i in self.pages(url+"/pulls"):
+            r = Pull()
+            r.id = i["id"]
+            r.user = self.user(i.get("user"))
+            r.assignee = self.user(i.get("assignee"))
+            r.created_at = i.get("created_at")
+            yield r
+
+    def activity(self, url, retries=5, wait=3):
+        # The weekly commits of the (first 100) contributors of a repository, from a single request.
+        # GitHub answers "202 Accepted" while it computes the statistics, so the request is repeated
+        for k in range(retries+1):
+            self.requests += 1
+            data = self.request(url+"/stats/contributors", None)
+            if isinstance(data, list):
+                break
+            if k < retries:
+                print "The statistics are being computed, waiting",wait,"seconds..."
+                time.sleep(wait)
+        else:
+            return
+        for i in data:
+            r = Activity()
+            r.user = self.user(i.get("author"))
+            r.weeks = [(w["w"], w["c"]) for w in i.get("weeks", []) if w.get("c", 0) > 0]
+            yield r
+
+    def stargazers(self, url):
+        return self.users_of(url+"/stargazers")
+
+    def collaborators(self, url):
+        return self.users_of(url+"/collaborators")
+
+    def contributors(self, url):
+        return self.users_of(url+"/contributors")
+
+    def followers(self, login, limit=None):
+        return self.users_of("/users/"+login+"/followers", limit)
+
+    def following(self, login, limit=None):
+        return self.users_of("/users/"+login+"/following", limit)
+
+
+def requester_reader(requester):
+    # A reader that sends the requests with the requester of a PyGithub object
+    return Reader(lambda url, parameters: requester.requestJsonAndCheck("GET", url, parameters)[1])
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+#
+# Social analysis of GitHub: the reduction of a network, before saving it
+#
+# Author: Massimo Menichinelli
+# Homepage: http://www.openp2pdesign.org
+# License: GPL v.3
+#
+# Requisite:
+# install NetworkX with pip install networkx
+# install NumPy with pip install numpy
+#
+# Most of the users of a network are leaves (the stargazers that only starred
+# the repository, the followers of the followers) and most of the edges have
+# weight 1. Before saving the network, the scripts can remove them:
+#
+# --minweight=W     remove the edges lighter than W (the parallel edges of a pair are summed)
+# --mindegree=D     remove the users with less than D neighbours
+# --maxdegree=D     remove the users with more than D neighbours
+# --kcore=K         keep only the K-core, where every user has at least K neighbours
+# --collapse        merge the leaves with the same role and the same neighbour
+#                   (or without neighbours) into a node with their "count"
+#
+# The direction of the edges is ignored for the neighbours, and the ego of an
+# ego-network is never removed. The edges are kept as arrays, and every step
+# visits every user and every edge at most once: the K-core removes the users
+# with less than K neighbours in rounds, and only the neighbours of the users
+# removed in a round lose a neighbour.
+#
+# The role of a leaf is given by its "Yes"/"No" roles in the repositories, or
+# by its friendship in the ego-networks.
+#
+# A compact crawl (see crawlstate) is not changed: the users that are kept are
+# given to its write_gexf, which skips the others and their edges. Its edges
+# have no weight and its users no role, so --minweight and --collapse are
+# refused with --compact.
+#
+
+from array import array
+import sys
+import time
+
+import numpy as np
+
+from roles import ROLES
+
+DIRECTIONS = ["none", "out", "in", "both"]
+
+
+def role_of(attributes):
+    # The roles of a user: its roles in the repositories, or its friendship with the ego
+    roles = [r for r in ROLES if attributes.get(r) == "Yes"]
+    if len(roles) > 0:
+        return "+".join(roles)
+    return attributes.get("friendship", "")
+
+
+def graph_arrays(graph):
+    # The nodes of a NetworkX graph, and its edges as arrays of positions and weights
+    nodes = graph.nodes()
+    index = dict((v, i) for i, v in enumerate(nodes))
+    sources = array("i")
+    targets = array("i")
+    weights = array("d")
+    for u, v, d in graph.edges_iter(data=True):
+        sources.append(index[u])
+        targets.append(index[v])
+        weights.append(float(d.get("weight", 1)))
+    return (nodes, np.frombuffer(sources, dtype=np.int32).astype(np.int64),
+            np.frombuffer(targets, dtype=np.int32).astype(np.int64), np.frombuffer(weights, dtype=float))
+
+
+def pairs(n, sources, targets, weights):
+    # The distinct (source, target) pairs, with the weights of their parallel edges summed
+    keys, found = np.unique(sources * n + targets, return_inverse=True)
+    return keys // n, keys % n, np.bincount(found, weights, minlength=len(keys))
+
+
+def undirected(n, sources, targets):
+    # The neighbours of every user as a CSR matrix, without the direction and the loops
+    loop = sources != targets
+    a, b = np.minimum(sources[loop], targets[loop]), np.maximum(sources[loop], targets[loop])
+    keys = np.unique(a * n + b)
+    rows = np.concatenate([keys // n, keys % n])
+    cols = np.concatenate([keys % n, keys // n])
+    order = np.argsort(rows, kind="mergesort")
+    indptr = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=n))])
+    return indptr, cols[order]
+
+
+def neighbours_of(indptr, indices, nodes):
+    # All the neighbours of some users, in a single array
+    lengths = indptr[nodes + 1] - indptr[nodes]
+    starts = np.repeat(indptr[nodes] - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths)
+    return indices[starts + np.arange(lengths.sum())]
+
+
+def alive_degree(indptr, indices, alive):
+    # The neighbours of every user that are still in the network
+    owner = np.repeat(np.arange(len(alive)), np.diff(indptr))
+    return np.bincount(owner[alive[indices]], minlength=len(alive))
+
+
+def kcore(indptr, indices, alive, protected, k):
+    # Remove the users with less than k neighbours, until all of them have at least k
+    alive = alive.copy()
+    degree = alive_degree(indptr, indices, alive)
+    removed = np.flatnonzero(alive & ~protected & (degree < k))
+    while len(removed) > 0:
+        alive[removed] = False
+        touched = neighbours_of(indptr, indices, removed)
+        touched = touched[alive[touched]]
+        degree -= np.bincount(touched, minlength=len(alive))
+        touched = np.unique(touched)
+        removed = touched[~protected[touched] & (degree[touched] < k)]
+    return alive
+
+
+def collapse(n, indptr, indices, sources, targets, weights, alive, protected, roles):
+    # The groups of leaves with the same role, neighbour and direction of their edges:
+    # the leaf of every group, the group of every leaf (-1 for the others) and the weights out and in of the groups
+    degree = alive_degree(indptr, indices, alive)
+    leaf = alive & ~protected & (degree <= 1)
+    neighbour = np.full(n, -1, dtype=np.int64)
+    owner = np.repeat(np.arange(n), np.diff(indptr))
+    edge = leaf[owner] & alive[indices]
+    neighbour[owner[edge]] = indices[edge]
+    live = alive[sources] & alive[targets] & (sources != targets)
+    out = np.bincount(sources[live], weights[live], minlength=n)
+    into = np.bincount(targets[live], weights[live], minlength=n)
+    direction = (out > 0) * 1 + (into > 0) * 2
+    leaves = np.flatnonzero(leaf)
+    keys, found, counts = np.unique(((neighbour[leaves] + 1) * 4 + direction[leaves]) * (roles.max() + 1 if n > 0 else 1)
+                                    + roles[leaves], return_inverse=True, return_counts=True)
+    merged = counts[found] > 1
+    group = np.full(n, -1, dtype=np.int64)
+    groups, group[leaves[merged]] = np.unique(found[merged], return_inverse=True)
+    first = np.full(len(groups), -1, dtype=np.int64)
+    first[group[leaves[merged]][::-1]] = leaves[merged][::-1]
+    return (first, group, np.bincount(group[leaves[merged]], out[leaves[merged]], minlength=len(groups)),
+            np.bincount(group[leaves[merged]], into[leaves[merged]], minlength=len(groups)))
+
+
+def remove_edge(graph, u, v):
+    # Remove an edge, with all its parallel edges in a multigraph
+    if graph.is_multigraph():
+        graph.remove_edges_from([(u, v, k) for k in list(graph[u][v])])
+    else:
+        graph.remove_edge(u, v)
+
+
+def prune(n, sources, targets, weights, protected, minweight=None, mindegree=None, maxdegree=None, k=None):
+    # The steps that only remove edges and users: the pairs left, the neighbours, the users left,
+    # the pairs that were too light and the number of users and edges removed by every step
+    report = []
+    sources, targets, weights = pairs(n, sources, targets, weights)
+    light = np.zeros(len(sources), dtype=bool)
+    if minweight is not None:
+        light = weights < minweight
+        report.append(("Edges lighter than %g" % minweight, 0, int(light.sum())))
+    kept = (sources[~light], targets[~light], weights[~light])
+    indptr, indices = undirected(n, kept[0], kept[1])
+    alive = np.ones(n, dtype=bool)
+    degree = np.diff(indptr)
+    if mindegree is not None:
+        alive &= protected | (degree >= mindegree)
+        report.append(("Users with less than %d neighbours" % mindegree, n - alive.sum(), 0))
+    if maxdegree is not None:
+        before = alive.sum()
+        alive &= protected | (degree <= maxdegree)
+        report.append(("Users with more than %d neighbours" % maxdegree, before - alive.sum(), 0))
+    if k is not None:
+        before = alive.sum()
+        alive = kcore(indptr, indices, alive, protected, k)
+        report.append(("Users out of the %d-core" % k, before - alive.sum(), 0))
+    return kept, (sources[light], targets[light]), indptr, indices, alive, report
+
+
+def reduce_graph(graph, minweight=None, mindegree=None, maxdegree=None, k=None, leaves=False, keep=()):
+    # Reduce a NetworkX graph in place, keeping the nodes of keep: the number of nodes and edges removed by every step
+    nodes, sources, targets, weights = graph_arrays(graph)
+    n = len(nodes)
+    protected = np.zeros(n, dtype=bool)
+    index = dict((v, i) for i, v in enumerate(nodes))
+    protected[[index[v] for v in keep if v in index]] = True
+    (sources, targets, weights), light, indptr, indices, alive, report = prune(n, sources, targets, weights, protected,
+                                                                               minweight, mindegree, maxdegree, k)
+    for s, t in zip(*light):
+        remove_edge(graph, nodes[s], nodes[t])
+    graph.remove_nodes_from([nodes[i] for i in np.flatnonzero(~alive)])
+    if leaves:
+        names, roles = np.unique([role_of(graph.node[v]) if alive[i] else "" for i, v in enumerate(nodes)], return_inverse=True)
+        first, group, out, into = collapse(n, indptr, indices, sources, targets, weights, alive, protected, roles)
+        counts = np.bincount(group[group >= 0], minlength=len(first))
+        for g, i in enumerate(first):
+            leaf = graph.node[nodes[i]]
+            j = indices[indptr[i]:indptr[i + 1]]
+            j = j[alive[j]]
+            neighbour = nodes[j[0]] if len(j) > 0 else None
+            direction = DIRECTIONS[(out[g] > 0) * 1 + (into[g] > 0) * 2]
+            name = u"+%s:%s:%s" % (role_of(leaf), direction, neighbour if neighbour is not None else "")
+            attributes = dict((a, leaf[a]) for a in ROLES + ["friendship"] if a in leaf)
+            graph.add_node(name, label="%d users" % counts[g], count=int(counts[g]), **attributes)
+            if out[g] > 0:
+                graph.add_edge(name, neighbour, weight=float(out[g]))
+            if into[g] > 0:
+                graph.add_edge(neighbour, name, weight=float(into[g]))
+        graph.remove_nodes_from([nodes[i] for i in np.flatnonzero(group >= 0)])
+        report.append(("Leaves merged into %d nodes" % len(first), int((group >= 0).sum()) - len(first), 0))
+    return report
+
+
+def state_reduction(state, mindegree=None, maxdegree=None, k=None):
+    # The users of a compact crawl (see crawlstate) that are kept, in the order of their ids, and the report:
+    # the crawl is not changed, its write_gexf skips the other users and their edges
+    sources = array("i")
+    targets = array("i")
+    for s, t in state.edges.edges():
+        sources.append(s)
+        targets.append(t)
+    n = len(state.users)
+    kept, light, indptr, indices, alive, report = prune(
+        n, np.frombuffer(sources, dtype=np.int32).astype(np.int64), np.frombuffer(targets, dtype=np.int32).astype(np.int64),
+        np.ones(len(sources)), np.zeros(n, dtype=bool), None, mindegree, maxdegree, k)
+    return alive, report
+
+
+def reduce_from_flags(flags, graph=None, state=None):
+    # Reduce the network of a script with --minweight, --mindegree, --maxdegree, --kcore or --collapse:
+    # a graph is reduced in place, for a compact crawl the users that are kept are returned for its write_gexf
+    options = {}
+    for flag, name, kind in [("minweight", "minweight", float), ("mindegree", "mindegree", int),
+                             ("maxdegree", "maxdegree", int), ("kcore", "k", int)]:
+        if flag in flags:
+            options[name] = kind(flags[flag])
+    if "collapse" in flags:
+        options["leaves"] = True
+    if len(options) == 0:
+        return None
+    if state is not None and "leaves" in options:
+        sys.exit("--collapse is not available with --compact: the compact crawls can only be pruned")
+    if state is not None and options.pop("minweight", 1) > 1:
+        sys.exit("--minweight is not available with --compact: the edges of the compact crawls have no weight")
+    if len(options) == 0:
+        return None
+    print "Reducing the network..."
+    start = time.time()
+    if state is not None:
+        alive, report = state_reduction(state, **options)
+        nodes, left = len(state.users), int(alive.sum())
+    else:
+        nodes, edges = graph.number_of_nodes(), graph.number_of_edges()
+        keep = [v for v, d in graph.nodes_iter(data=True) if d.get("friendship") == "Ego"]
+        report = reduce_graph(graph, keep=keep, **options)
+        left = graph.number_of_nodes()
+    for step, users, links in report:
+        print "-",step,":",users,"users,",links,"edges removed"
+    print "Done in %.1f seconds: from" % (time.time() - start),nodes,"nodes to",left,"nodes (%.1f%%)" % (100.0 * left / max(nodes, 1)),
+    if state is not None:
+        print ""
+        return alive
+    print "and from",edges,"edges to",graph.number_of_edges(),"edges (%.1f%%)" % (100.0 * graph.number_of_edges() / max(edges, 1))
+    return report
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+#
+# Social analysis of GitHub: refresh of the ego-networks, skipping the users that have not changed
+#
+# Author: Massimo Menichinelli
+# Homepage: http://www.openp2pdesign.org
+# License: GPL v.3
+#
+# Requisite:
+# install pyGithub with pip install PyGithub
+#
+# An ego-network crawled again every day mostly finds the same lists of
+# followers and following. The profile of a user has the number of its
+# followers and following users: the profiles and the lists found by a crawl
+# are kept in a JSON file, and in the next crawl the lists of a user are
+# downloaded again only when its counters have changed. The profiles are
+# requested with the ETag of the previous answer, so a profile that has not
+# changed at all is answered with "304 Not Modified", which GitHub does not
+# count in the hourly quota. The graph is built again from the lists kept for
+# the users that have not changed, without any request.
+#
+# A user that has stopped following someone and started following someone else
+# keeps the same counters: a crawl without --refresh finds these changes too.
+#
+# The ego-network scripts use it with --refresh=FILE
+#
+
+import json
+import os
+
+from records import User
+
+
+class RefreshState(object):
+    # The profiles (ETag, counters and full name) and the lists of the users found so far
+
+    def __init__(self, path):
+        self.path = path
+        if os.path.exists(path):
+            self.users = json.load(open(path))
+        else:
+            self.users = {}
+
+    def save(self):
+        json.dump(self.users, open(self.path, "w"), sort_keys=True)
+
+
+class Refresh(object):
+
+    def __init__(self, pool, path):
+        self.pool = pool
+        self.state = RefreshState(path)
+        # The users checked in this crawl: True when their lists have to be downloaded again
+        self.checked = {}
+        self.not_modified = 0
+        self.unchanged = 0
+        self.changed = 0
+
+    def profile(self, login):
+        # The profile of a user, with a conditional request
+        entry = self.state.users.get(login)
+        headers = {"If-None-Match": entry["etag"]} if entry is not None and entry.get("etag") else None
+        self.pool.reader.requests += 1
+        answer, data = self.pool.call(lambda g: self.pool.requester(g).requestJsonAndCheck("GET", "/users/"+login, None, headers))
+        if data is None:
+            self.not_modified += 1
+            return entry, False
+        new = {"etag": answer.get("etag"), "name": data.get("name"),
+               "followers": data.get("followers"), "following": data.get("following"),
+               "updated_at": data.get("updated_at")}
+        if entry is None:
+            self.state.users[login] = new
+            return new, True
+        changed = new["followers"] != entry.get("followers") or new["following"] != entry.get("following")
+        entry.update(new)
+        if changed:
+            entry.pop("lists", None)
+        return entry, changed
+
+    def check(self, login):
+        if login not in self.checked:
+            entry, changed = self.profile(login)
+            changed = changed or "lists" not in entry
+            self.checked[login] = changed
+            if changed:
+                self.changed += 1
+            else:
+                self.unchanged += 1
+        return self.checked[login]
+
+    def neighbours(self, login, kind, download):
+        entry = self.state.users[login] if not self.check(login) else None
+        if entry is not None and kind in entry["lists"]:
+            return [User(str(i), "/users/"+i) for i in entry["lists"][kind]]
+        users = list(download(login))
+        entry = self.state.users[login]
+        entry.setdefault("lists", {})[kind] = [i.login for i in users]
+        return users
+
+    def followers(self, login):
+        return self.neighbours(login, "followers", self.pool.reader.followers)
+
+    def following(self, login):
+        return self.neighbours(login, "following", self.pool.reader.following)
+
+    def complete(self, user):
+        # The full name of a user comes with its profile, that is kept too
+        if not user.completed:
+            entry, changed = self.profile(user.login)
+            self.pool.reader.completions += 1
+            user.name = entry.get("name")
+            user.completed = True
+        return user
+
+    def save(self):
+        self.state.save()
+        print self.unchanged,"users unchanged,",self.changed,"users downloaded again,",
+        print self.not_modified,"profiles not modified"
+
+
+def save_refresh(pool):
+    # Keep the profiles and the lists for the next --refresh
+    if pool.refresh is not None:
+        pool.refresh.save()
+
+
+if __name__ == "__main__":
+    pass
@@ -6,222 +6,271 @@
 # Homepage: http://www.openp2pdesign.org
 # License: GPL v.3
 #
-# Requisite: 
+# Requisite:
 # install pyGithub with pip install PyGithub
 # install NetworkX with pip install networkx
 #
-# PyGitHub documentation can be found here: 
+# PyGitHub documentation can be found here:
 # https://github.com/jacquev6/PyGithub
 #
 
 from github import Github
 import networkx as nx
+import sys
 
-issue = {}
-issue = {0:{"author":"none", "comments":{}}}
-commits = {0:{"commit","sha"}}
-repos = {}
+from options import get_list
+from records import requester_reader
+from roles import role_table
+from audience import audience_sketches
+
+# The phases of the analysis of a repository.
+# The sources are the lists that are downloaded from GitHub,
+# the rules are the ways in which the edges are created from them.
+# A phase that is not selected does not make any request.
+SOURCES = ["stargazers", "collaborators", "issues", "contributors", "commits", "pulls"]
+RULES = ["commit_succession", "commit_comments", "issue_comments", "issue_assignment", "pr_assignment"]
+PHASES = SOURCES + RULES
+
+
+def select_phases(only=None, skip=None):
+    # Build the set of phases to run: all of them, or only some of them,
+    # minus the ones to skip
+    if only is None:
+        only = PHASES
+    if skip is None:
+        skip = []
+    for i in list(only) + list(skip):
+        if i not in PHASES:
+            raise ValueError("Unknown phase: "+i+" (available: "+", ".join(PHASES)+")")
+    return set(only) - set(skip)
+
+
+def phases_from_flags(flags):
+    # The phases selected with --only=... and --skip=... on the command line
+    try:
+        return select_phases(get_list(flags, "only"), get_list(flags, "skip"))
+    except ValueError, e:
+        sys.exit(str(e))
+
+
+def login_of(user):
+    # Users that are NoneType (deleted accounts, unlinked commits) become "None"
+    if user is None or user.login is None:
+        return "None"
+    return str(unicode(user.login))
+
+
+def timestamp_of(date):
+    # Edges carry the time of the interaction as an ISO 8601 string,
+    # so that they can be sorted and written in a .gexf file.
+    # The records keep the dates of the API ("2013-02-01T10:00:00Z")
+    if date is None:
+        return ""
+    if isinstance(date, basestring):
+        return str(date[:19])
+    return date.strftime("%Y-%m-%dT%H:%M:%S")
+
+
+def reader_of(pool, repository):
+    # The reader of the lists of a repository (see records).
+    # With a pool of credentials every page is requested with the client
+    # that has the most requests left, so a list is resumed with the next
+    # credential when the one in use runs out of requests or is revoked.
+    if pool is None:
+        return requester_reader(repository._requester)
+    return pool.reader
+
+
+def set_role(graph, login, role):
+    # The roles are written on the nodes by roles.export_roles, before saving the graph
+    # The audience of every role of the repository is also counted in a sketch (see audience)
+    login = str(login)
+    if login not in graph:
+        graph.add_node(login)
+    table = role_table(graph)
+    table.set(login, role)
+    if login != "None":
+        audience_sketches(graph).add(table.repos.logins[table.repo], role, login)
+
+
+def add_interaction(graph, source, target, interaction, timestamp=""):
+    # Every edge records the rule that created it and the repository being analysed,
+    # besides the time of the interaction
+    graph.add_edge(str(source),str(target),timestamp=timestamp,interaction=interaction,repo=graph.graph.get("repo", ""))
+
+
+def add_comment_edges(graph, commenter, author, previous, timestamp="", interaction="issue_comments"):
+    # Each comment interacts with the previous ones,
+    # so each user interacts with the one that created the issue (or commit)
+    # and with the ones that commented it before
+    print "Adding an edge from:",commenter,"to:",author
+    add_interaction(graph, commenter, author, interaction, timestamp)
+    for l in previous:
+        print "Adding an edge from:",commenter,"to:",l
+        add_interaction(graph, commenter, l, interaction, timestamp)
+
+
+def add_succession_edges(graph, committers):
+    # Add an edge from a commiter to a previous one,
+    # i.e. if you are committing after somebody has commited,
+    # you are interacting with him/her.
+    # The committers are (login, timestamp) pairs,
+    # ordered from the newest commit to the oldest one.
+    for h in range(len(committers)-1):
+        print "-"
+        print "Committer:",committers[h][0]
+        print "Adding an edge from:",committers[h][0],"to previous committer:",committers[h+1][0]
+        add_interaction(graph, committers[h][0], committers[h+1][0], "commit_succession", committers[h][1])
+
+
+def add_edges(graph, phases, issue, committers, commit_comments):
+    # Create the edges from what has been collected from a repository:
+    # issue maps every issue number to its author and its (commenter, timestamp) comments,
+    # committers are the (login, timestamp) of the commits, from the newest one,
+    # commit_comments are the (author, [(commenter, timestamp), ...]) of the commented commits
+    if "commit_succession" in phases:
+        print "ADDING EDGES FROM COMMITS"
+        print ""
+        add_succession_edges(graph, committers)
+
+    # Creating the edges from the commits and their comments.
+    if "commit_comments" in phases:
+        print ""
+        print "-----"
+        print "ADDING EDGES FROM COMMENTS IN COMMITS"
+        print ""
+        for author, commenters in commit_comments:
+            print "Commit by: ",author
+            for m,f in enumerate(commenters):
+                print "- Commented by: ",f[0]
+                add_comment_edges(graph, f[0], author, [l[0] for l in commenters[:m]], f[1], "commit_comments")
+        print "-----"
+
+    # Creating the edges from the issues and their comments.
+    if "issue_comments" in phases:
+        print ""
+        print "-----"
+        print "ADDING EDGES FROM ISSUES COMMENTING"
+        print ""
+        for a in issue:
+            print "-----"
+            print "Issue author:",issue[a]["author"]
+            print ""
+            for k,j in enumerate(issue[a]["comments"]):
+                print "Comment author:",j[0]
+                add_comment_edges(graph, j[0], issue[a]["author"], [l[0] for l in issue[a]["comments"][:k]], j[1])
+        print ""
+
+
+def add_pull_edge(graph, assignee, user, timestamp=""):
+    print "Adding an edge from:",assignee,"to:",user
+    add_interaction(graph, assignee, user, "pr_assignment", timestamp)
+
+
+def analyse_repo(repository,graph,phases=None,pool=None,mirror=None):
+    if phases is None:
+        phases = set(PHASES)
+    issue = {}
+    committers = []
+    commit_comments = []
+    reader = reader_of(pool, repository)
+    requests = reader.requests
+    role_table(graph).start_repo(repository.full_name)
+    graph.graph["repo"] = repository.full_name
 
-def analyse_repo(repository,graph):  
     print "-----"
     print "DESCRIPTION:",repository.description
     print "-----"
     print "OWNER:",repository.owner.login
-    graph.add_node(str(unicode(repository.owner.login)),owner="Yes")
-    print "-----"
-    print "WATCHERS:",repository.watchers
-    print ""
-    for i in repository.get_stargazers():
-        if i != None:
-            print "-",i.login
-            if i.login not in graph:
-                graph.add_node(str(unicode(i.login)),watcher="Yes")
-            else:
-                graph.node[i.login]["watcher"]="Yes"
-        else:
-            graph.node["None"]["watcher"]="Yes"
-    print "-----"
-    print "COLLABORATORS"
-    print ""
-    for i in repository.get_collaborators():
-        if i != None:
-            print "-",i.login
-            if i.login not in graph:
-                graph.add_node(str(unicode(i.login)),collaborator="Yes")
-            else:
-                graph.node[i.login]["collaborator"]="Yes"
-        else:
-            graph.node["None"]["collaborator"]="Yes"
+    set_role(graph, login_of(repository.owner), "owner")
+
+    if "stargazers" in phases:
+        print "-----"
+        print "WATCHERS:",repository.watchers
+        print ""
+        for i in reader.stargazers(repository.url):
+            print "-",login_of(i)
+            set_role(graph, login_of(i), "watcher")
+
+    if "collaborators" in phases:
+        print "-----"
+        print "COLLABORATORS"
+        print ""
+        for i in reader.collaborators(repository.url):
+            print "-",login_of(i)
+            set_role(graph, login_of(i), "collaborator")
+
     print "-----"
     print "HAS ISSUES=",repository.has_issues
-    if repository.has_issues == True:
+    if "issues" in phases and repository.has_issues == True:
+        for state in ["open", "closed"]:
+            print "-----"
+            print "ISSUES:",state.capitalize(),"ones"
+            print ""
+            for i in reader.issues(repository.url, state):
+                print "Issue number:",i.number
+                author = login_of(i.user)
+                print "- Created by", author
+                issue[i.number] = {"author": author, "comments": []}
+                print "--",i.title
+                if "issue_assignment" in phases:
+                    assignee = login_of(i.assignee)
+                    print "-- Assigned to",assignee
+                    add_interaction(graph, author, assignee, "issue_assignment", timestamp_of(i.created_at))
+                print "--",i.comments,"comments"
+                # The comments are requested only for the issues that have some
+                if "issue_comments" in phases and i.comments > 0:
+                    for f in reader.comments(i.comments_url):
+                        print "--- With a comment by",login_of(f.user)
+                        issue[i.number]["comments"].append((login_of(f.user), timestamp_of(f.created_at)))
+                print ""
+
+    if "contributors" in phases:
         print "-----"
-        print "ISSUES: Open ones"
+        print "CONTRIBUTORS"
         print ""
-        for i in repository.get_issues(state="open"):
-            print "Issue number:",i.number
-            if i.user != None:
-                print "- Created by", i.user.login
-                issue[i.number]= {}
-                issue[i.number]["comments"]= {}
-                issue[i.number]["author"] = i.user.login
-            else:
-                print "- Created by None"
-                issue[i.number]= {}
-                issue[i.number]["comments"]= {}
-                issue[i.number]["author"] = "None"
-            print "--",i.title
-            if i.assignee != None:
-                print "-- Assigned to",i.assignee.login
-                graph.add_edge(str(i.user.login),str(i.assignee.login))
-            else:
-                print "-- Assigned to None"
-                graph.add_edge(str(i.user.login),"None")
-            print "--",i.comments,"comments"
-            for j,f in enumerate(i.get_comments()):
-                if f.user != None:
-                    print "--- With a comment by",f.user.login
-                    issue[i.number]["comments"][j] = f.user.login
-                else:
-                    print "--- With a comment by None"
-                    issue[i.number]["comments"][j] = "None"
-            print ""      
-
-        print "ISSUES: Closed ones"
+        for i in reader.contributors(repository.url):
+            print "-", login_of(i)
+            set_role(graph, login_of(i), "contributor")
+
+    # With a local mirror (see gitmirror) the history comes from git,
+    # and the comments of all the commits from a single list
+    if "commits" in phases and mirror is not None and ("commit_succession" in phases or "commit_comments" in phases):
+        print "-----"
+        print "COMMITS from the mirror in",mirror.path
         print ""
-        for i in repository.get_issues(state="closed"):
-            print "Issue number:",i.number
-            if i.user != None:
-                print "- Created by", i.user.login
-                issue[i.number]= {}
-                issue[i.number]["comments"]= {}
-                issue[i.number]["author"] = i.user.login
-            else:
-                print "- Created by None"
-                issue[i.number]= {}
-                issue[i.number]["comments"]= {}
-                issue[i.number]["author"] = "None"
-            print "--",i.title
-            if i.assignee != None:
-                print "-- Assigned to",i.assignee.login
-                graph.add_edge(str(i.user.login),str(i.assignee.login))
-            else:
-                print "-- Assigned to None"
-                graph.add_edge(str(i.user.login),"None")
-            print "--",i.comments,"comments"
-            for j,f in enumerate(i.get_comments()):
-                if f.user != None:
-                    print "--- With a comment by",f.user.login
-                    issue[i.number]["comments"][j] = f.user.login
-                else:
-                    print "--- With a comment by None"
-                    issue[i.number]["comments"][j] = "None"
-            print ""      
-              
-    print "-----"
-    print "CONTRIBUTORS"
-    print ""
-    for i in repository.get_contributors():
-        if i.login != None:
-            print "-", i.login
-            if i.login not in graph:
-                    graph.add_node(str(unicode(i.login)),contributor="Yes")
-            else:
-                graph.node[i.login]["contributor"]="Yes"
-        else:
-            graph.node["None"]["contributor"]="Yes"
-    print "-----"
-    print "COMMITS"
-    print ""
-    
-    repos[0]={0:""}
-    for k,i in enumerate(repository.get_commits()):
-        print "-",i.sha
-        if i.committer != None:
-            print "-- by",i.committer.login
-            repos[0][k]=i.committer.login
-        else:
-            print "-- by None"
-            repos[0][k]="None"
-    print "-----"
-       
-    # Check the attributes of every node, and add a "No" when it is not present, in order to let Gephi use the attribute for graph partitioning
-    for i in graph.nodes():
-        if "owner" not in graph.node[i]:
-            graph.node[i]["owner"] = "No"
-        if "contributor" not in graph.node[i]:
-            graph.node[i]["contributor"] = "No"               
-        if "collaborator" not in graph.node[i]:
-            graph.node[i]["collaborator"] = "No"
-        if "watcher" not in graph.node[i]:
-            graph.node[i]["watcher"] = "No"
-            
-            
-    # Add an edge from a commiter to a previous one,
-    # i.e. if you are committing after somebody has commited,
-    # you are interacting with him/her
-    print "ADDING EDGES FROM COMMITS"
-    print ""
-    for h in repos[0]:
-        if h < len(repos[0])-1:
-            print "-"
-            print "Committer:",repos[0][h]
-            print "Adding an edge from:",repos[0][h],"to previous committer:",repos[0][h+1]
-            graph.add_edge(str(repos[0][h]),str(repos[0][h+1]))
-    
-    # Creating the edges from the commits and their comments.
-    # Each comment interacts with the previous ones,
-    # so each user interacts with the previous ones that have been creating the issue or commented it
-    print ""
-    print "-----"
-    print "ADDING EDGES FROM COMMENTS IN COMMITS"
-    print ""
-    
-    comm = {}
-    
-    for k,i in enumerate(repository.get_commits()):
-        if i.author != None:
-            print "Commit by: ",i.author.login
-        comm[k]= {}
-        comm[k]["comments"]= {}
-        
-        for m,f in enumerate(i.get_comments()):
-            print "- Commented by: ",f.user.login
-            comm[k]["comments"][m] = f.user.login
-            graph.add_edge(str(f.user.login),str(i.author.login))
-            print "- Adding an edge from ",f.user.login, "to", i.author.login
-    
-            for l in range(m):
-                print "- Adding an edge from ",f.user.login,"to",comm[k]["comments"][l]
-                graph.add_edge(str(f.user.login),str(comm[k]["comments"][l]))
-    
-    print "-----"
-       
-    
-    
-    # Creating the edges from the issues and their comments.
-    # Each comment interacts with the previous ones,
-    # so each user interacts with the previous ones that have been creating the issue or commented it
-    print ""
-    print "-----"
-    print "ADDING EDGES FROM ISSUES COMMENTING"
-    print ""
-    
-    for a,b in enumerate(issue):
+        if "commit_succession" in phases:
+            committers = mirror.committers()
+            print len(committers),"commits"
+        if "commit_comments" in phases:
+            threads = {}
+            for f in reader.comments(repository.url+"/comments"):
+                if f.commit_id not in threads:
+                    threads[f.commit_id] = []
+                    print "-",f.commit_id
+                threads[f.commit_id].append((login_of(f.user), timestamp_of(f.created_at)))
+            for sha in threads:
+                commit_comments.append((mirror.author(sha), threads[sha]))
+        mirror.cache.save()
+        print mirror.cache.lookups,"logins requested to the API"
+
+    # The commits are listed only once, for both the committer chain and the comments
+    elif "commits" in phases and ("commit_succession" in phases or "commit_comments" in phases):
         print "-----"
-        print "Issue author:",issue[a]["author"]
+        print "COMMITS"
         print ""
-        for k,j in enumerate(issue[a]["comments"]):
-            print "Comment author:",issue[a]["comments"][k]
-            print "Adding an edge from:",issue[a]["comments"][k],"to:",issue[a]["author"]
-            graph.add_edge(str(issue[a]["comments"][k]),str(issue[a]["author"]))
-
-            for l in range(k):
-                print "Adding an edge from:",issue[a]["comments"][k],"to:",issue[a]["comments"][l]
-                graph.add_edge(str(issue[a]["comments"][l]),str(issue[a]["comments"][l]))
-    print ""
-    
-    
+        for i in reader.commits(repository.url):
+            print "-",i.sha
+            print "-- by",login_of(i.committer)
+            committers.append((login_of(i.committer), timestamp_of(i.date)))
+            if "commit_comments" in phases and i.comments > 0:
+                commenters = [(login_of(f.user), timestamp_of(f.created_at)) for f in reader.comments(i.comments_url)]
+                if len(commenters) > 0:
+                    commit_comments.append((login_of(i.author), commenters))
+    print "-----"
+
+    add_edges(graph, phases, issue, committers, commit_comments)
+
     #print "FORKS"
     #print ""
     #for f,i in enumerate(repository.get_forks()):
@@ -231,36 +280,28 @@ def analyse_repo(repository,graph):
     #    analyse_repo(i,f+1)
     #    print ""
     #print "-----"
-    
-    print "-----"
-    print "PULL REQUESTS"
-    print ""
-    
-    for i in repository.get_pulls():
-        print i.id
-        if i.assignee != None:
-            print "Assignee:",i.assignee.login
-            one = i.assignee.login
-        else:
-            one = "None"
-        if i.user != None:
-            print "User:",i.user.login
-            two = i.user.login
-        else:
-            two = "None"
-        
-        print "Adding an edge from:",one,"to:",two
-        graph.add_edge(str(one),str(two))
-        
-        # We should look at the comments on the pull request, but a pull request is automatically translated
-        # as an issue, so we are already looking at the issue comments
-   
+
+    if "pulls" in phases and "pr_assignment" in phases:
+        print "-----"
+        print "PULL REQUESTS"
+        print ""
+        for i in reader.pulls(repository.url):
+            print i.id
+            one = login_of(i.assignee)
+            print "Assignee:",one
+            two = login_of(i.user)
+            print "User:",two
+            add_pull_edge(graph, one, two, timestamp_of(i.created_at))
+
+            # We should look at the comments on the pull request, but a pull request is automatically translated
+            # as an issue, so we are already looking at the issue comments
+
+    role_table(graph).end_repo()
     print "-----"
-  
- 
+    print "Requests:",reader.requests-requests
 
     return
 
 
-if __name__ == '__main__': 
-    pass
\ No newline at end of file
+if __name__ == '__main__':
+    pass
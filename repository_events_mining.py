@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+#
+# Social analysis of repositories in GitHub, kept up to date with their events
+#
+# Author: Massimo Menichinelli
+# Homepage: http://www.openp2pdesign.org
+# License: GPL v.3
+#
+# Requisite:
+# install pyGithub with pip install PyGithub
+# install NetworkX with pip install networkx
+#
+# PyGitHub documentation can be found here:
+# https://github.com/jacquev6/PyGithub
+#
+# The networks of some repositories (--repos=owner/repo,...) or of all the
+# repositories of some Organizations (--orgs=org,...) are kept in the store
+# (--store=FILE, see graphdb), one run for every repository. The first time a
+# repository is mined from the start; then only the new events of its feed (or
+# of the feed of its Organization) are read, and their edges and roles are
+# added to the network in the store. The feeds and what is needed to read the
+# next events are kept in --events=FILE. With --poll=SECONDS the feeds are read
+# again and again, at most as often as GitHub allows.
+#
+# The feed is read before a repository is mined from the start, so the events
+# that happen while it is being mined may be added twice.
+#
+
+import networkx as nx
+import os
+import sys
+import time
+
+# Clear screen
+os.system('cls' if os.name=='nt' else 'clear')
+
+from repoanalysis import analyse_repo, phases_from_flags
+from options import get_flags, get_list
+from credentials import login
+from roles import export_roles, role_table
+from graphdb import store_from_flags, script_name
+from events import EventState, EventFeed, apply_event
+
+
+def remove_none(graph):
+    # Getting rid of the node "None", it was used to catch the errors of users that are NoneType
+    if "None" in graph:
+        graph.remove_node('None')
+
+
+def mine(g, store, state, phases, repo):
+    # The whole network of a repository, that replaces the one in the store
+    print "---------"
+    print "MINING FROM THE START:", repo
+    graph = nx.MultiDiGraph()
+    analyse_repo(g.get_repo(repo), graph, phases, g)
+    export_roles(graph)
+    remove_none(graph)
+    state.forget(repo)
+    run, n = store.save_graph(script_name(), repo, graph)
+    print n,"edges saved"
+
+
+def update(g, store, state, phases, repo, events):
+    # The edges and the roles of the new events of a repository, added to the network in the store
+    print "---------"
+    print "NEW EVENTS OF", repo, ":", len(events)
+    graph = nx.MultiDiGraph()
+    graph.graph["repo"] = repo
+    role_table(graph).start_repo(repo)
+    for e in events:
+        apply_event(graph, e, phases, g.reader, state)
+    role_table(graph).end_repo()
+    export_roles(graph)
+    remove_none(graph)
+    run, n = store.save_graph(script_name(), repo, graph, replace=False)
+    print n,"edges added"
+
+
+def poll(g, store, state, phases, feeds):
+    # Read all the feeds once: the time to wait before the next poll
+    interval = 60
+    for url, repos in feeds:
+        print ""
+        print "Reading the events of",url,"..."
+        events, complete = EventFeed(g, url, state).poll()
+        interval = max(interval, int(state.feeds[url].get("interval") or 60))
+        if repos is None:
+            # The repositories of an Organization
+            repos = [i["full_name"] for i in g.reader.pages(url.replace("/events", "/repos"))] if not complete else []
+        if not complete:
+            print "Some events may have been lost, mining again..."
+            for r in repos:
+                mine(g, store, state, phases, r)
+            continue
+        found = {}
+        for e in events:
+            found.setdefault(e["repo"]["name"], []).append(e)
+        for r in sorted(found):
+            # A repository that was not in the store yet (a new repository of an Organization)
+            if not store.has_run(script_name(), r):
+                mine(g, store, state, phases, r)
+            else:
+                update(g, store, state, phases, r, found[r])
+    state.save()
+    return interval
+
+
+if __name__ == "__main__":
+    flags = get_flags()
+    phases = phases_from_flags(flags)
+    store = store_from_flags(flags)
+    if store is None:
+        sys.exit("The store is needed: --store=FILE")
+    print "Social Network Analisys of GitHub repositories, from their events"
+    print ""
+    g = login(flags)
+    repos = get_list(flags, "repos")
+    orgs = get_list(flags, "orgs")
+    if repos is None and orgs is None:
+        repos = get_list({"repos": raw_input("Enter the repositories to mine (owner/repo), separated by commas: ")}, "repos")
+    feeds = [("/repos/"+r+"/events", [r]) for r in repos or []] + [("/orgs/"+o+"/events", None) for o in orgs or []]
+    state = EventState(flags["events"] if "events" in flags and flags["events"] is not True else "events.json")
+
+    while True:
+        requests = g.reader.requests
+        interval = poll(g, store, state, phases, feeds)
+        print ""
+        print "Requests:",g.reader.requests-requests
+        if "poll" not in flags:
+            break
+        wait = max(int(flags["poll"]), interval)
+        print "Waiting",wait,"seconds..."
+        time.sleep(wait)
+    print "Done. Saved in",store.path
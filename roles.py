@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+#
+# Social analysis of GitHub: roles of the users in the repositories
+#
+# Author: Massimo Menichinelli
+# Homepage: http://www.openp2pdesign.org
+# License: GPL v.3
+#
+# The roles of every user are the bits of a small integer, kept in an array.
+# Every repository only updates the users it touches; the "Yes"/"No"
+# attributes that Gephi uses for partitioning the graph are written once,
+# before saving it. The roles of every user in every repository are kept
+# as the triplets (user, repository, roles) of a sparse matrix.
+#
+
+from array import array
+
+from crawlstate import LoginInterner
+
+ROLES = ["owner", "contributor", "collaborator", "watcher"]
+BITS = dict((r, 1 << k) for k, r in enumerate(ROLES))
+
+
+class RoleTable(object):
+
+    def __init__(self):
+        self.users = LoginInterner()
+        self.flags = bytearray()
+        self.repos = LoginInterner()
+        # The sparse user x repository matrix, as coordinates and values
+        self.rows = array("i")
+        self.cols = array("i")
+        self.values = bytearray()
+        self.touched = {}
+
+    def start_repo(self, name):
+        self.repo = self.repos.intern(name)
+        self.touched = {}
+
+    def end_repo(self):
+        for i in sorted(self.touched):
+            self.rows.append(i)
+            self.cols.append(self.repo)
+            self.values.append(self.touched[i])
+        self.touched = {}
+
+    def set(self, login, role):
+        i = self.users.intern(login)
+        if i == len(self.flags):
+            self.flags.append(0)
+        self.flags[i] |= BITS[role]
+        self.touched[i] = self.touched.get(i, 0) | BITS[role]
+
+    def get(self, login):
+        i = self.users.ids.get(login)
+        if i is None:
+            return 0
+        return self.flags[i]
+
+    def has(self, login, role):
+        return bool(self.get(login) & BITS[role])
+
+    def matrix(self):
+        # The user x repository matrix as a scipy.sparse matrix (scipy is needed only here)
+        from scipy.sparse import coo_matrix
+        return coo_matrix((list(self.values), (self.rows, self.cols)), shape=(len(self.users), len(self.repos))).tocsr()
+
+    def write_membership(self, prefix):
+        # The matrix in Matrix Market format (scipy.io.mmread can read it),
+        # with the logins and repositories of its rows and columns in two text files
+        f = open(prefix+"_roles.mtx", "w")
+        f.write("%%MatrixMarket matrix coordinate integer general\n")
+        f.write("% roles: "+", ".join(r+"="+str(BITS[r]) for r in ROLES)+"\n")
+        f.write("%d %d %d\n" % (len(self.users), len(self.repos), len(self.values)))
+        for r, c, v in zip(self.rows, self.cols, self.values):
+            f.write("%d %d %d\n" % (r+1, c+1, v))
+        f.close()
+        open(prefix+"_roles_users.txt", "w").write("".join(l+"\n" for l in self.users.logins))
+        open(prefix+"_roles_repos.txt", "w").write("".join(l+"\n" for l in self.repos.logins))
+
+
+def role_table(graph):
+    # The table of the roles is kept together with the graph
+    if "roles" not in graph.graph:
+        graph.graph["roles"] = RoleTable()
+    return graph.graph["roles"]
+
+
+def export_roles(graph):
+    # Write the "Yes"/"No" attribute of every role on every node, in order to let Gephi use them for graph partitioning
+    table = role_table(graph)
+    for i in graph.nodes_iter():
+        flags = table.get(i)
+        for r in ROLES:
+            graph.node[i][r] = "Yes" if flags & BITS[r] else "No"
+
+
+if __name__ == "__main__":
+    pass
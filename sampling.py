@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+#
+# Social analysis of GitHub: a 2-level ego-network crawl with a budget of requests
+#
+# Author: Massimo Menichinelli
+# Homepage: http://www.openp2pdesign.org
+# License: GPL v.3
+#
+# Requisite:
+# install NetworkX with pip install networkx
+#
+# A user with 100.000 followers costs 1.000 requests, and a 2-level crawl has
+# no limit to how many of them it can find. Here the lists of every user are
+# read only up to --cap=N users (100 by default): a user with more followers or
+# following users is a hub, whose true number of followers and following users
+# is read from its profile, and recorded in the graph. The crawl stops
+# expanding the users around the ego when the next expansion could go over
+# --budget=N requests, so it always ends within the budget.
+#
+# The users around the ego are expanded in the order given by --sample:
+#
+#   uniform   a random order (--seed=N to repeat it)
+#   top       the most active first (public repositories and followers), after
+#             reading the profiles of a random half of the budget of them
+#   walk      a random walk among the ego and the users around it, moving along
+#             the follow relationships found so far
+#
+# The expanded users are a sample of the users around the ego, and the
+# statistics of the whole ego-network are estimated from it: with a uniform
+# sample every user counts the same, with the random walk every visit of a user
+# counts 1/degree, since the walk visits a user in proportion to its degree
+# (the degree it had when it was visited, since the network grows during the
+# walk). The follow relationships between two users around the ego are found
+# from both of them, so they are counted once in the estimated edges.
+# The most active users are not a random sample, so their statistics are not
+# corrected. The estimates are saved in a JSON file with the graph.
+#
+
+import json
+import random
+import sys
+
+from reciprocity import add_neighbourhood
+
+STRATEGIES = ["uniform", "top", "walk"]
+CAP = 100
+
+
+class SampledCrawl(object):
+
+    def __init__(self, pool, budget=None, cap=CAP, strategy="uniform", seed=None):
+        if strategy not in STRATEGIES:
+            raise ValueError("Unknown strategy: "+strategy+" (available: "+", ".join(STRATEGIES)+")")
+        self.reader = pool.reader
+        self.budget = budget
+        self.cap = cap
+        self.strategy = strategy
+        self.random = random.Random(seed)
+        self.start = self.reader.requests
+        self.profiles = {}
+        # The true number of followers and following users of every expanded user
+        self.degrees = {}
+        self.hubs = set()
+        self.expanded = []
+        # The follow relationships of every expanded user with the other users around the ego
+        self.internal = {}
+        self.around = set()
+
+    def spent(self):
+        return self.reader.requests - self.start
+
+    def cost(self):
+        # The most requests that an expansion can make: the pages of two capped lists and a profile
+        pages = -(-self.cap // self.reader.per_page) if self.cap > 0 else 1
+        return 2 * pages + 1
+
+    def affordable(self, requests):
+        return self.budget is None or self.spent() + requests <= self.budget
+
+    def profile(self, login):
+        if login not in self.profiles:
+            self.profiles[login] = self.reader.profile(login)
+        return self.profiles[login]
+
+    def neighbourhood(self, login):
+        # The logins of the (capped) followers and following of a user, and its true counters
+        followers = [i.login for i in self.reader.followers(login, self.cap)]
+        following = [i.login for i in self.reader.following(login, self.cap)]
+        if len(followers) >= self.cap or len(following) >= self.cap:
+            self.hubs.add(login)
+            p = self.profile(login)
+            self.degrees[login] = (p.get("followers", len(followers)), p.get("following", len(following)))
+        else:
+            self.degrees[login] = (len(followers), len(following))
+        return followers, following
+
+    def add(self, graph, login, followers, following):
+        for i in followers + following:
+            if i not in graph:
+                graph.add_node(i, label=i)
+        result = add_neighbourhood(graph, login, followers, following)
+        graph.node[login]["followers_count"] = self.degrees[login][0]
+        graph.node[login]["following_count"] = self.degrees[login][1]
+        graph.node[login]["hub"] = "Yes" if login in self.hubs else "No"
+        graph.node[login]["sampled"] = "Yes"
+        return result
+
+    def expand(self, graph, login):
+        print " -", login
+        followers, following = self.neighbourhood(login)
+        self.add(graph, login, followers, following)
+        self.internal[login] = len([i for i in followers + following if i in self.around and i != login])
+        self.expanded.append(login)
+        return followers, following
+
+    def order(self, candidates):
+        # The order in which the users around the ego are expanded (uniform and top)
+        candidates = list(candidates)
+        self.random.shuffle(candidates)
+        if self.strategy == "top":
+            # Read the profiles with at most half of the budget left, then expand the most active users first
+            if self.budget is not None:
+                candidates = candidates[:max(self.budget - self.spent(), 0) // 2]
+            known = []
+            for i in candidates:
+                p = self.profile(i)
+                known.append((p.get("public_repos", 0) + p.get("followers", 0), i))
+            known.sort(reverse=True)
+            candidates = [i for a, i in known]
+        return candidates
+
+    def walk(self, graph, ego, first):
+        # A random walk among the ego and the users around it: every visit is recorded for the estimates,
+        # with the degree of the user when it was visited
+        around = set(first) | set([ego])
+        visits = []
+        self.walk_degrees = []
+        current = ego
+        for step in range(100 * len(first) + 1000):
+            if current != ego and current not in self.degrees:
+                if not self.affordable(self.cost()):
+                    break
+                self.expand(graph, current)
+            steps = [i for i in set(graph.successors(current)) | set(graph.predecessors(current)) if i in around]
+            if current != ego:
+                visits.append(current)
+                self.walk_degrees.append(len(steps))
+                if len(self.expanded) == len(first) and len(visits) >= 10 * len(first):
+                    break
+            current = self.random.choice(steps)
+        return visits
+
+    def run(self, graph, ego):
+        # The whole crawl: the ego, then as many users around it as the budget allows
+        print "Looking for the followers and following of",ego,"..."
+        followers, following = self.neighbourhood(ego)
+        mutual, followers_only, following_only = self.add(graph, ego, followers, following)
+        first = [i for i in graph.nodes() if i != ego]
+        self.first = first
+        self.around = set(first)
+        for i in first:
+            graph.node[i]["sampled"] = "No"
+        print "-----"
+        if self.strategy == "walk" and len(first) > 0:
+            self.visits = self.walk(graph, ego, first)
+        else:
+            for f in self.order(first):
+                if not self.affordable(self.cost()):
+                    print "The budget of",self.budget,"requests has been reached"
+                    break
+                self.expand(graph, f)
+            self.visits = list(self.expanded)
+        print "-----"
+        print len(self.expanded),"of",len(first),"users expanded,",len(self.hubs),"hubs,",self.spent(),"requests"
+        return mutual, followers_only, following_only
+
+    def estimates(self, graph, ego):
+        # The mean counters and reciprocity of the users around the ego, corrected for the sampling,
+        # and the number of follow relationships of the whole 2-level ego-network
+        population = len(self.around)
+        if ego in self.hubs:
+            population = sum(self.degrees[ego])
+        total = 0.0
+        sums = {"followers": 0.0, "following": 0.0, "reciprocity": 0.0, "internal": 0.0}
+        for k, v in enumerate(self.visits):
+            if self.strategy == "walk":
+                w = 1.0 / max(self.walk_degrees[k], 1)
+            else:
+                w = 1.0
+            n = graph.node[v]
+            both = n["mutual"] + n["followers_only"] + n["following_only"]
+            total += w
+            sums["followers"] += w * self.degrees[v][0]
+            sums["following"] += w * self.degrees[v][1]
+            sums["internal"] += w * self.internal[v]
+            sums["reciprocity"] += w * (float(n["mutual"]) / both if both > 0 else 0.0)
+        result = {"ego": ego, "strategy": self.strategy, "corrected": self.strategy != "top",
+                  "budget": self.budget, "cap": self.cap, "requests": self.spent(),
+                  "population": population, "expanded": len(self.expanded), "hubs": sorted(self.hubs)}
+        if total > 0:
+            means = dict((k, sums[k] / total) for k in sums)
+            for k in ("followers", "following", "reciprocity"):
+                result["mean_"+k] = means[k]
+            # The relationships between two users around the ego are counted by both of them
+            result["edges"] = int(round(population * (means["followers"] + means["following"] - means["internal"] / 2.0)))
+        return result
+
+
+def sampling_from_flags(flags, pool):
+    # The crawl of the --budget, --cap and --sample options, or None without them
+    if not ("budget" in flags or "cap" in flags or "sample" in flags):
+        return None
+    def number(name, default):
+        if name not in flags or flags[name] is True:
+            return default
+        return int(flags[name])
+    strategy = flags.get("sample", "uniform")
+    if strategy is True:
+        strategy = "uniform"
+    try:
+        return SampledCrawl(pool, number("budget", None), number("cap", CAP), strategy, number("seed", None))
+    except ValueError, e:
+        sys.exit(str(e))
+
+
+def save_estimates(estimates, path):
+    json.dump(estimates, open(path, "w"), indent=1, sort_keys=True)
+
+
+if __name__ == "__main__":
+    pass
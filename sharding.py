@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+#
+# Social analysis of GitHub: sharded crawl of the ego-networks of an Organization
+#
+# Author: Massimo Menichinelli
+# Homepage: http://www.openp2pdesign.org
+# License: GPL v.3
+#
+# Requisite:
+# install pyGithub with pip install PyGithub
+# install NetworkX with pip install networkx
+#
+# Every shard is crawled by a separate process, with its own credentials,
+# and writes its edges to a partial edge list (one "follower<TAB>followed" per line).
+# The partial edge lists are then sorted in runs on disk and merged,
+# so that the duplicated edges are removed without keeping them all in memory.
+# The members and the users around them have all their lists in the merged
+# edges, so the final network has the same reciprocity attributes of the
+# NetworkX crawls (see reciprocity), for the graphs and the compact crawls.
+#
+
+import networkx as nx
+import heapq
+import os
+import tempfile
+import zlib
+
+from credentials import CredentialPool
+from crawlstate import CrawlState
+from reciprocity import add_reciprocity
+
+MODES = ["members", "frontier"]
+
+
+def shard_of(login, shards):
+    # A stable hash of the login: the same user always belongs to the same shard
+    return (zlib.crc32(login) & 0xffffffff) % shards
+
+
+def shard_file(prefix, shard):
+    return prefix+".shard"+str(shard)+".edges"
+
+
+def frontier_file(prefix, shard):
+    return prefix+".shard"+str(shard)+".frontier"
+
+
+def credentials_of(shard, shards, credentials):
+    # The credentials of a shard: every credential is used by one shard,
+    # when there are more shards than credentials they are shared
+    own = [c for k, c in enumerate(credentials) if k % shards == shard]
+    if len(own) == 0:
+        own = [credentials[shard % len(credentials)]]
+    return own
+
+
+def expand_user(g, out, shard, login):
+    # The edges of the followers and following of a user
+    print "[shard",str(shard)+"] Expanding", login
+    for i in g.followers(login):
+        out.write(i.login+"\t"+login+"\n")
+    for i in g.following(login):
+        out.write(login+"\t"+i.login+"\n")
+
+
+def crawl_shard(job):
+    # Crawl a shard of the 2-level ego-network of the members of an Organization:
+    # every shard lists the followers and following of the members whose login falls in it.
+    # In "members" mode the shard also expands all of them.
+    # In "frontier" mode it writes them in its frontier file instead, and they are expanded
+    # by the shard of their login (see expand_frontier), every one once in the whole crawl.
+    shard, shards, credentials, members, mode, prefix = job
+    g = CredentialPool(credentials)
+    out = open(shard_file(prefix, shard), "w")
+    frontier = open(frontier_file(prefix, shard), "w") if mode == "frontier" else None
+    expanded = set()
+
+    def found(login):
+        if frontier is not None:
+            frontier.write(login+"\n")
+        elif login not in expanded:
+            expanded.add(login)
+            expand_user(g, out, shard, login)
+
+    for j in members:
+        if shard_of(j, shards) != shard:
+            continue
+        print "[shard",str(shard)+"] Looking for the followers and following of", j,"..."
+        for f in g.followers(j):
+            out.write(f.login+"\t"+j+"\n")
+            found(f.login)
+        for f in g.following(j):
+            out.write(j+"\t"+f.login+"\n")
+            found(f.login)
+    out.close()
+    if frontier is not None:
+        frontier.close()
+    return shard_file(prefix, shard)
+
+
+def expand_frontier(job):
+    # The second pass of the "frontier" mode: the shard expands the users of all the frontier files
+    # whose login falls in it, every one once, adding their edges to its edge list
+    shard, shards, credentials, members, mode, prefix = job
+    g = CredentialPool(credentials)
+    out = open(shard_file(prefix, shard), "a")
+    expanded = set()
+    for k in range(shards):
+        for line in open(frontier_file(prefix, k)):
+            login = line.rstrip("\n")
+            if shard_of(login, shards) == shard and login not in expanded:
+                expanded.add(login)
+                expand_user(g, out, shard, login)
+    out.close()
+    return shard_file(prefix, shard)
+
+
+def sorted_runs(path, run_size):
+    # Split an edge list in sorted runs of at most run_size lines, each one in a temporary file
+    runs = []
+    source = open(path)
+    while True:
+        lines = []
+        for line in source:
+            lines.append(line)
+            if len(lines) == run_size:
+                break
+        if len(lines) == 0:
+            break
+        lines.sort()
+        fd, run = tempfile.mkstemp(suffix=".run", dir=os.path.dirname(os.path.abspath(path)))
+        os.fdopen(fd, "w").writelines(lines)
+        runs.append(run)
+    source.close()
+    return runs
+
+
+def merge_shards(paths, merged_path, run_size=1000000):
+    # External-memory merge of the partial edge lists into a sorted list without duplicates
+    runs = []
+    for p in paths:
+        runs += sorted_runs(p, run_size)
+    files = [open(r) for r in runs]
+    out = open(merged_path, "w")
+    last = None
+    edges = 0
+    for line in heapq.merge(*files):
+        if line != last:
+            out.write(line)
+            edges += 1
+        last = line
+    out.close()
+    for f, r in zip(files, runs):
+        f.close()
+        os.remove(r)
+    return edges
+
+
+def load_graph(merged_path, members):
+    # The final graph, with the "member" attribute of every node resolved
+    graph = nx.DiGraph()
+    for i in members:
+        graph.add_node(i,label=i,member="Yes")
+    for line in open(merged_path):
+        subject_id, object_id = line.rstrip("\n").split("\t")
+        for n in (subject_id, object_id):
+            if n not in graph:
+                graph.add_node(n,label=n,member="No")
+        graph.add_edge(subject_id, object_id)
+    # The members and the users around them are expanded by the shards, in both modes
+    add_reciprocity(graph, listed_users(graph, members))
+    return graph
+
+
+def listed_users(graph, members):
+    # The members and their followers and following
+    listed = set(members)
+    for i in members:
+        listed.update(graph.predecessors(i))
+        listed.update(graph.successors(i))
+    return listed
+
+
+def load_state(merged_path, members):
+    # The same, in the compact arrays of crawlstate, for graphs too large for NetworkX
+    state = CrawlState()
+    for i in members:
+        state.add_node(i, True)
+    for line in open(merged_path):
+        subject_id, object_id = line.rstrip("\n").split("\t")
+        state.add_edge(subject_id, object_id)
+        for n in (subject_id, object_id):
+            if state.members[state.add_node(n)]:
+                state.mark_listed(subject_id)
+                state.mark_listed(object_id)
+                break
+    for i in members:
+        state.mark_listed(i)
+    return state
+
+
+if __name__ == "__main__":
+    pass
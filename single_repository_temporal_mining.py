@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+#
+# Temporal social analysis of a single repository in GitHub:
+# a weighted network for every time window, and a dynamic network with all of them,
+# from a single mining of the repository
+#
+# Author: Massimo Menichinelli
+# Homepage: http://www.openp2pdesign.org
+# License: GPL v.3
+#
+# Requisite:
+# install pyGithub with pip install PyGithub
+# install NetworkX with pip install networkx
+#
+# PyGitHub documentation can be found here:
+# https://github.com/jacquev6/PyGithub
+#
+
+import networkx as nx
+import os
+
+# Clear screen
+os.system('cls' if os.name=='nt' else 'clear')
+
+from repoanalysis import analyse_repo, phases_from_flags
+from options import get_flags
+from credentials import login
+from gitmirror import mirror_from_flags
+from tables import write_tables, tables_format
+from graphdb import store_from_flags, store_graph
+from roles import export_roles
+from graphqlanalysis import analyse_repo_graphql, graphql_transport
+from statsanalysis import analyse_repo_stats
+from temporal import month_windows, windowed_graphs, dynamic_graph
+from reduction import reduce_from_flags
+
+# Variables for the whole program
+
+graph = nx.MultiDiGraph()
+
+
+if __name__ == "__main__":
+    flags = get_flags()
+    phases = phases_from_flags(flags)
+    tables = tables_format(flags)
+    store = store_from_flags(flags)
+    print "Temporal Social Network Analisys of a GitHub repository"
+    print ""
+    g = login(flags)
+    username = raw_input("Enter the username you want to analyse: ")
+    print ""
+
+
+    print username,"has",g.get_user(username).public_repos, "repositories."
+
+    print ""
+
+    for repo in g.get_user(username).get_repos():
+        print "-",repo.name
+
+    print ""
+
+    repo_to_mine = raw_input("Enter the name of the repository you want to mine: ")
+    size = raw_input("Enter the size of the time windows in months (default 1): ")
+    step = raw_input("Enter the months between the start of two windows (default: the size): ")
+    size = int(size) if size != "" else 1
+    step = int(step) if step != "" else size
+    b = g.get_user(username).get_repo(repo_to_mine)
+    if "fast" in flags:
+        analyse_repo_stats(b,graph,phases,g)
+    elif "graphql" in flags:
+        analyse_repo_graphql(b,graph,phases,g,graphql_transport(g, flags))
+    else:
+        analyse_repo(b,graph,phases,g,mirror_from_flags(flags, b))
+
+    # The Yes/No attributes of the roles, for Gephi
+    export_roles(graph)
+
+    # Getting rid of the node "None", it was used to catch the errors of users that are NoneType
+    if "None" in graph:
+        graph.remove_node('None')
+
+    # The nodes and the edges as columnar tables, with --tables
+    if tables is not None:
+        print "Saving the tables..."
+        print "Done. Saved as",", ".join(write_tables(graph, username+"_"+repo_to_mine, tables))
+
+    # The network in the store shared by all the scripts, with --store
+    store_graph(store, username+"_"+repo_to_mine+"_social_interactions_analysis", graph)
+
+    windows = month_windows(graph, size, step)
+    print ""
+    print "Building",len(windows),"time windows..."
+    print ""
+
+    for w, graph2 in windowed_graphs(graph, windows):
+        print "-",w[0],"to",w[1],":",graph2.number_of_nodes(),"nodes,",graph2.number_of_edges(),"edges"
+        reduce_from_flags(flags, graph2)
+        nx.write_gexf(graph2, username+"_"+repo_to_mine+"_"+w[0]+"_social_interactions_analysis.gexf")
+
+    print ""
+    print "Saving the dynamic network..."
+    nx.write_gexf(dynamic_graph(graph, windows), username+"_"+repo_to_mine+"_dynamic_social_interactions_analysis.gexf")
+    print "Done. Saved as "+username+"_"+repo_to_mine+"_dynamic_social_interactions_analysis.gexf"
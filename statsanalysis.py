@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+#
+# Social analysis of GitHub: a fast, approximate analysis of a repository from its statistics
+#
+# Author: Massimo Menichinelli
+# Homepage: http://www.openp2pdesign.org
+# License: GPL v.3
+#
+# Requisite:
+# install pyGithub with pip install PyGithub
+# install NetworkX with pip install networkx
+#
+# The statistics of a repository have the commits of every week of its (first
+# 100) contributors, computed by GitHub and downloaded with a single request.
+# Two contributors that have committed in the same week have probably worked
+# together: every week they have in common becomes a pair of edges between
+# them, with the "commit_coactivity" interaction and the time of the start of
+# the week. The graph has the same attributes of the one of analyse_repo, so
+# the scripts save it in the same way, but only the owner and the contributors
+# have a role, and there are no edges from issues, comments or pull requests.
+#
+# The scripts use it with --fast
+#
+
+import datetime
+
+from repoanalysis import PHASES, reader_of, login_of, set_role, add_interaction
+from roles import role_table
+
+
+def week_of(timestamp):
+    # The start of a week, as the timestamps of analyse_repo
+    return datetime.datetime.utcfromtimestamp(timestamp).strftime("%Y-%m-%dT%H:%M:%S")
+
+
+def add_coactivity_edges(graph, weeks):
+    # weeks maps the start of every week to the logins of the contributors that have committed in it
+    for w in sorted(weeks):
+        active = sorted(weeks[w])
+        print "Week of",week_of(w),":",len(active),"contributors"
+        for a in active:
+            for b in active:
+                if a != b:
+                    add_interaction(graph, a, b, "commit_coactivity", week_of(w))
+
+
+def analyse_repo_stats(repository,graph,phases=None,pool=None):
+    if phases is None:
+        phases = set(PHASES)
+    reader = reader_of(pool, repository)
+    requests = reader.requests
+    role_table(graph).start_repo(repository.full_name)
+    graph.graph["repo"] = repository.full_name
+
+    print "-----"
+    print "DESCRIPTION:",repository.description
+    print "-----"
+    print "OWNER:",repository.owner.login
+    set_role(graph, login_of(repository.owner), "owner")
+
+    weeks = {}
+    if "contributors" in phases or ("commits" in phases and "commit_succession" in phases):
+        print "-----"
+        print "CONTRIBUTORS"
+        print ""
+        for i in reader.activity(repository.url):
+            print "-", login_of(i.user), "in", len(i.weeks), "weeks"
+            if "contributors" in phases:
+                set_role(graph, login_of(i.user), "contributor")
+            for w, c in i.weeks:
+                weeks.setdefault(w, []).append(login_of(i.user))
+
+    if "commits" in phases and "commit_succession" in phases:
+        print "-----"
+        print "ADDING EDGES FROM THE WEEKS OF COMMITS"
+        print ""
+        add_coactivity_edges(graph, weeks)
+
+    role_table(graph).end_repo()
+    print "-----"
+    print "Requests:",reader.requests-requests
+
+    return
+
+
+if __name__ == "__main__":
+    pass
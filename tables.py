@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+#
+# Social analysis of GitHub: the graph as columnar tables
+#
+# Author: Massimo Menichinelli
+# Homepage: http://www.openp2pdesign.org
+# License: GPL v.3
+#
+# Requisite:
+# install pyArrow with pip install pyarrow (optional, for Parquet and Arrow)
+#
+# The .gexf files are made for Gephi; the tables are made for dataframes.
+# Every graph is written as two tables, that can be concatenated with the
+# ones of other repositories and queried without parsing any XML:
+#
+#   nodes: login, roles (the bits of roles.BITS), owner, contributor, collaborator, watcher
+#   edges: source, target, weight, interaction, repo, timestamp
+#
+# An edge row counts the interactions of the same kind, in the same repository
+# and at the same time between two users. The rows are sorted by repository and
+# time, and written in row groups (record batches for Arrow) of ROW_GROUP rows.
+# The logins, interactions and repositories are dictionary-encoded.
+#
+# Without pyarrow the tables are written as CSV files compressed with gzip.
+#
+# The scripts use it with --tables (Parquet, or CSV without pyarrow) or --tables=parquet|arrow|csv
+#
+
+import csv
+import datetime
+import gzip
+import sys
+
+from crawlstate import LoginInterner
+from roles import ROLES, BITS, role_table
+
+FORMATS = ["parquet", "arrow", "csv"]
+EXTENSIONS = {"parquet": ".parquet", "arrow": ".arrow", "csv": ".csv.gz"}
+ROW_GROUP = 65536
+
+NODE_COLUMNS = ["login", "roles"] + ROLES
+EDGE_COLUMNS = ["source", "target", "weight", "interaction", "repo", "timestamp"]
+
+
+def node_rows(graph):
+    table = role_table(graph)
+    for login in sorted(graph.nodes_iter()):
+        flags = table.get(login)
+        yield [login, flags] + [bool(flags & BITS[r]) for r in ROLES]
+
+
+def edge_rows(graph):
+    # The interactions of a MultiDiGraph (or the weighted edges of a DiGraph), counted
+    weights = {}
+    for u, v, d in graph.edges_iter(data=True):
+        key = (d.get("repo", ""), d.get("timestamp", ""), str(u), str(v), d.get("interaction", ""))
+        weights[key] = weights.get(key, 0) + d.get("weight", 1)
+    for repo, timestamp, u, v, interaction in sorted(weights):
+        if timestamp != "":
+            date = datetime.datetime.strptime(timestamp, "%Y-%m-%dT%H:%M:%S")
+        else:
+            date = None
+        yield [u, v, weights[(repo, timestamp, u, v, interaction)], interaction, repo, date]
+
+
+def groups(rows, size=ROW_GROUP):
+    group = []
+    for r in rows:
+        group.append(r)
+        if len(group) == size:
+            yield group
+            group = []
+    if len(group) > 0:
+        yield group
+
+
+def write_csv(path, columns, rows):
+    f = gzip.open(path, "wb")
+    writer = csv.writer(f)
+    writer.writerow(columns)
+    for r in rows:
+        writer.writerow(["" if x is None else x.strftime("%Y-%m-%dT%H:%M:%S") if isinstance(x, datetime.datetime) else x
+                         for x in r])
+    f.close()
+
+
+def column_types(pa):
+    return {"login": pa.string(), "roles": pa.int8(), "source": pa.string(), "target": pa.string(),
+            "weight": pa.int32(), "interaction": pa.string(), "repo": pa.string(),
+            "timestamp": pa.timestamp("s"), "owner": pa.bool_(), "contributor": pa.bool_(),
+            "collaborator": pa.bool_(), "watcher": pa.bool_()}
+
+
+def arrays(pa, columns, group, dictionaries):
+    # The columns of a group of rows. The string columns are dictionary-encoded against
+    # the whole dictionary of the table, so that every batch shares the same one
+    types = column_types(pa)
+    result = []
+    for k, name in enumerate(columns):
+        values = [r[k] for r in group]
+        if name in dictionaries:
+            interner, dictionary = dictionaries[name]
+            indices = pa.array([interner.ids[x] for x in values], pa.int32())
+            result.append(pa.DictionaryArray.from_arrays(indices, dictionary))
+        else:
+            result.append(pa.array(values, types[name]))
+    return result
+
+
+def write_arrow(pa, path, columns, rows, encoded):
+    # An Arrow IPC file, with a record batch for every group of rows.
+    # rows returns a new iterator of the rows: a first pass builds the dictionaries,
+    # which the file needs before its first batch, and a second one writes the batches
+    interners = [LoginInterner() for names in encoded]
+    for r in rows():
+        for names, interner in zip(encoded, interners):
+            for name in names:
+                interner.intern(r[columns.index(name)])
+    dictionaries = {}
+    for names, interner in zip(encoded, interners):
+        dictionary = pa.array(interner.logins, pa.string())
+        for name in names:
+            dictionaries[name] = (interner, dictionary)
+    sink = open(path, "wb")
+    writer = None
+    for group in groups(rows()):
+        batch = pa.RecordBatch.from_arrays(arrays(pa, columns, group, dictionaries), columns)
+        if writer is None:
+            writer = pa.RecordBatchFileWriter(sink, batch.schema)
+        writer.write_batch(batch)
+    if writer is None:
+        # An empty table, with its schema only
+        batch = pa.RecordBatch.from_arrays(arrays(pa, columns, [], dictionaries), columns)
+        writer = pa.RecordBatchFileWriter(sink, batch.schema)
+        writer.write_batch(batch)
+    writer.close()
+    sink.close()
+
+
+def write_parquet(pa, pq, path, columns, rows):
+    # A Parquet file, with a row group for every group of rows.
+    # Parquet encodes the strings with a dictionary by itself
+    types = column_types(pa)
+    schema = pa.schema([pa.field(name, types[name]) for name in columns])
+    writer = pq.ParquetWriter(path, schema, compression="snappy", use_dictionary=True)
+    for group in groups(rows):
+        writer.write_table(pa.Table.from_arrays(arrays(pa, columns, group, {}), schema=schema))
+    writer.close()
+
+
+def write_tables(graph, prefix, format="parquet"):
+    # Write prefix_nodes and prefix_edges, and return their paths
+    if format not in FORMATS:
+        raise ValueError("Unknown format: "+format+" (available: "+", ".join(FORMATS)+")")
+    if format != "csv":
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            print "pyarrow is not installed, the tables are written as CSV files"
+            format = "csv"
+    paths = []
+    for name, columns, rows, encoded in [("_nodes", NODE_COLUMNS, node_rows, [["login"]]),
+                                         ("_edges", EDGE_COLUMNS, edge_rows, [["source", "target"], ["interaction"], ["repo"]])]:
+        path = prefix+name+EXTENSIONS[format]
+        if format == "csv":
+            write_csv(path, columns, rows(graph))
+        elif format == "arrow":
+            write_arrow(pa, path, columns, lambda: rows(graph), encoded)
+        else:
+            write_parquet(pa, pq, path, columns, rows(graph))
+        paths.append(path)
+    return paths
+
+
+def tables_format(flags):
+    # The format of the --tables option, or None
+    if "tables" not in flags:
+        return None
+    if flags["tables"] is True:
+        return "parquet"
+    if flags["tables"] not in FORMATS:
+        sys.exit("Unknown format: "+flags["tables"]+" (available: "+", ".join(FORMATS)+")")
+    return flags["tables"]
+
+
+if __name__ == "__main__":
+    pass
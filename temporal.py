@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+#
+# Social analysis of GitHub: temporal snapshots of a mined network
+#
+# Author: Massimo Menichinelli
+# Homepage: http://www.openp2pdesign.org
+# License: GPL v.3
+#
+# Requisite:
+# install NetworkX with pip install networkx
+#
+# analyse_repo records the time of every interaction in the "timestamp"
+# attribute of its edges, so a single mining of a repository is enough
+# to build the networks of any number of time windows.
+#
+
+import bisect
+import datetime
+import networkx as nx
+
+ROLES = ["owner", "contributor", "collaborator", "watcher"]
+
+
+def add_months(date, months):
+    month = date.month - 1 + months
+    return datetime.date(date.year + month // 12, month % 12 + 1, 1)
+
+
+def month_windows(graph, size=1, step=None):
+    # Windows of "size" months, one every "step" months (by default they do not overlap),
+    # covering all the timestamps of the edges of the graph.
+    # Every window is a (start, end) pair of "YYYY-MM-DD" strings, the end is excluded.
+    if step is None:
+        step = size
+    timestamps = [d["timestamp"] for u,v,d in graph.edges_iter(data=True) if d.get("timestamp", "") != ""]
+    if len(timestamps) == 0:
+        return []
+    first = datetime.datetime.strptime(min(timestamps)[:7], "%Y-%m").date()
+    last = max(timestamps)
+    windows = []
+    start = first
+    while str(start) <= last:
+        windows.append((str(start), str(add_months(start, size))))
+        start = add_months(start, step)
+    return windows
+
+
+def edges_by_window(graph, windows):
+    # A single pass on the edges: for every window the list of (subject, object) interactions in it.
+    # The windows have all the same size, so both their starts and their ends are sorted.
+    starts = [w[0] for w in windows]
+    found = [[] for w in windows]
+    for u,v,d in graph.edges_iter(data=True):
+        t = d.get("timestamp", "")
+        if t == "":
+            continue
+        k = bisect.bisect_right(starts, t) - 1
+        while k >= 0 and t < windows[k][1]:
+            found[k].append((u, v))
+            k -= 1
+    return found
+
+
+def copy_roles(graph, graph2, node):
+    data = graph.node[node]
+    graph2.add_node(node, **dict((r, data[r]) for r in ROLES if r in data))
+
+
+def windowed_graphs(graph, windows):
+    # The weighted network of every window, with the nodes that interacted in it
+    snapshots = []
+    for w, edges in zip(windows, edges_by_window(graph, windows)):
+        graph2 = nx.DiGraph()
+        for subject_id, object_id in edges:
+            for n in (subject_id, object_id):
+                if n not in graph2:
+                    copy_roles(graph, graph2, n)
+            if graph2.has_edge(subject_id, object_id):
+                graph2[subject_id][object_id]["weight"] += 1
+            else:
+                graph2.add_edge(subject_id, object_id, weight=1)
+        snapshots.append((w, graph2))
+    return snapshots
+
+
+def last_day(window):
+    # Gephi reads the spells as closed intervals, so a window ends the day before the next one
+    end = datetime.datetime.strptime(window[1], "%Y-%m-%d").date()
+    return str(end - datetime.timedelta(days=1))
+
+
+def dynamic_graph(graph, windows):
+    # A single dynamic network: nodes and edges have a spell for every window in which they interact,
+    # the dynamic "interactions" of the edges change from window to window, and their weight is the total
+    graph2 = nx.DiGraph()
+    for w, snapshot in windowed_graphs(graph, windows):
+        spell = (w[0], last_day(w))
+        for n in snapshot.nodes_iter():
+            if n not in graph2:
+                copy_roles(graph, graph2, n)
+                graph2.node[n]["spells"] = []
+            graph2.node[n]["spells"].append(spell)
+        for subject_id, object_id, d in snapshot.edges_iter(data=True):
+            if not graph2.has_edge(subject_id, object_id):
+                graph2.add_edge(subject_id, object_id, spells=[], interactions=[], weight=0)
+            graph2[subject_id][object_id]["spells"].append(spell)
+            graph2[subject_id][object_id]["interactions"].append((d["weight"], spell[0], spell[1]))
+            graph2[subject_id][object_id]["weight"] += d["weight"]
+    return graph2
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+#
+# Social analysis of GitHub: tests of the queue of mining jobs of jobqueue.py
+#
+#   python -m unittest discover tests
+#
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+import networkx as nx
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from jobqueue import JobQueue, Heartbeat
+
+
+class LeaseTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "queue.db")
+        self.queue = JobQueue(self.path, lease=0.6)
+        self.queue.enqueue("org", "org/repo", ["stargazers"])
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_heartbeat_keeps_a_long_job(self):
+        job = self.queue.claim("slow")
+        heartbeat = Heartbeat(self.path, job[0], "slow", 0.6)
+        heartbeat.start()
+        time.sleep(1.5)
+        # Another worker finds no stale job to take
+        self.assertEqual(JobQueue(self.path, lease=0.6).claim("other"), None)
+        heartbeat.stop()
+        self.assertTrue(self.queue.complete(job[0], "slow", nx.MultiDiGraph()))
+
+    def test_expired_lease_is_not_renewed(self):
+        job = self.queue.claim("slow")
+        time.sleep(0.8)
+        self.assertEqual(self.queue.claim("other")[0], job[0])
+        self.assertFalse(self.queue.renew(job[0], "slow"))
+        self.assertFalse(self.queue.complete(job[0], "slow", nx.MultiDiGraph()))
+
+
+if __name__ == "__main__":
+    unittest.main()
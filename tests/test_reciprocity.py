@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+#
+# Social analysis of GitHub: tests of the reciprocity of the compact and sharded crawls
+#
+#   python -m unittest discover tests
+#
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import networkx as nx
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from reciprocity import add_neighbourhood
+from sharding import load_graph, load_state
+
+FOLLOWERS = {
+    "alice": ["bob", "carol", "dave"],
+    "bob": ["alice"],
+}
+FOLLOWING = {
+    "alice": ["bob", "erin"],
+    "bob": ["alice", "carol"],
+}
+
+
+class ReciprocityTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.edges = os.path.join(self.dir, "merged.edges")
+        self.crawled = nx.DiGraph()
+        for login in FOLLOWERS:
+            add_neighbourhood(self.crawled, login, FOLLOWERS[login], FOLLOWING[login])
+        f = open(self.edges, "w")
+        for u, v in sorted(self.crawled.edges()):
+            f.write(u+"\t"+v+"\n")
+        f.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def check(self, graph, listed):
+        for u, v, d in self.crawled.edges_iter(data=True):
+            self.assertEqual(graph[u][v]["reciprocal"], d["reciprocal"])
+        for login in listed:
+            for name in ("mutual", "followers_only", "following_only"):
+                self.assertEqual(graph.node[login][name], self.crawled.node[login][name])
+
+    def test_sharded_graph(self):
+        self.check(load_graph(self.edges, ["alice"]), ["alice", "bob"])
+
+    def test_compact_state(self):
+        state = load_state(self.edges, ["alice"])
+        path = os.path.join(self.dir, "state.gexf")
+        state.write_gexf(path)
+        graph = nx.read_gexf(path)
+        self.check(graph, ["alice", "bob"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+#
+# Social analysis of GitHub: tests of the reduction of the networks of reduction.py
+#
+#   python -m unittest discover tests
+#
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import networkx as nx
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from crawlstate import CrawlState
+from reduction import reduce_from_flags, reduce_graph
+
+
+class CompactReductionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.graph = nx.gnm_random_graph(300, 700, seed=4, directed=True)
+        self.state = CrawlState(limit=200, directory=self.dir)
+        for u, v in self.graph.edges_iter():
+            self.state.add_edge(str(u), str(v))
+
+    def tearDown(self):
+        self.state.edges.close()
+        shutil.rmtree(self.dir)
+
+    def test_written_crawl_is_the_reduced_graph(self):
+        keep = reduce_from_flags({"kcore": "3", "mindegree": "2"}, state=self.state)
+        path = os.path.join(self.dir, "compact.gexf")
+        self.state.write_gexf(path, keep=keep)
+        written = nx.read_gexf(path)
+        graph = nx.DiGraph((str(u), str(v)) for u, v in self.graph.edges_iter())
+        reduce_graph(graph, mindegree=2, k=3)
+        self.assertEqual(sorted(written.nodes()), sorted(graph.nodes()))
+        self.assertEqual(sorted(written.edges()), sorted(graph.edges()))
+
+    def test_unsupported_flags_are_refused(self):
+        self.assertRaises(SystemExit, reduce_from_flags, {"collapse": True}, state=self.state)
+        self.assertRaises(SystemExit, reduce_from_flags, {"minweight": "2"}, state=self.state)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+#
+# Social analysis of GitHub: tests of the temporal snapshots of temporal.py
+#
+#   python -m unittest discover tests
+#
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import networkx as nx
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from temporal import month_windows, dynamic_graph
+
+
+class DynamicGraphTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_dynamic_gexf_round_trip(self):
+        graph = nx.MultiDiGraph()
+        graph.add_node("alice", watcher="Yes")
+        graph.add_node("bob", watcher="No")
+        for t in ["2013-01-05T10:00:00", "2013-01-20T10:00:00", "2013-03-02T10:00:00"]:
+            graph.add_edge("alice", "bob", timestamp=t)
+        path = os.path.join(self.dir, "dynamic.gexf")
+        nx.write_gexf(dynamic_graph(graph, month_windows(graph)), path)
+        read = nx.read_gexf(path)
+        edge = read["alice"]["bob"]
+        self.assertEqual(edge["weight"], 3)
+        self.assertEqual(sorted(edge["interactions"]), [(1, "2013-03-01", "2013-03-31"), (2, "2013-01-01", "2013-01-31")])
+        self.assertEqual(len(read.node["alice"]["spells"]), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
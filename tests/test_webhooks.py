@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+#
+# Social analysis of GitHub: tests of the live network of webhooks.py
+#
+#   python -m unittest discover tests
+#
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+import xml.etree.ElementTree as ET
+
+import networkx as nx
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from events import EventState
+from webhooks import LiveGraph
+
+
+def delta(edges):
+    # The network of a batch of events, as apply builds it before folding it
+    graph = nx.MultiDiGraph()
+    for u, v in edges:
+        graph.add_edge(u, v, interaction="issue_comments")
+    return graph
+
+
+def edge_ids(path):
+    return [e.get("id") for e in ET.parse(path).getroot().iter() if e.tag.endswith("}edge")]
+
+
+class RestartTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "live.gexf")
+        self.state = os.path.join(self.dir, "state.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def live(self):
+        return LiveGraph(self.path, None, None, EventState(self.state))
+
+    def test_edges_keep_unique_ids_after_restart(self):
+        live = self.live()
+        live.fold(delta([("alice", "bob"), ("bob", "carol")]))
+        live.checkpoint()
+        live = self.live()
+        live.fold(delta([("carol", "alice"), ("alice", "bob")]))
+        live.checkpoint()
+        ids = edge_ids(self.path)
+        self.assertEqual(len(ids), 3)
+        self.assertEqual(len(set(ids)), 3)
+        graph = nx.read_gexf(self.path)
+        self.assertEqual(graph.number_of_edges(), 3)
+        self.assertEqual(graph["alice"]["bob"]["weight"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
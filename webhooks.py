@@ -0,0 +1,346 @@
+# -*- coding: utf-8 -*-
+#
+# Social analysis of GitHub: a local service that updates a network with the webhooks of GitHub
+#
+# Author: Massimo Menichinelli
+# Homepage: http://www.openp2pdesign.org
+# License: GPL v.3
+#
+# Requisite:
+# install NetworkX with pip install networkx
+#
+# The repositories (or Organizations) that we administer can send their
+# activity to a webhook instead of being polled (see events). This service
+# receives the webhooks, and adds their edges and roles to a weighted network
+# kept in memory, with the same rules of the events:
+#
+#   issues, issue_comment, commit_comment, push, pull_request, star, member
+#
+#   python webhooks.py --secret=FILE --port=8080 --out=FILE.gexf
+#
+# The secret of the webhook is read from a file, and every webhook without its
+# signature (X-Hub-Signature-256) is refused. The webhooks are queued and
+# applied in batches of --batch=N (100 by default) by a single thread; when
+# --backlog=N (1000 by default) webhooks are waiting, the new ones are refused
+# with "503 Service Unavailable" until the queue has room again. A webhook
+# delivered twice (with the same X-GitHub-Delivery) is applied only once.
+#
+# The network is saved in --out=FILE.gexf (and loaded from it when the service
+# starts again) every --checkpoint=SECONDS (60 by default), writing a new file
+# and renaming it, so graphservice can load it from the same directory. With
+# --store=FILE the edges of every repository are also added to its run in the
+# store (see graphdb). With --tokens=FILE the previous commenters of an issue or
+# a commit are requested to GitHub the first time it is commented, as in
+# events; without it the network has only the comments received.
+#
+# With --record=DIR every webhook received is also saved in a file, and the
+# files can be sent again to a local instance of the service, in order:
+#
+#   python webhooks.py --secret=FILE --replay=DIR --url=http://localhost:8080/
+#
+# GET /stats gives the number of webhooks received, refused and applied.
+#
+
+import BaseHTTPServer
+import Queue
+import SocketServer
+import hashlib
+import hmac
+import json
+import os
+import sys
+import threading
+import time
+import urllib2
+from collections import OrderedDict
+
+import networkx as nx
+
+from options import get_flags
+from records import Reader
+from repoanalysis import phases_from_flags
+from roles import ROLES, role_table, export_roles
+from events import EventState, apply_event
+from graphdb import store_from_flags, script_name
+
+# The webhooks that have the same payload of an event of the Events API
+EVENTS = {"issues": "IssuesEvent", "issue_comment": "IssueCommentEvent", "commit_comment": "CommitCommentEvent",
+          "push": "PushEvent", "pull_request": "PullRequestEvent", "star": "WatchEvent", "member": "MemberEvent"}
+
+# The deliveries remembered in order to skip the ones delivered twice
+DELIVERIES = 10000
+
+
+def signature(secret, body):
+    return "sha256="+hmac.new(secret, body, hashlib.sha256).hexdigest()
+
+
+def verify(secret, body, header):
+    return header is not None and hmac.compare_digest(signature(secret, body), str(header))
+
+
+def now():
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+
+def as_event(name, payload, received):
+    # A webhook as an event of the Events API (see events.apply_event), or None when it has no edges
+    if name not in EVENTS or (name == "star" and payload.get("action") != "created"):
+        return None
+    repository = payload.get("repository") or {}
+    created = payload.get("starred_at") or (payload.get("head_commit") or {}).get("timestamp") or received
+    return {"type": EVENTS[name], "actor": payload.get("sender"), "created_at": created, "payload": payload,
+            "repo": {"name": repository.get("full_name"), "url": repository.get("url")}}
+
+
+class LiveGraph(object):
+    # The weighted network, updated with batches of events and saved from time to time
+
+    def __init__(self, path, phases, reader, state, store=None):
+        self.path = path
+        self.phases = phases
+        self.reader = reader
+        self.state = state
+        self.store = store
+        if os.path.exists(path):
+            self.graph = nx.read_gexf(path)
+            # The ids of the old edges would clash with the ones the writer gives to the new edges
+            for u, v, d in self.graph.edges_iter(data=True):
+                d.pop("id", None)
+        else:
+            self.graph = nx.DiGraph()
+        self.lock = threading.Lock()
+        self.applied = 0
+        self.batches = 0
+        self.checkpoints = 0
+        self.dirty = False
+
+    def apply(self, events):
+        # The edges and roles of the events of every repository, as in analyse_repo
+        deltas = OrderedDict()
+        for e in events:
+            repo = e["repo"]["name"]
+            if repo not in deltas:
+                deltas[repo] = nx.MultiDiGraph(repo=repo)
+                role_table(deltas[repo]).start_repo(repo)
+            apply_event(deltas[repo], e, self.phases, self.reader, self.state)
+        for repo, delta in deltas.items():
+            role_table(delta).end_repo()
+            export_roles(delta)
+            if "None" in delta:
+                delta.remove_node('None')
+            with self.lock:
+                self.fold(delta)
+            if self.store is not None:
+                self.store.save_graph(script_name(), repo, delta, replace=False)
+        self.applied += len(events)
+        self.batches += 1
+        self.dirty = True
+
+    def fold(self, delta):
+        # Multiple edges become weights, and the roles of a user are never lost
+        for n, d in delta.nodes_iter(data=True):
+            if n not in self.graph:
+                self.graph.add_node(n, label=n, **dict((r, "No") for r in ROLES))
+            for r in ROLES:
+                if d.get(r) == "Yes":
+                    self.graph.node[n][r] = "Yes"
+        for u, v in delta.edges_iter():
+            if self.graph.has_edge(u, v):
+                self.graph[u][v]["weight"] += 1
+            else:
+                self.graph.add_edge(u, v, weight=1)
+
+    def checkpoint(self):
+        # A new file renamed over the old one: who reads it never finds it half written
+        with self.lock:
+            nx.write_gexf(self.graph, self.path+".tmp")
+            self.dirty = False
+        os.rename(self.path+".tmp", self.path)
+        self.state.save()
+        self.checkpoints += 1
+        print "Saved",self.graph.number_of_nodes(),"nodes and",self.graph.number_of_edges(),"edges in",self.path
+
+
+class Receiver(object):
+    # The webhooks received, waiting to be applied
+
+    def __init__(self, live, secret, backlog=1000, batch=100, record=None):
+        self.live = live
+        self.secret = secret
+        self.queue = Queue.Queue(backlog)
+        self.batch = batch
+        self.record = record
+        self.deliveries = OrderedDict()
+        self.lock = threading.Lock()
+        self.counters = {"received": 0, "refused": 0, "invalid": 0, "duplicates": 0, "ignored": 0}
+
+    def count(self, name):
+        with self.lock:
+            self.counters[name] += 1
+
+    def seen(self, delivery):
+        # True for a delivery that has already been accepted
+        with self.lock:
+            if delivery in self.deliveries:
+                return True
+            self.deliveries[delivery] = True
+            if len(self.deliveries) > DELIVERIES:
+                self.deliveries.popitem(last=False)
+            return False
+
+    def forget(self, delivery):
+        with self.lock:
+            self.deliveries.pop(delivery, None)
+
+    def receive(self, name, delivery, header, body):
+        # The status and the message of the answer to a webhook
+        if not verify(self.secret, body, header):
+            self.count("invalid")
+            return 401, "Invalid signature"
+        if name == "ping":
+            return 200, "pong"
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            self.count("invalid")
+            return 400, "Invalid JSON"
+        if delivery is not None and self.seen(delivery):
+            self.count("duplicates")
+            return 200, "Already received"
+        event = as_event(name, payload, now())
+        if event is None:
+            self.count("ignored")
+            return 200, "Ignored"
+        try:
+            # Wait a little for the queue to have room, then let GitHub (or replay) try again later
+            self.queue.put(event, timeout=1)
+        except Queue.Full:
+            self.count("refused")
+            self.forget(delivery)
+            return 503, "Too many webhooks, try again later"
+        self.count("received")
+        if self.record is not None:
+            f = open(os.path.join(self.record, "%.6f-%s.json" % (time.time(), delivery or "")), "w")
+            json.dump({"event": name, "delivery": delivery, "payload": payload}, f)
+            f.close()
+        return 202, "Accepted"
+
+    def run(self, interval=60, flush=1.0):
+        # Apply the webhooks in batches, and save the network every interval seconds
+        last = time.time()
+        while True:
+            events = []
+            try:
+                events.append(self.queue.get(timeout=flush))
+                while len(events) < self.batch:
+                    events.append(self.queue.get_nowait())
+            except Queue.Empty:
+                pass
+            if len(events) > 0:
+                try:
+                    self.live.apply(events)
+                except Exception, e:
+                    print "Error applying",len(events),"webhooks:",e
+            if self.live.dirty and time.time() - last >= interval:
+                self.live.checkpoint()
+                last = time.time()
+
+    def stats(self):
+        with self.lock:
+            stats = dict(self.counters)
+        stats.update({"waiting": self.queue.qsize(), "applied": self.live.applied, "batches": self.live.batches,
+                      "checkpoints": self.live.checkpoints, "nodes": self.live.graph.number_of_nodes(),
+                      "edges": self.live.graph.number_of_edges()})
+        return stats
+
+
+class ThreadedHTTPServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+def serve(receiver, port=8080):
+
+    class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+        def answer(self, status, answer):
+            self.send_response(status)
+            if status == 503:
+                self.send_header("Retry-After", "1")
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(answer)))
+            self.end_headers()
+            self.wfile.write(answer)
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            status, message = receiver.receive(self.headers.get("X-GitHub-Event"), self.headers.get("X-GitHub-Delivery"),
+                                               self.headers.get("X-Hub-Signature-256"), body)
+            self.answer(status, json.dumps({"message": message}))
+
+        def do_GET(self):
+            if self.path == "/stats":
+                self.answer(200, json.dumps(receiver.stats()))
+            else:
+                self.answer(404, json.dumps({"error": "Unknown query: "+self.path}))
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadedHTTPServer(("", port), Handler)
+    print "Webhooks received on http://localhost:"+str(port)+"/"
+    server.serve_forever()
+
+
+def replay(directory, url, secret):
+    # Send the webhooks recorded in a directory again, in the order in which they were received
+    sent = 0
+    for f in sorted(os.listdir(directory)):
+        if not f.endswith(".json"):
+            continue
+        data = json.load(open(os.path.join(directory, f)))
+        body = json.dumps(data["payload"])
+        headers = {"Content-Type": "application/json", "X-GitHub-Event": data["event"],
+                   "X-GitHub-Delivery": data.get("delivery") or f, "X-Hub-Signature-256": signature(secret, body)}
+        while True:
+            try:
+                urllib2.urlopen(urllib2.Request(url, body, headers)).read()
+                sent += 1
+                break
+            except urllib2.HTTPError, e:
+                if e.code != 503:
+                    print f,":",e.code,e.read()
+                    break
+                time.sleep(int(e.headers.get("Retry-After", 1)))
+    print sent,"webhooks sent to",url
+
+
+if __name__ == "__main__":
+    flags = get_flags()
+    if "secret" not in flags or flags["secret"] is True:
+        sys.exit("The secret of the webhook is needed: --secret=FILE")
+    secret = open(flags["secret"]).read().strip()
+    port = int(flags.get("port", 8080))
+    if "replay" in flags:
+        replay(flags["replay"], flags.get("url", "http://localhost:"+str(port)+"/"), secret)
+        sys.exit()
+
+    if "tokens" in flags:
+        from credentials import login
+        reader = login(flags).reader
+    else:
+        reader = Reader(None)
+    state = EventState(flags.get("events", "webhooks_events.json"))
+    live = LiveGraph(flags.get("out", "webhooks_social_interactions_analysis.gexf"), phases_from_flags(flags),
+                     reader, state, store_from_flags(flags))
+    record = flags.get("record")
+    if record is not None and not os.path.exists(record):
+        os.makedirs(record)
+    receiver = Receiver(live, secret, int(flags.get("backlog", 1000)), int(flags.get("batch", 100)), record)
+    worker = threading.Thread(target=receiver.run, args=(float(flags.get("checkpoint", 60)),))
+    worker.daemon = True
+    worker.start()
+    try:
+        serve(receiver, port)
+    except KeyboardInterrupt:
+        # The webhooks still waiting are lost, the ones applied are saved
+        live.checkpoint()